@@ -3,23 +3,83 @@ Flask wrapper for Maze Game
 Provides web interface and launches the Pygame game
 """
 
-from flask import Flask, render_template_string, jsonify
+from flask import Flask, Response, g, render_template_string, jsonify, request
 from flask_cors import CORS
-import subprocess
 import os
 import sys
+import threading
+import time
+
+import config
+import metrics
+from frame_server import play_blueprint, registry
+from leaderboard import leaderboard
+from maze_cache import etag_for, iter_binary, iter_json, maze_cache, parse_query
+from replay import Layout, Replay
+from replay_verifier import verifier
+from session_pool import SessionPool
 
 app = Flask(__name__)
 CORS(app)
+app.register_blueprint(play_blueprint)
+
+REQUEST_SECONDS = metrics.histogram('http_request_duration_seconds',
+                                    'Time to produce a response (first byte for streams)',
+                                    ['route', 'method', 'status'])
 
 # Get the directory of this script
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
+_session_pool = None
+_session_pool_lock = threading.Lock()
 
-@app.route('/')
-def index():
-    """Serve the game interface page"""
-    html = """
+
+def get_session_pool():
+    """Game process pool, created and pre-warmed on first use"""
+    global _session_pool
+    with _session_pool_lock:
+        if _session_pool is None:
+            # Prefer the project venv, fall back to system python
+            venv_python = os.path.join(BASE_DIR, 'venv', 'bin', 'python3')
+            if not os.path.exists(venv_python):
+                venv_python = 'python3'
+            _session_pool = SessionPool(
+                [venv_python, os.path.join(BASE_DIR, 'session_worker.py')],
+                cwd=BASE_DIR,
+                max_games=config.MAX_GAME_SESSIONS,
+                warm_size=config.WARM_GAME_PROCESSES,
+                queue_size=config.LAUNCH_QUEUE_SIZE,
+                warm_idle_timeout=config.WARM_IDLE_TIMEOUT,
+            )
+            _session_pool.start()
+            metrics.gauge('game_processes', 'Desktop game processes by state',
+                          lambda: {state: _session_pool.stats()[state] for state in ('running', 'warm', 'queued')},
+                          ['state'])
+    return _session_pool
+
+
+metrics.gauge('maze_cache_entries', 'Layouts held in the maze cache', lambda: len(maze_cache.entries))
+metrics.gauge('maze_cache_bytes', 'Bytes held in the maze cache', lambda: maze_cache.size)
+
+
+@app.before_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def _record_latency(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        # Route pattern rather than path, so session ids don't explode the label set
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_SECONDS.labels(route, request.method, response.status_code).observe(
+            time.perf_counter() - started)
+    return response
+
+
+# Landing page, shared with the ASGI front end
+INDEX_HTML = """
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -123,6 +183,7 @@ def index():
             <p>Navigate through procedurally generated mazes to reach the exit!</p>
             
             <button class="btn" onclick="launchGame()">🚀 Launch Game</button>
+            <a href="/play" class="btn">🌐 Play in Browser</a>
             <a href="/api/status" class="btn" style="background: #6c757d;">ℹ️ Game Info</a>
             
             <div class="info-box">
@@ -172,13 +233,11 @@ def index():
     </body>
     </html>
     """
-    return render_template_string(html)
 
 
-@app.route('/api/status')
-def status():
-    """Get game status and information"""
-    return jsonify({
+def status_info():
+    """Game status and information, including pool and cache state"""
+    return {
         'name': 'Maze Game',
         'type': 'desktop',
         'description': 'A Python-based maze game built with Pygame',
@@ -188,46 +247,190 @@ def status():
             'Smooth player controls',
             'Win condition',
             'Simple, fun gameplay'
-        ]
-    })
+        ],
+        'sessions': get_session_pool().stats(),
+        'browser_sessions': len(registry.sessions),
+        'maze_cache': maze_cache.stats(),
+    }
 
 
-@app.route('/api/launch', methods=['POST'])
-def launch():
-    """Launch the Pygame game"""
+def launch_game():
+    """Start or queue a game from the session pool, returns (payload, HTTP status)"""
     try:
-        # Get the path to main.py
-        main_py = os.path.join(BASE_DIR, 'main.py')
-        
-        # Activate venv and run the game
-        venv_python = os.path.join(BASE_DIR, 'venv', 'bin', 'python3')
-        
-        if not os.path.exists(venv_python):
-            # Fallback to system python
-            venv_python = 'python3'
-        
-        # Launch game in background
-        subprocess.Popen(
-            [venv_python, main_py],
-            cwd=BASE_DIR,
-            start_new_session=True
-        )
-        
-        return jsonify({
-            'success': True,
-            'message': 'Game launched successfully!'
-        })
+        result = get_session_pool().launch()
     except Exception as e:
-        return jsonify({
+        return {
             'success': False,
             'error': str(e)
-        }), 500
+        }, 500
+    
+    if result['status'] == 'full':
+        return {
+            'success': False,
+            'error': 'Too many games running, try again later'
+        }, 429
+    if result['status'] == 'queued':
+        return {
+            'success': True,
+            'message': f"Game queued (position {result['position']}), it starts when a running game closes",
+            **result
+        }, 202
+    return {
+        'success': True,
+        'message': 'Game launched successfully!',
+        **result
+    }, 200
+
+
+def leaderboard_page(args):
+    """Top runs filtered by difficulty and/or seed, returns (payload, HTTP status)"""
+    difficulty = args.get('difficulty') or None
+    if difficulty is not None and difficulty not in config.DIFFICULTIES:
+        return {'success': False, 'error': f'unknown difficulty {difficulty}'}, 400
+    try:
+        seed = int(args['seed']) if args.get('seed') else None
+        limit = max(1, min(100, int(args.get('limit', 10))))
+        runs, next_cursor = leaderboard.top(difficulty, seed, limit, args.get('cursor'))
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}, 400
+    return {'success': True, 'runs': runs, 'next_cursor': next_cursor}, 200
+
+
+def submit_replay(data: bytes):
+    """Queue a replay for verification; accepted runs reach the leaderboard. Returns (payload, HTTP status)"""
+    if len(data) > config.REPLAY_MAX_BYTES:
+        return {'success': False, 'error': 'replay too large'}, 413
+    try:
+        replay = Replay.from_bytes(data)
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}, 400
+    if replay.layout != Layout.of_tier(config.DIFFICULTIES[replay.difficulty]):
+        # Runs on another braid, terrain or key layout are not comparable on this leaderboard
+        return {'success': False, 'error': f'replay layout does not match {replay.difficulty}'}, 400
+    replay_hash = Replay.hash_of(data)
+    known = verifier.result(replay_hash)
+    if known is not None and known['ok'] is None:
+        return {'success': True, 'replay_hash': replay_hash, 'status': 'pending'}, 202
+    if (known is not None and known['ok']) or leaderboard.replay(replay_hash) is not None:
+        return {'success': True, 'replay_hash': replay_hash, 'status': 'accepted'}, 200
+    
+    def record(result):
+        if result['ok']:
+            leaderboard.submit(result['seed'], result['difficulty'], result['time'], result['moves'],
+                               replay_hash, data)
+    
+    if verifier.submit(data, record) is None:
+        return {'success': False, 'error': 'Verification queue is full, try again later'}, 503
+    return {'success': True, 'replay_hash': replay_hash, 'status': 'pending'}, 202
+
+
+def verification_info(replay_hash: str):
+    """Verdict for a submitted replay, returns (payload, HTTP status)"""
+    result = verifier.result(replay_hash)
+    if result is None:
+        if leaderboard.replay(replay_hash) is not None:
+            return {'success': True, 'replay_hash': replay_hash, 'status': 'accepted'}, 200
+        return {'success': False, 'error': 'unknown replay'}, 404
+    status = 'pending' if result['ok'] is None else 'accepted' if result['ok'] else 'rejected'
+    payload = {'success': True, 'replay_hash': replay_hash, 'status': status}
+    if status == 'rejected':
+        payload['reason'] = result['reason']
+    return payload, 200
+
+
+def health_info():
+    """Liveness plus the pool counters a load balancer might care about"""
+    pool = get_session_pool().stats()
+    return {
+        'status': 'healthy',
+        'pool': {key: pool[key] for key in ('running', 'max_games', 'warm', 'queued', 'queue_size')},
+    }
+
+
+@app.route('/')
+def index():
+    """Serve the game interface page"""
+    return render_template_string(INDEX_HTML)
+
+
+@app.route('/api/status')
+def status():
+    """Get game status and information"""
+    return jsonify(status_info())
+
+
+@app.route('/api/launch', methods=['POST'])
+def launch():
+    """Launch the Pygame game from the session pool"""
+    payload, code = launch_game()
+    return jsonify(payload), code
+
+
+@app.route('/api/maze')
+def maze():
+    """Generate (or fetch from cache) a maze wall grid as JSON or one byte per cell"""
+    try:
+        key, representation, seeded = parse_query(request.args, config.MAX_API_MAZE_SIZE)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    etag = etag_for(key, representation)
+    if seeded and request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        data = maze_cache.get_or_generate(key)
+        if representation == 'binary':
+            response = Response(iter_binary(data, key.width), mimetype='application/octet-stream')
+            response.headers['Content-Length'] = str(len(data))
+        else:
+            response = Response(iter_json(key, data), mimetype='application/json')
+    
+    response.set_etag(etag)
+    response.headers['X-Maze-Seed'] = str(key.seed)
+    response.headers['X-Maze-Size'] = f"{key.width}x{key.height}"
+    # A seeded layout never changes; an unseeded request is a one-off random maze
+    response.headers['Cache-Control'] = 'public, max-age=86400' if seeded else 'no-store'
+    return response
+
+
+@app.route('/api/leaderboard')
+def leaderboard_endpoint():
+    """Fastest runs; pass next_cursor back as ?cursor= for the following page"""
+    payload, code = leaderboard_page(request.args)
+    return jsonify(payload), code
+
+
+@app.route('/api/leaderboard', methods=['POST'])
+def leaderboard_submit():
+    """Submit a replay (raw bytes); it is listed once the server re-simulates it"""
+    payload, code = submit_replay(request.get_data(cache=False))
+    return jsonify(payload), code
+
+
+@app.route('/api/leaderboard/verify/<replay_hash>')
+def leaderboard_verification(replay_hash):
+    """Verification status of a submitted replay"""
+    payload, code = verification_info(replay_hash)
+    return jsonify(payload), code
+
+
+@app.route('/api/verifier')
+def verifier_stats():
+    """Replay verification throughput and rejection rate"""
+    return jsonify(verifier.stats())
+
+
+@app.route('/api/metrics')
+def metrics_endpoint():
+    """Prometheus text exposition of game and server metrics"""
+    get_session_pool()
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
 
 
 @app.route('/api/health')
 def health():
     """Health check endpoint"""
-    return jsonify({'status': 'healthy'})
+    return jsonify(health_info())
 
 
 if __name__ == '__main__':
@@ -235,4 +438,5 @@ if __name__ == '__main__':
     print(f"🎮 Maze Game Web Interface")
     print(f"📊 Running on http://localhost:{port}")
     print(f"💡 Use the 'Launch Game' button to start the Pygame game")
+    get_session_pool()  # Pre-warm game interpreters before the first click
     app.run(host='0.0.0.0', port=port, debug=False)
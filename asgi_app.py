@@ -0,0 +1,389 @@
+"""
+Async (ASGI) front end for the web interface
+Serves the same routes as app.py from one event loop; maze generation, game
+launches and browser-play simulation/encoding run in a thread pool so the loop
+only moves bytes. Run it with:
+
+    python asgi_app.py
+    uvicorn asgi_app:app --port 5107 --timeout-keep-alive 120
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator
+from urllib.parse import parse_qsl
+
+import jinja2
+
+import config
+import metrics
+from app import (REQUEST_SECONDS, INDEX_HTML, get_session_pool, health_info, launch_game, leaderboard_page,
+                 maze_cache, status_info, submit_replay, verification_info)
+from frame_server import PLAY_HTML, FrameGovernor, open_session, registry, stream_frames, stream_state
+from maze_cache import etag_for, iter_binary, iter_json, parse_query
+from replay_verifier import verifier
+
+
+executor = ThreadPoolExecutor(max_workers=config.ASGI_WORKER_THREADS, thread_name_prefix='asgi-worker')
+# Play streams step their generators here, so they never hold the threads offload() admits work to
+stream_executor = ThreadPoolExecutor(max_workers=config.ASGI_STREAM_THREADS, thread_name_prefix='asgi-stream')
+_play_page = jinja2.Template(PLAY_HTML).render(width=config.WINDOW_WIDTH, height=config.WINDOW_HEIGHT)
+
+
+class Busy(Exception):
+    """Raised when too much blocking work is already queued"""
+
+
+class Disconnected(Exception):
+    """The client went away (or stalled past the send timeout) mid-response"""
+
+
+class Request:
+    """Just enough of an HTTP request for the routes below"""
+    
+    def __init__(self, scope, receive, params):
+        self.scope = scope
+        self.receive = receive
+        self.params = params
+        self.method = scope['method']
+        self.args = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+        self.headers = {name.decode('latin-1').lower(): value.decode('latin-1')
+                        for name, value in scope.get('headers', [])}
+    
+    async def body(self, limit: int = 64 * 1024) -> bytes:
+        chunks, size = [], 0
+        while True:
+            message = await self.receive()
+            if message['type'] == 'http.disconnect':
+                raise Disconnected()
+            chunks.append(message.get('body', b''))
+            size += len(chunks[-1])
+            if size > limit:
+                raise ValueError('request body too large')
+            if not message.get('more_body'):
+                return b''.join(chunks)
+    
+    async def json(self) -> Dict:
+        try:
+            return json.loads(await self.body() or b'{}')
+        except json.JSONDecodeError:
+            return {}
+    
+    def if_none_match(self, etag: str) -> bool:
+        header = self.headers.get('if-none-match', '')
+        tags = [tag.strip() for tag in header.split(',')]
+        return '*' in tags or f'"{etag}"' in tags
+
+
+# Offloading with admission control
+
+_pending_jobs = 0
+_open_streams = 0  # Streams stepped on stream_executor
+
+
+async def offload(fn, *args):
+    """Run blocking work in the executor; refuse new work when the queue is already deep"""
+    global _pending_jobs
+    if _pending_jobs >= config.ASGI_MAX_PENDING_JOBS:
+        raise Busy()
+    _pending_jobs += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+    finally:
+        _pending_jobs -= 1
+
+
+# Responses
+
+def _headers(content_type: str, extra: Dict[str, str] = None):
+    headers = [(b'content-type', content_type.encode())]
+    for name, value in (extra or {}).items():
+        headers.append((name.lower().encode(), str(value).encode('latin-1')))
+    return headers
+
+
+async def send_body(send, body: bytes, status: int = 200, content_type: str = 'text/html; charset=utf-8',
+                    headers: Dict[str, str] = None):
+    all_headers = _headers(content_type, headers)
+    all_headers.append((b'content-length', str(len(body)).encode()))
+    await send({'type': 'http.response.start', 'status': status, 'headers': all_headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_json(send, payload, status: int = 200, headers: Dict[str, str] = None):
+    await send_body(send, json.dumps(payload).encode(), status, 'application/json', headers)
+
+
+async def send_stream(request: Request, send, chunks: Iterator, content_type: str,
+                      headers: Dict[str, str] = None, offload_each: bool = False):
+    """Stream an iterator with backpressure: the next chunk isn't produced until the
+    client has taken the last one, and a client stalled past ASGI_SEND_TIMEOUT is dropped.
+    offload_each pulls every chunk on stream_executor, refusing the stream with Busy
+    when each of its threads already has one"""
+    global _open_streams
+    if offload_each and _open_streams >= config.ASGI_STREAM_THREADS:
+        raise Busy()
+    disconnected = asyncio.Event()
+    watcher = None
+    
+    async def watch_disconnect():
+        while (await request.receive())['type'] != 'http.disconnect':
+            pass
+        disconnected.set()
+    
+    try:
+        # Taken before the first await and given back in finally, whatever fails in between
+        if offload_each:
+            _open_streams += 1
+        watcher = asyncio.create_task(watch_disconnect())
+        await send({'type': 'http.response.start', 'status': 200, 'headers': _headers(content_type, headers)})
+        while True:
+            if disconnected.is_set():
+                return
+            if offload_each:
+                chunk = await asyncio.get_running_loop().run_in_executor(stream_executor, next, chunks, None)
+            else:
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            try:
+                # Waits for the transport to drain when the client reads slowly
+                await asyncio.wait_for(send({'type': 'http.response.body', 'body': chunk, 'more_body': True}),
+                                       config.ASGI_SEND_TIMEOUT)
+            except asyncio.TimeoutError:
+                raise Disconnected()
+        await send({'type': 'http.response.body', 'body': b''})
+    except (Disconnected, OSError):
+        pass
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+        close = getattr(chunks, 'close', None)
+        if close:
+            await asyncio.get_running_loop().run_in_executor(stream_executor if offload_each else executor, close)
+        if offload_each:
+            _open_streams -= 1
+
+
+# Routes
+
+async def index(request, send):
+    await send_body(send, INDEX_HTML.encode())
+
+
+async def status(request, send):
+    # Only reads counters under short locks, cheap enough to answer inline
+    await send_json(send, status_info())
+
+
+async def launch(request, send):
+    payload, code = await offload(launch_game)
+    await send_json(send, payload, code)
+
+
+async def health(request, send):
+    await send_json(send, health_info())
+
+
+async def leaderboard_endpoint(request, send):
+    payload, code = await offload(leaderboard_page, request.args)
+    await send_json(send, payload, code)
+
+
+async def leaderboard_submit(request, send):
+    try:
+        data = await request.body(limit=config.REPLAY_MAX_BYTES)
+    except ValueError as e:
+        await send_json(send, {'success': False, 'error': str(e)}, 413)
+        return
+    payload, code = await offload(submit_replay, data)
+    await send_json(send, payload, code)
+
+
+async def leaderboard_verification(request, send):
+    payload, code = await offload(verification_info, request.params['replay_hash'])
+    await send_json(send, payload, code)
+
+
+async def verifier_stats(request, send):
+    await send_json(send, verifier.stats())
+
+
+async def metrics_endpoint(request, send):
+    body = await offload(metrics.render)
+    await send_body(send, body.encode(), content_type=metrics.CONTENT_TYPE)
+
+
+async def maze(request, send):
+    try:
+        key, representation, seeded = parse_query(request.args, config.MAX_API_MAZE_SIZE)
+    except ValueError as e:
+        await send_json(send, {'success': False, 'error': str(e)}, 400)
+        return
+    
+    etag = etag_for(key, representation)
+    headers = {
+        'ETag': f'"{etag}"',
+        'X-Maze-Seed': key.seed,
+        'X-Maze-Size': f"{key.width}x{key.height}",
+        'Cache-Control': 'public, max-age=86400' if seeded else 'no-store',
+    }
+    if seeded and request.if_none_match(etag):
+        await send({'type': 'http.response.start', 'status': 304, 'headers': _headers('application/json', headers)})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    
+    data = maze_cache.get(key)
+    if data is None:
+        data = await offload(maze_cache.get_or_generate, key)
+    if representation == 'binary':
+        headers['Content-Length'] = len(data)
+        await send_stream(request, send, iter_binary(data, key.width), 'application/octet-stream', headers)
+    else:
+        await send_stream(request, send, iter_json(key, data), 'application/json', headers)
+
+
+async def play_page(request, send):
+    await send_body(send, _play_page.encode())
+
+
+async def play_create(request, send):
+    payload, code = await offload(open_session, await request.json())
+    await send_json(send, payload, code)
+
+
+async def play_stream(request, send):
+    session = registry.get(request.params['session_id'])
+    if session is None:
+        await send_json(send, {'success': False, 'error': 'no such session'}, 404)
+        return
+    if request.params['kind'] == 'events':
+        await send_stream(request, send, stream_state(session), 'text/event-stream',
+                          {'Cache-Control': 'no-store', 'X-Accel-Buffering': 'no'}, offload_each=True)
+        return
+    multipart = request.params['kind'] == 'mjpeg'
+    image_format = 'jpg' if multipart or request.args.get('format') == 'jpeg' else 'png'
+    frames = stream_frames(session, FrameGovernor(max_fps=config.PLAY_MAX_FPS), image_format, multipart)
+    if multipart:
+        content_type = 'multipart/x-mixed-replace; boundary=frame'
+        headers = {'Cache-Control': 'no-store'}
+    else:
+        content_type = 'application/octet-stream'
+        headers = {'Cache-Control': 'no-store', 'X-Chunk-Header': 'x,y,w,h,len <HHHHI'}
+    # Simulation and encoding happen in the generator, so each frame is pulled on the executor
+    await send_stream(request, send, frames, content_type, headers, offload_each=True)
+
+
+async def play_input(request, send):
+    session = registry.get(request.params['session_id'])
+    if session is None:
+        await send_json(send, {'success': False, 'error': 'no such session'}, 404)
+        return
+    session.queue_input((await request.json()).get('events', []))
+    await send_json(send, {'success': True})
+
+
+async def play_close(request, send):
+    registry.close(request.params['session_id'])
+    await send_json(send, {'success': True})
+
+
+ROUTES = [
+    ('GET', r'/', index),
+    ('GET', r'/api/status', status),
+    ('POST', r'/api/launch', launch),
+    ('GET', r'/api/health', health),
+    ('GET', r'/api/metrics', metrics_endpoint),
+    ('GET', r'/api/leaderboard', leaderboard_endpoint),
+    ('POST', r'/api/leaderboard', leaderboard_submit),
+    ('GET', r'/api/leaderboard/verify/(?P<replay_hash>\w+)', leaderboard_verification),
+    ('GET', r'/api/verifier', verifier_stats),
+    ('GET', r'/api/maze', maze),
+    ('GET', r'/play', play_page),
+    ('POST', r'/api/play', play_create),
+    ('GET', r'/api/play/(?P<session_id>\w+)/(?P<kind>stream|mjpeg|events)', play_stream),
+    ('POST', r'/api/play/(?P<session_id>\w+)/input', play_input),
+    ('DELETE', r'/api/play/(?P<session_id>\w+)', play_close),
+]
+# (method, regex, handler, metrics label in the Flask '<param>' style)
+_compiled_routes = [(method, re.compile(pattern + '$'), handler, re.sub(r'\(\?P<(\w+)>[^)]*\)', r'<\1>', pattern))
+                    for method, pattern, handler in ROUTES]
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # Spawning warm interpreters blocks, keep it off the loop
+            await asyncio.get_running_loop().run_in_executor(executor, get_session_pool)
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await asyncio.get_running_loop().run_in_executor(executor, get_session_pool().shutdown)
+            await asyncio.get_running_loop().run_in_executor(executor, verifier.shutdown)
+            executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI entry point"""
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+    
+    path, method = scope['path'], scope['method']
+    allowed = False
+    for route_method, pattern, handler, route in _compiled_routes:
+        match = pattern.match(path)
+        if not match:
+            continue
+        if route_method != method:
+            allowed = True
+            continue
+        started = time.perf_counter()
+        responded = False
+        
+        async def timed_send(message, route=route):
+            nonlocal responded
+            if message['type'] == 'http.response.start':
+                responded = True
+                REQUEST_SECONDS.labels(route, method, message['status']).observe(time.perf_counter() - started)
+            await send(message)
+        
+        # An error status only fits before the handler has started its response (a stream
+        # that fails mid-way just ends)
+        try:
+            await handler(Request(scope, receive, match.groupdict()), timed_send)
+        except Busy:
+            if not responded:
+                await send_json(timed_send, {'success': False, 'error': 'server busy'}, 503, {'Retry-After': 1})
+        except Disconnected:
+            pass
+        except ValueError as e:
+            if not responded:
+                await send_json(timed_send, {'success': False, 'error': str(e)}, 400)
+            else:
+                print(f"Warning: {method} {path} failed after its response started: {e}")
+        return
+    
+    if allowed:
+        await send_json(send, {'success': False, 'error': 'method not allowed'}, 405)
+    else:
+        await send_json(send, {'success': False, 'error': 'not found'}, 404)
+
+
+if __name__ == '__main__':
+    import uvicorn
+    port = int(os.environ.get('PORT', 5107))
+    print(f"🎮 Maze Game Web Interface (async)")
+    print(f"📊 Running on http://localhost:{port}")
+    uvicorn.run(app, host='0.0.0.0', port=port, log_level='warning',
+                timeout_keep_alive=config.ASGI_KEEPALIVE_TIMEOUT, backlog=config.ASGI_BACKLOG)
@@ -0,0 +1,206 @@
+"""
+Asset caches and background warm-up
+Fonts, sprites and overlay surfaces are created once and shared; the startup
+loader fills these caches on a background thread while the menu is running.
+Fonts and text are only created on the main thread (SDL_ttf is not thread
+safe), before the loader starts, so sprites built off-thread only blit them
+"""
+
+import json
+import os
+import threading
+import time
+import pygame
+import config
+import metrics
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# Every font size the UI uses
+FONT_SIZES = [16, 20, 24, 28, 32, 36, 48, 64, 72]
+
+# Text drawn into sprites: (text, font size, colour)
+SPRITE_GLYPHS = [("!", 16, (255, 255, 0)), ("?", 20, (0, 0, 0))]
+
+_lock = threading.RLock()
+_fonts: Dict[int, pygame.font.Font] = {}
+_sprites: Dict[tuple, pygame.Surface] = {}
+_overlays: Dict[Tuple[int, int, int], pygame.Surface] = {}
+
+_CACHE_REQUESTS = metrics.counter('asset_cache_requests_total', 'Font, sprite and overlay cache lookups',
+                                  ['cache', 'result'])
+_hit = {name: _CACHE_REQUESTS.labels(name, 'hit') for name in ('font', 'sprite', 'overlay')}
+_miss = {name: _CACHE_REQUESTS.labels(name, 'miss') for name in ('font', 'sprite', 'overlay')}
+
+
+def get_font(size: int) -> pygame.font.Font:
+    """Default font at the given size, loaded once"""
+    font = _fonts.get(size)
+    if font is None:
+        with _lock:
+            font = _fonts.get(size)
+            if font is None:
+                _miss['font'].inc()
+                font = pygame.font.Font(None, size)
+                _fonts[size] = font
+                return font
+    _hit['font'].inc()
+    return font
+
+
+def get_sprite(key: tuple, builder: Callable[[], pygame.Surface]) -> pygame.Surface:
+    """Cached sprite for key, rendered by builder() on first use"""
+    sprite = _sprites.get(key)
+    if sprite is None:
+        with _lock:
+            sprite = _sprites.get(key)
+            if sprite is None:
+                _miss['sprite'].inc()
+                sprite = builder()
+                _sprites[key] = sprite
+                return sprite
+    _hit['sprite'].inc()
+    return sprite
+
+
+def get_glyph(text: str, size: int, color: Tuple[int, int, int]) -> pygame.Surface:
+    """Cached rendering of text in the default font (main thread on first use)"""
+    return get_sprite(('text', text, size, color), lambda: get_font(size).render(text, True, color))
+
+
+def get_overlay(alpha: int, width: int = config.WINDOW_WIDTH,
+                height: int = config.WINDOW_HEIGHT) -> pygame.Surface:
+    """Full-screen black overlay with the given alpha"""
+    key = (alpha, width, height)
+    overlay = _overlays.get(key)
+    if overlay is None:
+        with _lock:
+            overlay = _overlays.get(key)
+            if overlay is None:
+                _miss['overlay'].inc()
+                overlay = pygame.Surface((width, height))
+                overlay.set_alpha(alpha)
+                overlay.fill((0, 0, 0))
+                _overlays[key] = overlay
+                return overlay
+    _hit['overlay'].inc()
+    return overlay
+
+
+def main_thread_tasks() -> List[Tuple[str, Callable[[], None]]]:
+    """(name, callable) pairs for the fonts and text the warm-up needs, run on the main thread"""
+    tasks = [(f"font {size}", lambda size=size: get_font(size)) for size in FONT_SIZES]
+    tasks.append(("sprite glyphs", lambda: [get_glyph(*glyph) for glyph in SPRITE_GLYPHS]))
+    return tasks
+
+
+def warmup_tasks() -> List[Tuple[str, Callable[[], None]]]:
+    """(name, callable) pairs that populate the sprite, overlay and sound caches
+    off the main thread"""
+    # Imported here: these modules use the caches above
+    from enemies import ENEMY_TYPES, enemy_sprite
+    from powerups import POWER_TYPES, powerup_sprite, PULSE_STEPS
+    from audio import audio_manager
+    
+    tasks = [("enemy sprites", lambda: [enemy_sprite(t) for t in ENEMY_TYPES])]
+    cell_sizes = sorted({d['cell_size'] for d in config.DIFFICULTIES.values()})
+    for cell_size in cell_sizes:
+        tasks.append((f"power-up sprites {cell_size}px",
+                      lambda cell_size=cell_size: [powerup_sprite(t, cell_size // 3 + pulse)
+                                                   for t in POWER_TYPES
+                                                   for pulse in range(PULSE_STEPS)]))
+    
+    tasks.append(("overlays", lambda: [get_overlay(alpha) for alpha in (180, 200)]))
+    tasks.append(("sound effects", audio_manager.load_effects))
+    return tasks
+
+
+class AssetLoader:
+    """Runs warm-up tasks on a background thread, reporting progress; main_tasks
+    run first in the thread that calls start()"""
+    
+    def __init__(self, tasks=None, on_progress: Optional[Callable[[int, int, str], None]] = None,
+                 main_tasks=None):
+        self.main_tasks = main_tasks if main_tasks is not None else main_thread_tasks()
+        self.tasks = tasks if tasks is not None else warmup_tasks()
+        self.on_progress = on_progress
+        self.completed = 0
+        self.timings: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.elapsed = 0.0
+        self.done = threading.Event()
+        self.thread = None
+    
+    @property
+    def progress(self) -> float:
+        """Fraction of tasks finished (0.0 to 1.0)"""
+        total = len(self.main_tasks) + len(self.tasks)
+        return self.completed / total if total else 1.0
+    
+    def start(self):
+        """Create fonts and text here, then warm everything else in the background"""
+        self._start = time.perf_counter()
+        self._run_tasks(self.main_tasks)
+        self.thread = threading.Thread(target=self._run, name="asset-loader", daemon=True)
+        self.thread.start()
+        return self
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until warm-up finishes, returns False on timeout"""
+        return self.done.wait(timeout)
+    
+    def _run(self):
+        self._run_tasks(self.tasks)
+        self.elapsed = time.perf_counter() - self._start
+        self.done.set()
+    
+    def _run_tasks(self, tasks):
+        total = len(self.main_tasks) + len(self.tasks)
+        for name, task in tasks:
+            task_start = time.perf_counter()
+            try:
+                task()
+            except Exception as e:
+                # A missing asset must not take the menu down - it loads lazily later
+                self.errors[name] = str(e)
+            self.timings[name] = time.perf_counter() - task_start
+            self.completed += 1
+            if self.on_progress:
+                self.on_progress(self.completed, total, name)
+
+
+class StartupReport:
+    """Records named milestones measured from process launch"""
+    
+    def __init__(self, launch_time: float):
+        self.launch_time = launch_time
+        self.milestones: Dict[str, float] = {}
+    
+    def mark(self, name: str):
+        """Record a milestone once, in seconds since launch"""
+        if name not in self.milestones:
+            self.milestones[name] = time.perf_counter() - self.launch_time
+    
+    def write(self, loader: Optional[AssetLoader] = None, path: str = None):
+        """Print the report and append it as one JSON line to the startup log"""
+        record = {
+            'timestamp': time.time(),
+            'milestones': {name: round(t, 4) for name, t in self.milestones.items()},
+        }
+        if loader is not None:
+            record['warmup_seconds'] = round(loader.elapsed, 4)
+            record['warmup_tasks'] = {name: round(t, 4) for name, t in loader.timings.items()}
+            if loader.errors:
+                record['warmup_errors'] = loader.errors
+        
+        summary = ", ".join(f"{name} {t * 1000:.0f}ms" for name, t in self.milestones.items())
+        print(f"Startup: {summary}")
+        
+        path = path or config.STARTUP_REPORT_PATH
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'a') as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            print(f"Warning: Could not write startup report: {e}")
+        return record
@@ -1,9 +1,100 @@
 """
 Audio system for sound effects and music
+Sound effects are synthesized once at startup, cached to disk as WAV and
+played through a fixed pool of reserved mixer channels
 """
 
 import pygame
 import os
+import wave
+import config
+
+try:
+    import numpy as np
+except ImportError:  # Synthesis needs numpy; without it only cached WAVs load
+    np = None
+
+
+# Bump when the synth recipes change so stale cached WAVs are ignored
+SYNTH_VERSION = 1
+
+# Reserved mixer channels used for effects
+CHANNEL_POOL_SIZE = 6
+
+# Minimum milliseconds between two plays of the same effect
+RATE_LIMITS = {
+    'move': 70,
+    'hit': 150,
+    'powerup': 50,
+    'win': 500,
+}
+
+
+def _envelope(samples: int, attack: float, release: float):
+    """Linear attack / exponential release envelope"""
+    env = np.ones(samples, dtype=np.float32)
+    attack_len = max(1, int(samples * attack))
+    env[:attack_len] = np.linspace(0.0, 1.0, attack_len, dtype=np.float32)
+    release_len = max(1, int(samples * release))
+    env[-release_len:] *= np.exp(-np.linspace(0.0, 5.0, release_len, dtype=np.float32))
+    return env
+
+
+def _tone(freqs, duration: float, rate: int, wave_shape='sine'):
+    """Tone sweeping linearly through the given frequencies"""
+    samples = int(duration * rate)
+    freq = np.interp(np.linspace(0, len(freqs) - 1, samples),
+                     np.arange(len(freqs)), freqs).astype(np.float32)
+    phase = 2 * np.pi * np.cumsum(freq) / rate
+    if wave_shape == 'square':
+        return np.sign(np.sin(phase)).astype(np.float32)
+    return np.sin(phase).astype(np.float32)
+
+
+def synthesize(name: str, rate: int):
+    """Render a named effect to a mono float buffer in [-1, 1]"""
+    if name == 'move':
+        signal = _tone([520, 620], 0.045, rate, 'square') * 0.35
+        return signal * _envelope(len(signal), 0.05, 0.7)
+    if name == 'hit':
+        duration = 0.25
+        samples = int(duration * rate)
+        noise = np.random.default_rng(7).uniform(-1, 1, samples).astype(np.float32)
+        thump = _tone([160, 60], duration, rate)
+        return (noise * 0.4 + thump * 0.8) * _envelope(samples, 0.01, 0.9)
+    if name == 'powerup':
+        notes = [523, 659, 784, 1047]
+        signal = np.concatenate([_tone([n, n], 0.05, rate, 'square') for n in notes]) * 0.3
+        return signal * _envelope(len(signal), 0.02, 0.4)
+    if name == 'win':
+        notes = [523, 659, 784, 1047]
+        parts = []
+        for i, note in enumerate(notes):
+            duration = 0.12 if i < len(notes) - 1 else 0.45
+            part = _tone([note, note], duration, rate) + 0.5 * _tone([note * 2, note * 2], duration, rate)
+            parts.append(part * _envelope(len(part), 0.05, 0.6) * 0.5)
+        return np.concatenate(parts)
+    raise ValueError(f"Unknown sound effect: {name}")
+
+
+def _to_pcm(signal, channels: int):
+    """Convert a float buffer to int16 PCM shaped for the mixer"""
+    pcm = (np.clip(signal, -1.0, 1.0) * 32767).astype(np.int16)
+    if channels > 1:
+        pcm = np.repeat(pcm[:, None], channels, axis=1)
+    return np.ascontiguousarray(pcm)
+
+
+def _write_wav(filepath: str, pcm, rate: int, channels: int):
+    """Write int16 PCM to a WAV file atomically"""
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    tmp_path = filepath + '.tmp'
+    with wave.open(tmp_path, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(pcm.tobytes())
+    os.replace(tmp_path, filepath)
 
 
 class AudioManager:
@@ -13,18 +104,59 @@ class AudioManager:
         self.enabled = enabled
         self.sounds = {}
         self.music_playing = False
+        self.master_volume = 1.0
+        self.channels = []
+        self.channel_started = {}  # Channel index -> ticks when its voice started
+        self.last_played = {}  # Sound name -> ticks of last play
+    
+    def _init_mixer(self) -> bool:
+        """Open the mixer on first use so importing the game never grabs an audio device"""
+        if not self.enabled:
+            return False
+        if self.channels:
+            return True
+        try:
+            pygame.mixer.init(frequency=22050, size=-16, channels=2, buffer=512)
+            self._reserve_channels()
+        except:
+            self.enabled = False
+            print("Warning: Audio initialization failed")
+        return self.enabled
+    
+    def _reserve_channels(self):
+        """Reserve a fixed pool of channels so effects never allocate at play time"""
+        pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), CHANNEL_POOL_SIZE))
+        pygame.mixer.set_reserved(CHANNEL_POOL_SIZE)
+        self.channels = [pygame.mixer.Channel(i) for i in range(CHANNEL_POOL_SIZE)]
+    
+    def load_effects(self, names=None):
+        """Load the built-in effects from the WAV cache, synthesizing any that are missing"""
+        if not self._init_mixer():
+            return
         
-        # Initialize mixer if enabled
-        if enabled:
+        rate, _, channels = pygame.mixer.get_init()
+        for name in names or RATE_LIMITS:
+            if self.sounds.get(name):
+                continue
+            filepath = os.path.join(config.SOUND_CACHE_DIR,
+                                    f"{name}_{rate}hz_{channels}ch_v{SYNTH_VERSION}.wav")
             try:
-                pygame.mixer.init(frequency=22050, size=-16, channels=2, buffer=512)
-            except:
-                self.enabled = False
-                print("Warning: Audio initialization failed")
+                if os.path.exists(filepath):
+                    self.sounds[name] = pygame.mixer.Sound(filepath)
+                    continue
+                if np is None:
+                    self.sounds[name] = None
+                    continue
+                pcm = _to_pcm(synthesize(name, rate), channels)
+                self.sounds[name] = pygame.sndarray.make_sound(pcm)
+                _write_wav(filepath, pcm, rate, channels)
+            except Exception as e:
+                print(f"Warning: Could not synthesize sound {name}: {e}")
+                self.sounds.setdefault(name, None)
     
     def load_sound(self, name: str, filepath: str):
         """Load a sound effect"""
-        if not self.enabled:
+        if not self._init_mixer():
             return
         
         try:
@@ -37,21 +169,36 @@ class AudioManager:
             print(f"Warning: Could not load sound {name}: {e}")
             self.sounds[name] = None
     
+    def _pick_channel(self):
+        """Free pool channel, or steal the one whose voice started longest ago"""
+        for i, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                return i, channel
+        i = min(range(len(self.channels)), key=lambda c: self.channel_started.get(c, 0))
+        return i, self.channels[i]
+    
     def play_sound(self, name: str, volume=0.5):
         """Play a sound effect"""
-        if not self.enabled or name not in self.sounds:
+        if not self.enabled or not self.sounds.get(name) or not self.channels:
             return
         
-        if self.sounds[name]:
-            try:
-                self.sounds[name].set_volume(volume)
-                self.sounds[name].play()
-            except:
-                pass
+        now = pygame.time.get_ticks()
+        last = self.last_played.get(name)
+        if last is not None and now - last < RATE_LIMITS.get(name, 0):
+            return
+        
+        try:
+            index, channel = self._pick_channel()
+            channel.set_volume(volume * self.master_volume)
+            channel.play(self.sounds[name])
+            self.channel_started[index] = now
+            self.last_played[name] = now
+        except:
+            pass
     
     def play_music(self, filepath: str, loops=-1, volume=0.3):
         """Play background music"""
-        if not self.enabled:
+        if not self._init_mixer():
             return
         
         try:
@@ -65,18 +212,16 @@ class AudioManager:
     
     def stop_music(self):
         """Stop background music"""
-        if self.enabled:
+        if self.enabled and self.channels:
             pygame.mixer.music.stop()
             self.music_playing = False
     
     def set_master_volume(self, volume: float):
         """Set master volume (0.0 to 1.0)"""
-        if self.enabled:
+        self.master_volume = volume
+        if self.enabled and self.channels:
             pygame.mixer.music.set_volume(volume)
-            for sound in self.sounds.values():
-                if sound:
-                    sound.set_volume(volume)
 
 
 # Create global audio manager instance
-audio_manager = AudioManager(enabled=False)  # Disabled by default (no sound files yet)
+audio_manager = AudioManager(enabled=config.ENABLE_AUDIO)
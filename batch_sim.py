@@ -0,0 +1,188 @@
+"""
+Batch simulation of seeded games under scripted bots
+
+    python batch_sim.py --games 2000 --bots optimal,wall,random --enemies
+    python batch_sim.py --difficulty hard --set hard.enemies=6 --json report.json
+
+Every bot plays the same seeds per difficulty (so results pair up), spread
+over a process pool. The report aggregates completion rate, completion ticks,
+enemy hits and power-up pickups per difficulty and bot; use it to tune the
+spawn counts in config.DIFFICULTIES.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import time
+from typing import Dict, List
+
+import headless
+
+
+def _init_worker(overrides: Dict[str, Dict[str, float]]):
+    headless.init_headless()
+    import config
+    for difficulty, values in overrides.items():
+        config.DIFFICULTIES[difficulty].update(values)
+
+
+def simulate(task) -> Dict:
+    """Play one seeded game under a bot (runs in a worker)"""
+    difficulty, bot_name, seed, enemies, powerups, max_ticks = task
+    from bots import BOTS, play
+    from game import Game
+    
+    game = Game(difficulty, seed=seed, live=False)
+    game.enable_enemies = enemies
+    game.enable_powerups = powerups
+    bot = BOTS[bot_name](game, random.Random(f"{seed}:{bot_name}"))
+    result = play(game, bot, max_ticks)
+    result.update(difficulty=difficulty, bot=bot_name, seed=seed)
+    return result
+
+
+def _percentile(values: List[int], share: float):
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(share * len(values)))]
+
+
+def aggregate(results: List[Dict], tick_rate: int) -> List[Dict]:
+    """One summary row per (difficulty, bot)"""
+    groups: Dict[tuple, List[Dict]] = {}
+    for result in results:
+        groups.setdefault((result['difficulty'], result['bot']), []).append(result)
+    
+    rows = []
+    for (difficulty, bot), group in groups.items():
+        ticks = sorted(result['ticks'] for result in group if result['completed'])
+        hits = [result['enemy_hits'] for result in group]
+        pickups: Dict[str, int] = {}
+        for result in group:
+            for power_type, count in result['powerups'].items():
+                pickups[power_type] = pickups.get(power_type, 0) + count
+        spawned = sum(result['powerups_spawned'] for result in group)
+        rows.append({
+            'difficulty': difficulty,
+            'bot': bot,
+            'games': len(group),
+            'completion_rate': round(len(ticks) / len(group), 4),
+            'ticks_mean': round(statistics.fmean(ticks), 1) if ticks else None,
+            'ticks_median': _percentile(ticks, 0.5),
+            'ticks_p90': _percentile(ticks, 0.9),
+            'seconds_median': round(_percentile(ticks, 0.5) / tick_rate, 1) if ticks else None,
+            'enemy_hits_mean': round(statistics.fmean(hits), 3),
+            'hit_rate': round(sum(1 for count in hits if count) / len(group), 4),
+            'powerups_per_game': {power_type: round(count / len(group), 3)
+                                  for power_type, count in sorted(pickups.items())},
+            'powerup_pickup_rate': round(sum(pickups.values()) / spawned, 4) if spawned else None,
+        })
+    order = ['easy', 'medium', 'hard', 'doors']
+    rows.sort(key=lambda row: (order.index(row['difficulty']), row['bot']))
+    return rows
+
+
+def _parse_overrides(pairs: List[str]) -> Dict[str, Dict[str, float]]:
+    """['hard.enemies=6', 'hard.terrain=0.2'] -> {'hard': {'enemies': 6, 'terrain': 0.2}}"""
+    import config
+    overrides: Dict[str, Dict[str, float]] = {}
+    for pair in pairs:
+        try:
+            key, value = pair.split('=', 1)
+            difficulty, field = key.split('.', 1)
+            if difficulty not in config.DIFFICULTIES:
+                raise ValueError
+            overrides.setdefault(difficulty, {})[field] = float(value) if '.' in value else int(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f'expected difficulty.field=number, got {pair!r}')
+    return overrides
+
+
+def _print_table(rows: List[Dict]):
+    print(f"{'difficulty':<10} {'bot':<8} {'games':>6} {'done':>7} {'median':>8} {'p90':>8} "
+          f"{'hits':>6} {'hit%':>6} {'pickup%':>8}  power-ups/game")
+    for row in rows:
+        def cell(value, width):
+            return f"{'-' if value is None else value:>{width}}"
+        pickup = None if row['powerup_pickup_rate'] is None else f"{row['powerup_pickup_rate']:.0%}"
+        print(f"{row['difficulty']:<10} {row['bot']:<8} {row['games']:>6} {row['completion_rate']:>7.1%} "
+              f"{cell(row['ticks_median'], 8)} {cell(row['ticks_p90'], 8)} {row['enemy_hits_mean']:>6.2f} "
+              f"{row['hit_rate']:>6.0%} {cell(pickup, 8)}  "
+              + ' '.join(f"{name}={count}" for name, count in row['powerups_per_game'].items()))
+
+
+def main(argv=None):
+    import config
+    from bots import BOTS
+    
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=1000, help='seeds per difficulty (each bot plays all of them)')
+    parser.add_argument('--difficulty', action='append', choices=list(config.DIFFICULTIES),
+                        help='repeat for several (default: all)')
+    parser.add_argument('--bots', default=','.join(BOTS), help=f"comma separated, from {', '.join(BOTS)}")
+    parser.add_argument('--enemies', action='store_true', help='play with enemies enabled')
+    parser.add_argument('--no-powerups', action='store_true', help='play without power-ups')
+    parser.add_argument('--max-ticks', type=int, default=5 * 60 * config.SIM_TICKS_PER_SECOND,
+                        help='give up after this many ticks (default: 5 minutes)')
+    parser.add_argument('--workers', type=int, default=None, help='processes (default: CPUs)')
+    parser.add_argument('--set', action='append', default=[], metavar='DIFFICULTY.FIELD=N',
+                        help='override a config.DIFFICULTIES value, e.g. hard.enemies=6 or hard.terrain=0.2')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', metavar='PATH', help='also write the report (and per-game results) as JSON')
+    args = parser.parse_args(argv)
+    
+    bots = [name.strip() for name in args.bots.split(',') if name.strip()]
+    unknown = [name for name in bots if name not in BOTS]
+    if unknown:
+        parser.error(f"unknown bot(s): {', '.join(unknown)}")
+    try:
+        overrides = _parse_overrides(args.set)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    difficulties = args.difficulty or list(config.DIFFICULTIES)
+    workers = args.workers or os.cpu_count() or 1
+    
+    rng = random.Random(args.seed)
+    tasks = []
+    for difficulty in difficulties:
+        seeds = [rng.getrandbits(32) for _ in range(args.games)]
+        tasks.extend((difficulty, bot, seed, args.enemies, not args.no_powerups, args.max_ticks)
+                     for seed in seeds for bot in bots)
+    
+    started = time.perf_counter()
+    results = []
+    pool = multiprocessing.get_context('spawn').Pool(workers, _init_worker, (overrides,))
+    chunksize = max(1, min(64, len(tasks) // (workers * 8)))
+    for i, result in enumerate(pool.imap_unordered(simulate, tasks, chunksize), 1):
+        results.append(result)
+        if i % 1000 == 0:
+            print(f"  {i}/{len(tasks)} games")
+    # close() rather than the context manager's terminate(): SDL in the workers
+    # turns SIGTERM into a quit event, so terminated workers would never exit
+    pool.close()
+    pool.join()
+    elapsed = time.perf_counter() - started
+    
+    rows = aggregate(results, config.SIM_TICKS_PER_SECOND)
+    _print_table(rows)
+    total_ticks = sum(result['ticks'] for result in results)
+    print(f"{len(results)} games, {total_ticks} ticks in {elapsed:.1f}s on {workers} worker(s) "
+          f"({len(results) / elapsed:.0f} games/s, {total_ticks / elapsed:.0f} ticks/s)")
+    
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'settings': {'games': args.games, 'bots': bots, 'difficulties': difficulties,
+                             'enemies': args.enemies, 'powerups': not args.no_powerups,
+                             'max_ticks': args.max_ticks, 'seed': args.seed, 'overrides': overrides},
+                'seconds': round(elapsed, 2),
+                'report': rows,
+                'games': sorted(results, key=lambda result: (result['difficulty'], result['bot'], result['seed'])),
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,4 @@
+"""
+Headless benchmark suite for the Maze Game
+Run with: python -m benchmarks --help
+"""
@@ -0,0 +1,73 @@
+"""
+Benchmark command line
+
+    python -m benchmarks run [--quick] [--only NAME] [--out results.json]
+    python -m benchmarks compare BASELINE.json CURRENT.json [--threshold 0.10]
+"""
+
+import argparse
+import sys
+
+import headless
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+    
+    run_parser = sub.add_parser('run', help='run the suite and write JSON results')
+    run_parser.add_argument('--quick', action='store_true',
+                            help='skip the largest mazes and use fewer samples')
+    run_parser.add_argument('--only', help='only run benchmarks whose name contains this')
+    run_parser.add_argument('--out', help='write results JSON here (default: stdout)')
+    run_parser.add_argument('--baseline', help='compare against this results file after running')
+    run_parser.add_argument('--threshold', type=float, default=0.10,
+                            help='relative median slowdown counted as a regression')
+    
+    compare_parser = sub.add_parser('compare', help='flag regressions between two result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10)
+    
+    args = parser.parse_args(argv)
+    
+    from benchmarks import runner
+    
+    if args.command == 'run':
+        headless.init_headless()
+        from benchmarks.cases import ALL_CASES
+        log = (lambda line: print(line, file=sys.stderr)) if not args.out else print
+        document = runner.run(ALL_CASES, quick=args.quick, only=args.only, log=log)
+        if args.out:
+            runner.save(document, args.out)
+        else:
+            import json
+            print(json.dumps(document, indent=2, sort_keys=True))
+        if not args.baseline:
+            return 0
+        baseline, current = runner.load(args.baseline), document
+    else:
+        baseline, current = runner.load(args.baseline), runner.load(args.current)
+    
+    rows = runner.compare(baseline, current, args.threshold)
+    return report(rows)
+
+
+def report(rows) -> int:
+    """Print a comparison table, returns 1 if anything regressed"""
+    regressions = 0
+    for row in rows:
+        if row['status'] == 'new':
+            print(f"{row['name']:<40} {'new':>10}   {row['current'] * 1000:10.3f} ms", file=sys.stderr)
+            continue
+        marker = '  <-- REGRESSION' if row['status'] == 'regression' else ''
+        regressions += row['status'] == 'regression'
+        print(f"{row['name']:<40} {row['baseline'] * 1000:10.3f} -> {row['current'] * 1000:10.3f} ms"
+              f"  x{row['ratio']:.2f}{marker}", file=sys.stderr)
+    print(f"{regressions} regression(s)", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
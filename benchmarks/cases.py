@@ -0,0 +1,255 @@
+"""
+Benchmark cases: maze generation, simulation ticks, rendering, hints, maze
+analytics, path solvers (plain and over terrain) and key puzzles
+Each case is a generator yielding (benchmark name, measure) where measure()
+runs the benchmark and returns its samples in seconds
+"""
+
+import random
+import time
+import pygame
+import config
+from maze_generator import Maze
+from benchmarks.runner import time_call
+
+
+MAZE_SIZES = [(15, 10), (20, 15), (30, 20), (100, 100), (500, 500), (1000, 1000), (2000, 2000)]
+QUICK_MAX_CELLS = 100 * 100
+SEED = 1234
+
+
+def _repeats(cells: int, quick: bool) -> int:
+    """Fewer repeats for bigger mazes so the whole suite stays bounded"""
+    budget = 20_000 if quick else 400_000
+    return max(1, min(50, budget // cells))
+
+
+def _make_game(difficulty='hard', seed=SEED):
+    """Deterministic game with enemies and power-ups switched on"""
+    from game import Game
+    random.seed(seed)
+    game = Game(difficulty, 'classic', 'lines')
+    game.enable_enemies = True
+    game.enable_powerups = True
+    return game
+
+
+def _drive(game, rng):
+    """Scripted input: hold a random direction, changing every few ticks"""
+    if game.tick % 20 == 0:
+        flags = ['left_pressed', 'right_pressed', 'up_pressed', 'down_pressed']
+        held = rng.choice(flags)
+        for flag in flags:
+            setattr(game.player, flag, flag == held)
+
+
+def maze_generation(quick: bool):
+    for width, height in MAZE_SIZES:
+        cells = width * height
+        if quick and cells > QUICK_MAX_CELLS:
+            continue
+        
+        def measure(width=width, height=height, cells=cells):
+            return time_call(lambda: Maze(width, height, seed=SEED).generate(),
+                             _repeats(cells, quick), warmup=0 if cells > QUICK_MAX_CELLS else 1)
+        
+        yield f"maze.generate[{width}x{height}]", measure
+
+
+def game_update(quick: bool):
+    ticks = 600 if quick else 6000
+    
+    def measure(difficulty):
+        game = _make_game(difficulty)
+        rng = random.Random(SEED)
+        samples = []
+        for _ in range(ticks):
+            _drive(game, rng)
+            start = time.perf_counter()
+            game.update()
+            samples.append(time.perf_counter() - start)
+            if game.state != config.STATE_PLAYING:
+                game.reset()
+        return samples
+    
+    for difficulty in ('medium', 'hard'):
+        yield f"game.update[{difficulty}]", lambda difficulty=difficulty: measure(difficulty)
+
+
+def game_draw(quick: bool):
+    frames = 120 if quick else 600
+    screen = pygame.Surface((config.WINDOW_WIDTH, config.WINDOW_HEIGHT))
+    
+    def measure(difficulty):
+        game = _make_game(difficulty)
+        rng = random.Random(SEED)
+        
+        def frame():
+            _drive(game, rng)
+            game.update()
+            game.draw(screen)
+        
+        return time_call(frame, frames, warmup=5)
+    
+    for difficulty in ('medium', 'hard'):
+        yield f"game.draw[{difficulty}]", lambda difficulty=difficulty: measure(difficulty)
+
+
+def hint_path(quick: bool):
+    repeats = 200 if quick else 2000
+    screen = pygame.Surface((config.WINDOW_WIDTH, config.WINDOW_HEIGHT))
+    
+    def measure(difficulty):
+        game = _make_game(difficulty)
+        game.powerup_manager.activate_powerup('hint')
+        tile = game.difficulty_config['cell_size']
+        exit_pos = (game.maze.exit.x, game.maze.exit.y)
+        entry_pos = (game.maze.entry.x, game.maze.entry.y)
+        return time_call(lambda: game.powerup_manager.draw_hint_path(
+            screen, tile, 0, 0, entry_pos, exit_pos), repeats)
+    
+    for difficulty in ('medium', 'hard'):
+        yield f"hint.path[{difficulty}]", lambda difficulty=difficulty: measure(difficulty)
+
+
+def maze_analytics(quick: bool):
+    import numpy as np
+    import maze_analytics
+    
+    size = config.DIFFICULTIES['medium']
+    width, height = size['width'], size['height']
+    
+    def measure(count):
+        # 100 distinct layouts tiled up to the batch size; the cost does not depend on repeats
+        blobs = []
+        for seed in range(100):
+            maze = Maze(width, height, seed=SEED + seed)
+            maze.generate()
+            blobs.append(maze.to_wall_bytes())
+        batch = np.tile(maze_analytics.as_batch(blobs, width, height), (count // 100, 1, 1))
+        return time_call(lambda: maze_analytics.analyze(batch), 3 if quick else 5, warmup=0)
+    
+    count = 1000 if quick else 10000
+    yield f"maze.analytics[medium x {count}]", lambda: measure(count)
+
+
+def maze_solvers(quick: bool):
+    from pathfinding import Route, astar, bidirectional_bfs, passage_bits
+    
+    width = height = 100 if quick else 1000
+    label = f"{width}x{height} braid 0.5"
+    built = {}
+    
+    def setup():
+        if not built:
+            maze = Maze(width, height, seed=SEED)
+            maze.generate()
+            maze.braid(0.5)
+            rng = random.Random(SEED)
+            local = []
+            for _ in range(20):
+                # Hint-sized queries: a goal up to 50 cells away on each axis
+                x, y = rng.randrange(width), rng.randrange(height)
+                goal = (min(width - 1, max(0, x + rng.randint(-50, 50))),
+                        min(height - 1, max(0, y + rng.randint(-50, 50))))
+                local.append(((x, y), goal))
+            built.update(maze=maze, passages=passage_bits(maze), local=local,
+                         corner=[((0, 0), (width - 1, height - 1))] * (3 if quick else 2))
+        return built
+    
+    def measure(solver, queries):
+        state = setup()
+        samples = []
+        for start, goal in state[queries]:
+            began = time.perf_counter()
+            solver(state['maze'], start, goal, state['passages'])
+            samples.append(time.perf_counter() - began)
+        return samples
+    
+    def route_steps():
+        # The hint as the player walks the first 500 cells of the entry-to-exit route
+        state = setup()
+        route = Route(state['maze'], (width - 1, height - 1), state['passages'])
+        path = list(route.from_cell((0, 0)))
+        return time_call(lambda cells=iter(path[1:501]): route.from_cell(next(cells)),
+                         min(500, len(path) - 1), warmup=0)
+    
+    for queries in ('local', 'corner'):
+        yield f"solve.bidirectional[{label} {queries}]", lambda queries=queries: measure(bidirectional_bfs, queries)
+        yield f"solve.astar[{label} {queries}]", lambda queries=queries: measure(astar, queries)
+    yield f"hint.route[{label} step]", route_steps
+
+
+def weighted_solvers(quick: bool):
+    from pathfinding import Route, cost_field, dijkstra, passage_bits
+    
+    width = height = 100 if quick else 1000
+    label = f"{width}x{height} braid 0.5 terrain 0.3"
+    built = {}
+    
+    def setup():
+        if not built:
+            maze = Maze(width, height, seed=SEED)
+            maze.generate()
+            maze.braid(0.5)
+            maze.paint_terrain(0.3)
+            rng = random.Random(SEED)
+            cells = [(rng.randrange(width), rng.randrange(height)) for _ in range(40)]
+            local = [((x, y), (min(width - 1, max(0, x + rng.randint(-50, 50))),
+                               min(height - 1, max(0, y + rng.randint(-50, 50))))) for x, y in cells[:20]]
+            built.update(maze=maze, passages=passage_bits(maze), local=local, starts=cells[20:],
+                         corner=[((0, 0), (width - 1, height - 1))] * (3 if quick else 2))
+        return built
+    
+    def measure(queries):
+        state = setup()
+        samples = []
+        for start, goal in state[queries]:
+            began = time.perf_counter()
+            dijkstra(state['maze'], start, goal, state['passages'])
+            samples.append(time.perf_counter() - began)
+        return samples
+    
+    def field():
+        state = setup()
+        return time_call(lambda: cost_field(state['maze'], (width - 1, height - 1), state['passages']),
+                         3 if quick else 2, warmup=0)
+    
+    def route_jumps():
+        # The weighted hint from cells all over the maze: every query is off the last route
+        state = setup()
+        route = Route(state['maze'], (width - 1, height - 1), state['passages'])
+        route.from_cell((0, 0))  # Builds the cost field
+        return time_call(lambda starts=iter(state['starts']): route.from_cell(next(starts)),
+                         len(state['starts']), warmup=0)
+    
+    for queries in ('local', 'corner'):
+        yield f"solve.dijkstra[{label} {queries}]", lambda queries=queries: measure(queries)
+    yield f"solve.cost_field[{label}]", field
+    yield f"hint.route[{label} jump]", route_jumps
+
+
+def key_puzzles(quick: bool):
+    from key_puzzle import MAX_KEYS, KeyPuzzle
+    
+    sizes = [(30, 20), (100, 100)] + ([] if quick else [(300, 300)])
+    for width, height in sizes:
+        label = f"{width}x{height} {MAX_KEYS} keys"
+        maze = Maze(width, height, seed=SEED)
+        maze.generate()
+        repeats = max(2, _repeats(width * height, quick) // 4)
+        
+        def place(maze=maze):
+            return time_call(lambda: KeyPuzzle.place(maze, MAX_KEYS), repeats)
+        
+        def solve(maze=maze, path=False):
+            puzzle = KeyPuzzle.place(maze, MAX_KEYS)
+            return time_call(lambda: puzzle.solve(path=path), repeats)
+        
+        yield f"puzzle.place[{label}]", place
+        yield f"puzzle.check[{label}]", solve
+        yield f"puzzle.solve[{label}]", lambda maze=maze: solve(maze, True)
+
+
+ALL_CASES = [maze_generation, game_update, game_draw, hint_path, maze_analytics, maze_solvers, weighted_solvers,
+             key_puzzles]
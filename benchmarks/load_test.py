@@ -0,0 +1,182 @@
+"""
+Idle-connection load test for the async front end
+
+    python -m benchmarks.load_test --serve --connections 5000
+    python -m benchmarks.load_test --host 127.0.0.1 --port 5107 --connections 2000
+
+Opens many keep-alive connections, makes one request on each and then leaves
+them idle while timing probe requests on a fresh connection. Finally every
+idle connection is reused once to show the server kept them all. With --serve
+it starts `asgi_app.py` itself on a spare port and reports its memory use.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from benchmarks.runner import summarize
+
+
+PROBE_PATHS = ['/api/health', '/api/maze?w=50&h=50&seed=1&format=bin', '/api/status']
+
+
+async def request(reader, writer, host: str, path: str) -> int:
+    """One keep-alive GET, returns the status code after reading the whole body"""
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = dict(line.split(': ', 1) for line in lines[1:] if ': ' in line)
+    headers = {name.lower(): value for name, value in headers.items()}
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    return status
+
+
+async def open_idle(host: str, port: int, count: int, batch: int):
+    """Connect count clients in batches, one request each; returns (connections, failures)"""
+    connections, failures = [], 0
+    
+    async def one():
+        reader, writer = await asyncio.open_connection(host, port)
+        if await request(reader, writer, host, '/api/health') != 200:
+            raise RuntimeError('bad status')
+        return reader, writer
+    
+    for start in range(0, count, batch):
+        results = await asyncio.gather(*(one() for _ in range(min(batch, count - start))),
+                                       return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                failures += 1
+            else:
+                connections.append(result)
+    return connections, failures
+
+
+async def probe(host: str, port: int, rounds: int):
+    """Latency of requests on a fresh connection while the idle ones are held"""
+    reader, writer = await asyncio.open_connection(host, port)
+    samples = {path: [] for path in PROBE_PATHS}
+    for _ in range(rounds):
+        for path in PROBE_PATHS:
+            start = time.perf_counter()
+            await request(reader, writer, host, path)
+            samples[path].append(time.perf_counter() - start)
+    writer.close()
+    return {path: summarize(times) for path, times in samples.items()}
+
+
+async def reuse(connections, host: str) -> int:
+    """Send a second request on every held connection, returns how many succeeded"""
+    async def again(reader, writer):
+        try:
+            return await request(reader, writer, host, '/api/health') == 200
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            return False
+    
+    results = await asyncio.gather(*(again(r, w) for r, w in connections))
+    return sum(results)
+
+
+async def run(host: str, port: int, count: int, batch: int, hold: float, rounds: int):
+    start = time.perf_counter()
+    connections, failures = await open_idle(host, port, count, batch)
+    opened_in = time.perf_counter() - start
+    
+    await asyncio.sleep(hold)
+    latencies = await probe(host, port, rounds)
+    alive = await reuse(connections, host)
+    for _, writer in connections:
+        writer.close()
+    return {
+        'requested': count,
+        'opened': len(connections),
+        'failed': failures,
+        'open_seconds': opened_in,
+        'held_seconds': hold,
+        'still_served': alive,
+        'probe': latencies,
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _rss_mb(pid: int) -> float:
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def _wait_ready(host: str, port: int, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on {host}:{port} did not come up")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.load_test', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5107)
+    parser.add_argument('--serve', action='store_true', help='start asgi_app.py on a spare port')
+    parser.add_argument('--connections', type=int, default=5000)
+    parser.add_argument('--batch', type=int, default=500, help='connections opened concurrently')
+    parser.add_argument('--hold', type=float, default=5.0, help='seconds to keep connections idle')
+    parser.add_argument('--rounds', type=int, default=20, help='probe requests per path')
+    args = parser.parse_args(argv)
+    
+    server = None
+    if args.serve:
+        args.port = _free_port()
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, PORT=str(args.port), SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy')
+        server = subprocess.Popen([sys.executable, os.path.join(root, 'asgi_app.py')], cwd=root, env=env,
+                                  stdout=subprocess.DEVNULL)
+        _wait_ready(args.host, args.port)
+        idle_rss = _rss_mb(server.pid)
+    
+    try:
+        result = asyncio.run(run(args.host, args.port, args.connections, args.batch, args.hold, args.rounds))
+        if server:
+            result['server_rss_mb'] = {'idle': idle_rss, 'loaded': _rss_mb(server.pid)}
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=10)
+    
+    print(json.dumps(result, indent=2))
+    print(f"{result['opened']}/{result['requested']} connections held, "
+          f"{result['still_served']} still served after {args.hold:.0f}s idle; "
+          f"health p99 {result['probe']['/api/health']['p99'] * 1000:.1f} ms", file=sys.stderr)
+    return 0 if result['still_served'] == result['requested'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
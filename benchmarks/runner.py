@@ -0,0 +1,118 @@
+"""
+Benchmark timing, statistics and baseline comparison
+"""
+
+import json
+import platform
+import statistics
+import subprocess
+import time
+from typing import Callable, Dict, List
+
+
+def time_call(fn: Callable, repeats: int, warmup: int = 1) -> List[float]:
+    """Run fn repeatedly, returning per-call durations in seconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of already sorted samples"""
+    if not sorted_samples:
+        return 0.0
+    k = (len(sorted_samples) - 1) * pct / 100.0
+    lower = int(k)
+    upper = min(lower + 1, len(sorted_samples) - 1)
+    return sorted_samples[lower] + (sorted_samples[upper] - sorted_samples[lower]) * (k - lower)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Median, percentiles and spread of a sample set (seconds)"""
+    ordered = sorted(samples)
+    return {
+        'n': len(ordered),
+        'median': statistics.median(ordered),
+        'mean': statistics.fmean(ordered),
+        'p90': percentile(ordered, 90),
+        'p99': percentile(ordered, 99),
+        'min': ordered[0],
+        'max': ordered[-1],
+        'stdev': statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+    }
+
+
+def environment() -> Dict[str, str]:
+    """Machine and revision info stored alongside results"""
+    import pygame
+    info = {
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    try:
+        info['git_rev'] = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        pass
+    return info
+
+
+def run(cases, quick: bool = False, only: str = None, log=print) -> Dict:
+    """Run every case, returning a JSON-ready results document"""
+    results = {}
+    for case in cases:
+        for name, measure in case(quick):
+            if only and only not in name:
+                continue
+            stats = summarize(measure())
+            results[name] = stats
+            log(f"{name:<40} median {stats['median'] * 1000:10.3f} ms"
+                f"   p99 {stats['p99'] * 1000:10.3f} ms   n={stats['n']}")
+    return {'environment': environment(), 'quick': quick, 'results': results}
+
+
+def compare(baseline: Dict, current: Dict, threshold: float = 0.10) -> List[Dict]:
+    """Compare medians per benchmark; ratio above 1 + threshold is a regression"""
+    rows = []
+    base_results = baseline.get('results', {})
+    for name, stats in sorted(current.get('results', {}).items()):
+        base = base_results.get(name)
+        if base is None or not base['median']:
+            rows.append({'name': name, 'status': 'new', 'current': stats['median']})
+            continue
+        ratio = stats['median'] / base['median']
+        if ratio > 1 + threshold:
+            status = 'regression'
+        elif ratio < 1 - threshold:
+            status = 'improved'
+        else:
+            status = 'ok'
+        rows.append({
+            'name': name,
+            'status': status,
+            'baseline': base['median'],
+            'current': stats['median'],
+            'ratio': ratio,
+        })
+    return rows
+
+
+def load(path: str) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def save(document: Dict, path: str):
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write("\n")
@@ -0,0 +1,118 @@
+"""
+Replay verification throughput
+
+    python -m benchmarks.verify_replays --count 2000 --workers 8 --tamper 0.2
+
+Records bot runs (bots.OptimalBot driving the real game), tampers with a
+share of them (cut short, altered move count, impossible time, skipped movement)
+and pushes the lot through the verifier's process pool, reporting replays and
+ticks per second and whether every tampered replay was rejected.
+"""
+
+import argparse
+import collections
+import json
+import random
+import time
+
+import headless
+
+
+def record_bot_run(seed: int, difficulty: str, enemies: bool, max_ticks: int = 60 * 60 * 10) -> bytes:
+    """Play one game with the shortest-path bot; returns the replay blob"""
+    import config
+    from bots import OptimalBot
+    from events import PowerUpCollectedEvent
+    from game import Game
+    from powerups import TIME_BONUS_SECONDS
+    
+    game = Game(difficulty, seed=seed)
+    game.enable_enemies = enemies
+    game.reset(seed=seed)
+    bonuses = []
+    game.events.subscribe(PowerUpCollectedEvent, lambda events: bonuses.extend(
+        event for event in events if event.power_type == 'time'))
+    bot = OptimalBot(game)
+    while game.state == config.STATE_PLAYING and game.tick < max_ticks:
+        bot.steer()
+        game.update()
+    # What the HUD would show after playing in real time
+    claimed_time = int(game.tick / config.SIM_TICKS_PER_SECOND) + len(bonuses) * TIME_BONUS_SECONDS
+    return game.recorder.finish(game, claimed_time).to_bytes()
+
+
+def tamper(data: bytes, rng: random.Random) -> bytes:
+    """One of the cheats the verifier should catch"""
+    from replay import Replay
+    replay = Replay.from_bytes(data)
+    kind = rng.choice(['cut', 'moves', 'time', 'skip'])
+    if kind == 'cut' and len(replay.runs) > 1:
+        replay.runs = replay.runs[:-1]
+    elif kind == 'moves':
+        replay.moves = max(0, replay.moves - rng.randint(1, 50))
+    elif kind == 'skip' and len(replay.runs) > 2:
+        # Drop a stretch of movement, as if the player had teleported past it
+        moving = [i for i, (bits, _) in enumerate(replay.runs[:-1]) if bits]
+        del replay.runs[rng.choice(moving)]
+    else:
+        replay.time = 0.0
+    return replay.to_bytes()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=1000, help='replays to verify')
+    parser.add_argument('--unique', type=int, default=200, help='distinct bot runs to record (reused round-robin)')
+    parser.add_argument('--workers', type=int, default=None, help='verifier processes (default: CPUs)')
+    parser.add_argument('--tamper', type=float, default=0.2, help='share of replays to tamper with')
+    parser.add_argument('--enemies', action='store_true', help='record runs with enemies enabled')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+    
+    headless.init_headless()
+    from replay import Replay
+    from replay_verifier import ReplayVerifier
+    
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    honest = [record_bot_run(rng.getrandbits(32), rng.choice(['easy', 'medium', 'hard']), args.enemies)
+              for _ in range(min(args.unique, args.count))]
+    record_seconds = time.perf_counter() - started
+    
+    blobs, cheats = [], set()
+    for i in range(args.count):
+        data = honest[i % len(honest)]
+        if rng.random() < args.tamper:
+            data = tamper(data, rng)
+            cheats.add(Replay.hash_of(data))
+        blobs.append(data)
+    
+    verifier = ReplayVerifier(args.workers, max_pending=len(blobs))
+    verifier.verify_many(blobs[:verifier.workers])  # Start the workers outside the timing
+    started = time.perf_counter()
+    results = verifier.verify_many(blobs)
+    elapsed = time.perf_counter() - started
+    verifier.shutdown()
+    
+    rejected = [result for result in results if not result['ok']]
+    missed = sum(1 for result in results if result['ok'] and result['replay_hash'] in cheats)
+    false_rejects = sum(1 for result in rejected if result['replay_hash'] not in cheats)
+    ticks = sum(result.get('ticks', 0) for result in results)
+    print(json.dumps({
+        'replays': len(results),
+        'workers': verifier.workers,
+        'record_seconds': round(record_seconds, 2),
+        'verify_seconds': round(elapsed, 3),
+        'replays_per_second': round(len(results) / elapsed, 1),
+        'ticks_per_second': round(ticks / elapsed),
+        'mean_replay_bytes': round(sum(map(len, blobs)) / len(blobs)),
+        'rejection_rate': round(len(rejected) / len(results), 4),
+        'reasons': dict(collections.Counter(result['reason'] for result in rejected)),
+        'tampered': sum(1 for data in blobs if Replay.hash_of(data) in cheats),
+        'tampered_accepted': missed,
+        'honest_rejected': false_rejects,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+"""
+Solver and codec regression checks
+
+    python -m benchmarks.verify_solvers --mazes 200
+
+Fuzzes the maze solvers on random braided, terrain-painted mazes against plain
+references: bidirectional_bfs and astar against shortest_path's length,
+dijkstra and cost_field against a heapq Dijkstra's cost, and KeyPuzzle.solve
+against a dict-based BFS over (cell, keys held) states. Then round-trips
+replays (bytes back to the same runs, and a recorded bot run playing back to
+its win, on every difficulty) and snapshots (restored on a fresh game, the same
+state, then and after more ticks). Prints a JSON report and exits with status 1
+on any mismatch.
+"""
+
+import argparse
+import heapq
+import json
+import random
+import sys
+import time
+from collections import deque
+
+import headless
+
+from benchmarks.verify_replays import record_bot_run
+
+# Step order of pathfinding and terrain.DIRECTIONS: up, right, down, left
+SIDES = ('top', 'right', 'bottom', 'left')
+
+
+def _steps(maze):
+    """(passage bit, index offset) per direction"""
+    from maze_generator import WALL_BITS
+    return tuple(zip((WALL_BITS[side] for side in SIDES), (-maze.width, 1, maze.width, -1)))
+
+
+def path_cost(maze, path, passages, floor):
+    """Cost of walking path under dijkstra's step costs, None if it is not a walk through open passages"""
+    import terrain
+    enter = terrain.enter_costs()
+    width, total = maze.width, 0
+    steps = _steps(maze)
+    for (x, y), (nx, ny) in zip(path, path[1:]):
+        cell, neighbour = x + y * width, nx + ny * width
+        for direction, (bit, offset) in enumerate(steps):
+            if neighbour - cell == offset and passages[cell] & bit and abs(nx - x) + abs(ny - y) == 1:
+                total += enter[floor[neighbour]][direction]
+                break
+        else:
+            return None
+    return total
+
+
+def reference_cost(maze, start, goal, passages, floor):
+    """Cheapest cost from start to goal with heapq"""
+    import terrain
+    enter = terrain.enter_costs()
+    width = maze.width
+    source, target = start[0] + start[1] * width, goal[0] + goal[1] * width
+    steps = _steps(maze)
+    best = {source: 0}
+    heap = [(0, source)]
+    while heap:
+        cost, cell = heapq.heappop(heap)
+        if cell == target:
+            return cost
+        if cost > best[cell]:
+            continue
+        for direction, (bit, offset) in enumerate(steps):
+            if passages[cell] & bit:
+                neighbour = cell + offset
+                step_cost = cost + enter[floor[neighbour]][direction]
+                if step_cost < best.get(neighbour, step_cost + 1):
+                    best[neighbour] = step_cost
+                    heapq.heappush(heap, (step_cost, neighbour))
+    return None
+
+
+def reference_moves(puzzle):
+    """Fewest moves from the entry to the exit over (cell, keys held), one dict entry per state"""
+    maze = puzzle.maze
+    width = maze.width
+    steps = _steps(maze)
+    source = (maze.entry.x + maze.entry.y * width, puzzle.pick_up(0, maze.entry.x, maze.entry.y))
+    target = maze.exit.x + maze.exit.y * width
+    moves = {source: 0}
+    queue = deque([source])
+    while queue:
+        cell, held = state = queue.popleft()
+        if cell == target:
+            return moves[state]
+        for side, (bit, offset) in enumerate(steps):
+            colour = puzzle.door_at[cell * 4 + side]
+            if not puzzle.open_passages[cell] & bit or colour and not held >> colour - 1 & 1:
+                continue
+            neighbour = cell + offset
+            reached = (neighbour, puzzle.pick_up(held, neighbour % width, neighbour // width))
+            if reached not in moves:
+                moves[reached] = moves[state] + 1
+                queue.append(reached)
+    return None
+
+
+def check_solvers(maze, rng, queries, failures):
+    from pathfinding import (UNREACHED, astar, bidirectional_bfs, cost_field, descend, dijkstra, passage_bits,
+                             shortest_path)
+    passages = passage_bits(maze)
+    floor = maze.terrain if maze.terrain is not None else bytes(maze.width * maze.height)
+    plain = bytes(len(floor))
+    label = f"{maze.width}x{maze.height} seed {maze.seed}"
+    for _ in range(queries):
+        start = (rng.randrange(maze.width), rng.randrange(maze.height))
+        goal = (rng.randrange(maze.width), rng.randrange(maze.height))
+        reference = shortest_path(maze, start, goal)
+        for name, solver in (('bidirectional_bfs', bidirectional_bfs), ('astar', astar)):
+            path = solver(maze, start, goal, passages)
+            if (path is None) != (reference is None) or path and (
+                    len(path) != len(reference) or path[0] != start or path[-1] != goal or
+                    path_cost(maze, path, passages, plain) is None):
+                failures.append(f"{name} {label} {start}->{goal}: {len(path or [])} cells, "
+                                f"shortest_path {len(reference or [])}")
+        expected = reference_cost(maze, start, goal, passages, floor)
+        path = dijkstra(maze, start, goal, passages)
+        cost = path and path_cost(maze, path, passages, floor)
+        if (path is None) != (expected is None) or path and (cost != expected or path[0] != start or path[-1] != goal):
+            failures.append(f"dijkstra {label} {start}->{goal}: cost {cost}, expected {expected}")
+        costs, toward = cost_field(maze, goal, passages)
+        field_cost = costs[start[0] + start[1] * maze.width]
+        route = descend(maze, toward, start, goal) if field_cost != UNREACHED else []
+        if (field_cost if field_cost != UNREACHED else None) != expected or route and (
+                path_cost(maze, route, passages, floor) != expected):
+            failures.append(f"cost_field {label} {start}->{goal}: cost {field_cost}, expected {expected}")
+
+
+def check_puzzle(maze, rng, failures):
+    """Returns whether a puzzle was placed"""
+    from key_puzzle import MAX_KEYS, KeyPuzzle
+    try:
+        puzzle = KeyPuzzle.place(maze, rng.randint(1, MAX_KEYS // 2), random.Random(rng.random()))
+    except RuntimeError:
+        return False
+    expected = reference_moves(puzzle)
+    solution = puzzle.solve()
+    check = puzzle.solve(path=False)
+    label = f"{maze.width}x{maze.height} seed {maze.seed} {puzzle.colours} keys"
+    if solution is None or check is None or expected is None or solution.moves != expected or check.moves != expected:
+        failures.append(f"KeyPuzzle.solve {label}: {solution and solution.moves}, expected {expected}")
+    elif len(solution.path) != expected + 1 or sorted(solution.order) != list(range(puzzle.colours)):
+        failures.append(f"KeyPuzzle.solve {label}: route of {len(solution.path)} cells, order {solution.order}")
+    elif not puzzle.needs_every_key():
+        failures.append(f"KeyPuzzle.place {label}: solvable with a key left out")
+    return True
+
+
+def check_replays(rng, failures):
+    """Encode and decode random runs, then record and play back a bot run per difficulty"""
+    import config
+    from replay import Layout, Replay, ReplayPlayer
+    
+    for _ in range(50):
+        runs = [(rng.randrange(16), rng.choice([1, 2, 14, 15, 16, 300, 70000])) for _ in range(rng.randrange(1, 40))]
+        layout = Layout(rng.choice([0.0, 0.25]), rng.choice([0.0, 0.1]), rng.randrange(4))
+        replay = Replay(rng.getrandbits(32), rng.choice(list(config.DIFFICULTIES)), rng.random() < 0.5,
+                        rng.random() < 0.5, runs, float(rng.randrange(500)), rng.randrange(10000), layout)
+        decoded = Replay.from_bytes(replay.to_bytes())
+        if (list(decoded.inputs()) != list(replay.inputs()) or decoded.layout != layout or
+                (decoded.seed, decoded.difficulty, decoded.moves) != (replay.seed, replay.difficulty, replay.moves)):
+            failures.append(f"replay codec: {len(runs)} runs did not round-trip")
+    for difficulty in config.DIFFICULTIES:
+        data = record_bot_run(rng.getrandbits(32), difficulty, enemies=True)
+        if not ReplayPlayer(Replay.from_bytes(data)).verify():
+            failures.append(f"replay playback: {difficulty} bot run did not reproduce its win")
+
+
+def _simulation_state(data: bytes):
+    """A snapshot without its run id and wall-clock elapsed time, which a restore does not carry over"""
+    import snapshot
+    header = list(snapshot.HEADER.unpack_from(data))
+    del header[9], header[5]
+    return header, data[snapshot.HEADER.size:]
+
+
+def check_snapshots(rng, failures):
+    """Restore snapshots on a fresh game and compare the simulation state, then and after more ticks"""
+    import config
+    from bots import RandomWalkBot
+    from game import Game
+    
+    for difficulty in config.DIFFICULTIES:
+        seed = rng.getrandbits(32)
+        game = Game(difficulty, seed=seed, live=False)
+        bot = RandomWalkBot(game, random.Random(seed))
+        for _ in range(rng.randrange(100, 2000)):
+            if game.state != config.STATE_PLAYING:
+                break
+            bot.steer()
+            game.update()
+        data = game.snapshot()
+        other = Game('easy', seed=seed + 1, live=False)
+        other.restore(data)
+        if _simulation_state(other.snapshot()) != _simulation_state(data):
+            failures.append(f"snapshot {difficulty} seed {seed}: restore does not give the same state")
+            continue
+        for _ in range(300):
+            for each in (game, other):
+                each.update()
+        if _simulation_state(other.snapshot()) != _simulation_state(game.snapshot()):
+            failures.append(f"snapshot {difficulty} seed {seed}: restored game diverged")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mazes', type=int, default=100, help='random mazes to fuzz the solvers on')
+    parser.add_argument('--queries', type=int, default=10, help='start/goal pairs per maze')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+    
+    headless.init_headless()
+    from maze_generator import Maze
+    
+    rng = random.Random(args.seed)
+    failures = []
+    started = time.perf_counter()
+    puzzles = 0
+    for _ in range(args.mazes):
+        maze = Maze(rng.randint(4, 40), rng.randint(4, 30), seed=rng.getrandbits(32))
+        maze.generate()
+        maze.braid(rng.choice([0.0, 0.2, 0.5, 1.0]))
+        if rng.random() < 0.5:
+            maze.paint_terrain(rng.choice([0.1, 0.3]))
+        check_solvers(maze, rng, args.queries, failures)
+        puzzles += check_puzzle(maze, rng, failures)
+    solver_seconds = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    check_replays(rng, failures)
+    check_snapshots(rng, failures)
+    print(json.dumps({
+        'mazes': args.mazes,
+        'queries': args.mazes * args.queries,
+        'puzzles': puzzles,
+        'solver_seconds': round(solver_seconds, 2),
+        'codec_seconds': round(time.perf_counter() - started, 2),
+        'failures': failures[:20],
+        'failed': len(failures),
+    }, indent=2))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
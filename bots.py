@@ -0,0 +1,150 @@
+"""
+Scripted players for batch simulation
+A bot picks the next cell to head for whenever the player reaches a new cell
+and steers there through the same direction flags the keyboard sets, so bots
+play the real game loop (walls, enemies, power-ups) tick by tick.
+"""
+
+import random
+from collections import deque
+from typing import Dict, List, Optional
+
+import config
+from events import EnemyHitEvent, PowerUpCollectedEvent
+from key_puzzle import SIDE_BITS
+from pathfinding import Cell, bfs_distances, neighbours
+from replay import apply_flags
+
+# Clockwise from up, matching pathfinding.STEPS
+HEADINGS = [(0, -1), (1, 0), (0, 1), (-1, 0)]
+FLAG_BITS = {(-1, 0): 1, (1, 0): 2, (0, -1): 4, (0, 1): 8}
+
+
+class Bot:
+    """Base class: subclasses choose the next cell in next_cell()"""
+    
+    name = ''
+    
+    def __init__(self, game, rng: Optional[random.Random] = None):
+        self.game = game
+        self.maze = game.maze
+        self.rng = rng or random.Random(game.seed)
+        self.tile = game.difficulty_config['cell_size']
+        self.at: Optional[Cell] = None
+        self.came_from: Optional[Cell] = None
+        self.target: Optional[Cell] = None
+    
+    def next_cell(self, cell: Cell) -> Cell:
+        raise NotImplementedError
+    
+    def options(self, cell: Cell) -> List[Cell]:
+        """Open neighbours, less any behind a door the player's keys do not open yet"""
+        options = neighbours(self.maze, cell)
+        puzzle = self.game.puzzle
+        if puzzle is None:
+            return options
+        locked = puzzle.locked(self.game.keys_held)[cell[0] + cell[1] * self.maze.width]
+        return [option for option in options
+                if not locked & SIDE_BITS[HEADINGS.index((option[0] - cell[0], option[1] - cell[1]))]]
+    
+    def steer(self):
+        """Set the player's direction flags for the coming tick"""
+        player, tile = self.game.player, self.tile
+        cell = (int(player.x // tile), int(player.y // tile))
+        if cell != self.at:
+            # Reached the target, or was sent back to the entry by an enemy
+            self.came_from = self.at if cell == self.target else None
+            self.at = cell
+            self.target = self.next_cell(cell)
+        
+        # Line up on the target cell's spawn offset, one axis at a time
+        dx = self.target[0] * tile + tile // 3 - player.x
+        dy = self.target[1] * tile + tile // 3 - player.y
+        bits = 0
+        if abs(dx) >= player.speed:
+            bits = FLAG_BITS[(1, 0) if dx > 0 else (-1, 0)]
+        elif abs(dy) >= player.speed:
+            bits = FLAG_BITS[(0, 1) if dy > 0 else (0, -1)]
+        apply_flags(player, bits)
+
+
+class OptimalBot(Bot):
+    """Follows the shortest path to the exit (re-planned from wherever it is); in a
+    keys-and-doors game, the puzzle solver's shortest solution"""
+    
+    name = 'optimal'
+    
+    def __init__(self, game, rng=None):
+        super().__init__(game, rng)
+        self.distances = bfs_distances(self.maze, (self.maze.exit.x, self.maze.exit.y))
+        self.plan = deque()
+    
+    def next_cell(self, cell):
+        puzzle = self.game.puzzle
+        if puzzle is None:
+            options = neighbours(self.maze, cell)
+            return min(options, key=lambda option: self.distances.get(option, len(self.distances)))
+        if not self.plan or self.plan[0] != cell:
+            # First call, or knocked off the plan by an enemy
+            solution = puzzle.solve(cell, self.game.keys_held)
+            self.plan = deque(solution.path if solution else [cell])
+        self.plan.popleft()
+        return self.plan[0] if self.plan else cell
+
+
+class WallFollowerBot(Bot):
+    """Keeps its right hand on the wall"""
+    
+    name = 'wall'
+    
+    def next_cell(self, cell):
+        if self.came_from is None:
+            heading = 2  # Start (and restart after a hit) facing down into the maze
+        else:
+            heading = HEADINGS.index((cell[0] - self.came_from[0], cell[1] - self.came_from[1]))
+        options = set(self.options(cell))
+        # Right, straight, left, back
+        for turn in (1, 0, 3, 2):
+            dx, dy = HEADINGS[(heading + turn) % 4]
+            step = (cell[0] + dx, cell[1] + dy)
+            if step in options:
+                return step
+        return cell
+
+
+class RandomWalkBot(Bot):
+    """Picks a random open direction at every cell, turning back only at dead ends"""
+    
+    name = 'random'
+    
+    def next_cell(self, cell):
+        options = self.options(cell)
+        forward = [option for option in options if option != self.came_from]
+        return self.rng.choice(forward or options)
+
+
+BOTS = {bot.name: bot for bot in (OptimalBot, WallFollowerBot, RandomWalkBot)}
+
+
+def play(game, bot: Bot, max_ticks: int) -> Dict:
+    """Run the game under a bot until it wins or max_ticks pass"""
+    hits = [0]
+    pickups: Dict[str, int] = {}
+    game.events.subscribe(EnemyHitEvent, lambda events: hits.__setitem__(0, hits[0] + len(events)))
+    
+    def count_pickups(events):
+        for event in events:
+            pickups[event.power_type] = pickups.get(event.power_type, 0) + 1
+    
+    game.events.subscribe(PowerUpCollectedEvent, count_pickups)
+    while game.state == config.STATE_PLAYING and game.tick < max_ticks:
+        bot.steer()
+        game.update()
+    return {
+        'completed': game.won,
+        'ticks': game.tick,
+        'moves': game.hud.move_count,
+        'enemy_hits': hits[0],
+        'powerups': pickups,
+        'powerups_spawned': len(game.powerup_manager.powerups) if game.enable_powerups else 0,
+    }
@@ -40,7 +40,7 @@ class Cell:
             return False
         return grid_cells[find_index(x, y)]
     
-    def check_neighbors(self, cols, rows, grid_cells):
+    def check_neighbors(self, cols, rows, grid_cells, rng=random):
         """Check cell neighbors and return a random unvisited neighbor"""
         neighbors = []
         top = self.check_cell(self.x, self.y - 1, cols, rows, grid_cells)
@@ -57,4 +57,4 @@ class Cell:
         if left and not left.visited:
             neighbors.append(left)
         
-        return random.choice(neighbors) if neighbors else False
+        return rng.choice(neighbors) if neighbors else False
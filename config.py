@@ -2,6 +2,8 @@
 Game configuration and constants
 """
 
+import os
+
 # Window settings
 WINDOW_WIDTH = 800
 WINDOW_HEIGHT = 600
@@ -13,10 +15,23 @@ MAZE_HEIGHT = 15  # Number of cells vertically
 CELL_SIZE = 30  # Size of each cell in pixels
 
 # Difficulty settings
+# enemies / powerups are spawn counts (calibrate with batch_sim.py)
+# braid is the share of dead ends opened into loops (0 keeps mazes perfect); changing it
+# changes every seed's layout. Replays and snapshots record the layout they were played
+# on, so older ones still play back, but ghosts only race runs on the current layout
+# terrain is the share of cells painted mud, ice or conveyor (terrain.py); like braid,
+# changing it changes what a seed plays like
+# keys is the number of key colours (0-8) for the keys-and-doors mode (key_puzzle.py), 0 = off.
+# The doors tier plays hard's maze with keys; new tiers go last, since replays store the tier index
 DIFFICULTIES = {
-    'easy': {'width': 15, 'height': 10, 'cell_size': 35},
-    'medium': {'width': 20, 'height': 15, 'cell_size': 30},
-    'hard': {'width': 30, 'height': 20, 'cell_size': 25}
+    'easy': {'width': 15, 'height': 10, 'cell_size': 35, 'enemies': 1, 'powerups': 3, 'braid': 0.0,
+             'terrain': 0.0, 'keys': 0},
+    'medium': {'width': 20, 'height': 15, 'cell_size': 30, 'enemies': 2, 'powerups': 5, 'braid': 0.0,
+               'terrain': 0.0, 'keys': 0},
+    'hard': {'width': 30, 'height': 20, 'cell_size': 25, 'enemies': 4, 'powerups': 7, 'braid': 0.0,
+             'terrain': 0.0, 'keys': 0},
+    'doors': {'width': 30, 'height': 20, 'cell_size': 25, 'enemies': 4, 'powerups': 7, 'braid': 0.0,
+              'terrain': 0.0, 'keys': 3}
 }
 
 # Colors
@@ -35,10 +50,73 @@ PLAYER_SPEED = 1  # Cells per move
 ENABLE_POWERUPS = True
 ENABLE_ENEMIES = True
 
+# Input options
+FILTER_INPUT_EVENTS = True  # Block unhandled event types at the SDL queue
+
 # Visual style options
 VISUAL_STYLE_BLOCKS = 'blocks'
 VISUAL_STYLE_LINES = 'lines'
 
+# Audio options
+ENABLE_AUDIO = True  # Effects are synthesized at startup, no sound files needed
+SOUND_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'sounds')
+
+# Leaderboard database (SQLite, WAL mode)
+LEADERBOARD_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'leaderboard.db')
+
+# Startup timing log (one JSON line per launch)
+STARTUP_REPORT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'startup_times.jsonl')
+
+# Profiling output (F3 overlay / F4 CSV dump)
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles')
+PROFILE_HISTORY_SECONDS = 10
+PROFILE_CPROFILE_FRAMES = 300  # Frames captured per F5 press
+
+# Web launcher session pool
+MAX_GAME_SESSIONS = 4  # Desktop games running at once from /api/launch
+WARM_GAME_PROCESSES = 1  # Interpreters kept waiting with pygame already imported
+LAUNCH_QUEUE_SIZE = 8  # Launches queued beyond the cap before refusing
+WARM_IDLE_TIMEOUT = 600  # Retire warm interpreters after this long without launches
+
+# Maze API (/api/maze)
+MAX_API_MAZE_SIZE = 1000  # Largest width/height served; generation holds every cell in memory
+MAZE_CACHE_ENTRIES = 64
+MAZE_CACHE_BYTES = 64 * 1024 * 1024  # Layouts are one byte per cell
+
+# Best-of-N maze selection for new games (maze_selection.py)
+MAZE_SELECTION_CANDIDATES = 8  # Layouts drawn per new game; 1 turns selection off
+MAZE_SELECTION_BUDGET = 0.25  # Seconds to wait for candidates; late ones still land in the maze cache
+MAZE_SELECTION_WORKERS = None  # Generator processes; None means one per CPU
+MAZE_SELECTION_METRIC = 'solution_ratio'  # Route cells / all cells, or any maze_analytics measure
+# Target band of the metric per difficulty (from maze_analytics.py percentiles)
+MAZE_SELECTION_BANDS = {'easy': (0.3, 0.45), 'medium': (0.4, 0.5), 'hard': (0.45, 0.55)}
+
+# Async front end (asgi_app.py)
+ASGI_WORKER_THREADS = 8  # Executor for generation, launches and frame encoding
+ASGI_MAX_PENDING_JOBS = 64  # Offloaded jobs in flight before answering 503
+ASGI_STREAM_THREADS = 8  # Separate executor stepping play streams; one thread per open stream at most
+ASGI_SEND_TIMEOUT = 10  # Seconds a stalled client may block one chunk before it is dropped
+ASGI_KEEPALIVE_TIMEOUT = 120  # Idle keep-alive connections are held this long
+ASGI_BACKLOG = 4096
+
+# Browser play (headless frame server)
+MAX_PLAY_SESSIONS = 4  # Concurrent off-screen games per web process
+PLAY_IDLE_TIMEOUT = 60  # Seconds before an unwatched session is dropped
+PLAY_MAX_FPS = 30
+PLAY_KEYFRAME_INTERVAL = 120  # Full frame every N frames to resync clients
+SSE_KEYFRAME_INTERVAL = 300  # Full state every N ticks on the /events stream
+
+# Ghost racing: best leaderboard replays on the same seed raced alongside the player
+GHOST_COUNT = 10
+GHOST_CHECKPOINT_INTERVAL = 600  # Ticks between saved ghost states, so seeking back re-steps at most this many
+
+# Replay verification (leaderboard submissions)
+REPLAY_VERIFY_WORKERS = None  # Verifier processes; None means one per CPU
+REPLAY_VERIFY_QUEUE = 10000  # Submissions waiting for a worker before answering 503
+REPLAY_MAX_BYTES = 64 * 1024
+REPLAY_MAX_TICKS = 60 * 60 * 30  # 30 minutes of play at 60 ticks/s
+SIM_TICKS_PER_SECOND = 60  # Game.update rate of the desktop loop and play sessions
+
 # Game states
 STATE_MENU = 0
 STATE_PLAYING = 1
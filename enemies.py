@@ -4,18 +4,69 @@ Enemy system for the maze game
 
 import random
 import pygame
+import config
+import terrain
 from typing import List, Tuple, Optional
+from assets import get_glyph, get_sprite
+
+
+ENEMY_TYPES = ['slow', 'fast', 'patrol']
+
+
+def enemy_sprite(enemy_type: str) -> pygame.Surface:
+    """Cached enemy sprite, centered on the surface"""
+    return get_sprite(('enemy', enemy_type), lambda: _build_enemy_sprite(enemy_type))
+
+
+def _build_enemy_sprite(enemy_type: str) -> pygame.Surface:
+    """Render an enemy with glow, outline, warning mark and eyes"""
+    size = 15 if enemy_type == 'fast' else 18
+    half = size // 2 + 4
+    sprite = pygame.Surface((half * 2 + 1, half * 2 + 1), pygame.SRCALPHA)
+    center_x = center_y = half
+    
+    # Enemy color based on type - make them VERY visible
+    if enemy_type == 'slow':
+        color = (255, 0, 0)  # Bright red
+        glow_color = (255, 100, 100)
+    elif enemy_type == 'fast':
+        color = (255, 50, 50)  # Bright red
+        glow_color = (255, 150, 150)
+    else:  # patrol
+        color = (200, 0, 200)  # Bright purple
+        glow_color = (255, 100, 255)
+    
+    # Draw glow effect
+    pygame.draw.circle(sprite, glow_color, (center_x, center_y), size // 2 + 3)
+    
+    # Draw enemy
+    pygame.draw.circle(sprite, color, (center_x, center_y), size // 2)
+    pygame.draw.circle(sprite, (255, 255, 255), (center_x, center_y), size // 2, 2)
+    
+    # Draw warning symbol (skull or X)
+    warning_text = get_glyph("!", 16, (255, 255, 0))
+    warning_rect = warning_text.get_rect(center=(center_x, center_y))
+    sprite.blit(warning_text, warning_rect)
+    
+    # Draw eyes
+    eye_size = 3
+    pygame.draw.circle(sprite, (255, 255, 255), (center_x - 4, center_y - 4), eye_size)
+    pygame.draw.circle(sprite, (255, 255, 255), (center_x + 4, center_y - 4), eye_size)
+    pygame.draw.circle(sprite, (0, 0, 0), (center_x - 4, center_y - 4), 1)
+    pygame.draw.circle(sprite, (0, 0, 0), (center_x + 4, center_y - 4), 1)
+    return sprite
 
 
 class Enemy:
     """Enemy that patrols the maze"""
     
-    def __init__(self, x: int, y: int, enemy_type: str, theme):
+    def __init__(self, x: int, y: int, enemy_type: str, theme, rng=random):
         self.x = x
         self.y = y
         self.type = enemy_type  # 'slow', 'fast', 'patrol'
         self.theme = theme
-        self.direction = random.choice([(0, -1), (0, 1), (-1, 0), (1, 0)])
+        self.rng = rng  # The game's seeded generator keeps patrols replayable
+        self.direction = rng.choice([(0, -1), (0, 1), (-1, 0), (1, 0)])
         self.move_timer = 0
         
         # Movement speed based on type
@@ -26,7 +77,7 @@ class Enemy:
         """Update enemy position"""
         self.move_timer += 1
         
-        if self.move_timer >= self.move_delay:
+        if self.move_timer >= terrain.move_delay(maze, self):
             self.move_timer = 0
             
             # Try to move in current direction
@@ -45,43 +96,16 @@ class Enemy:
                         possible_dirs.append((dx, dy))
                 
                 if possible_dirs:
-                    self.direction = random.choice(possible_dirs)
+                    self.direction = self.rng.choice(possible_dirs)
     
     def draw(self, screen: pygame.Surface, cell_size: int, offset_x: int, offset_y: int):
         """Draw enemy with high visibility"""
         center_x = offset_x + self.x * cell_size + cell_size // 2
         center_y = offset_y + self.y * cell_size + cell_size // 2
         
-        # Enemy color based on type - make them VERY visible
-        if self.type == 'slow':
-            color = (255, 0, 0)  # Bright red
-            glow_color = (255, 100, 100)
-        elif self.type == 'fast':
-            color = (255, 50, 50)  # Bright red
-            glow_color = (255, 150, 150)
-        else:  # patrol
-            color = (200, 0, 200)  # Bright purple
-            glow_color = (255, 100, 255)
-        
-        # Draw glow effect
-        pygame.draw.circle(screen, glow_color, (center_x, center_y), self.size // 2 + 3)
-        
-        # Draw enemy
-        pygame.draw.circle(screen, color, (center_x, center_y), self.size // 2)
-        pygame.draw.circle(screen, (255, 255, 255), (center_x, center_y), self.size // 2, 2)
-        
-        # Draw warning symbol (skull or X)
-        font = pygame.font.Font(None, 16)
-        warning_text = font.render("!", True, (255, 255, 0))
-        warning_rect = warning_text.get_rect(center=(center_x, center_y))
-        screen.blit(warning_text, warning_rect)
-        
-        # Draw eyes
-        eye_size = 3
-        pygame.draw.circle(screen, (255, 255, 255), (center_x - 4, center_y - 4), eye_size)
-        pygame.draw.circle(screen, (255, 255, 255), (center_x + 4, center_y - 4), eye_size)
-        pygame.draw.circle(screen, (0, 0, 0), (center_x - 4, center_y - 4), 1)
-        pygame.draw.circle(screen, (0, 0, 0), (center_x + 4, center_y - 4), 1)
+        sprite = enemy_sprite(self.type)
+        half = sprite.get_width() // 2
+        screen.blit(sprite, (center_x - half, center_y - half))
     
     def check_collision(self, player_x: int, player_y: int) -> bool:
         """Check if enemy collided with player"""
@@ -91,25 +115,26 @@ class Enemy:
 class EnemyManager:
     """Manages all enemies in the game"""
     
-    def __init__(self, maze, theme, difficulty='medium'):
+    def __init__(self, maze, theme, difficulty='medium', rng=random):
         self.maze = maze
         self.theme = theme
+        self.rng = rng
         self.enemies: List[Enemy] = []
         
         # Spawn enemies based on difficulty
-        spawn_count = {'easy': 1, 'medium': 2, 'hard': 4}[difficulty]
+        spawn_count = config.DIFFICULTIES[difficulty]['enemies']
         self.spawn_enemies(spawn_count, difficulty)
     
     def spawn_enemies(self, count: int, difficulty: str):
         """Spawn enemies randomly in the maze"""
-        enemy_types = ['slow'] if difficulty == 'easy' else ['slow', 'fast', 'patrol']
+        enemy_types = ['slow'] if difficulty == 'easy' else ENEMY_TYPES
         
         for _ in range(count):
             # Find random path cell
             attempts = 0
             while attempts < 100:
-                x = random.randint(1, self.maze.width - 2)
-                y = random.randint(1, self.maze.height - 2)
+                x = self.rng.randint(1, self.maze.width - 2)
+                y = self.rng.randint(1, self.maze.height - 2)
                 
                 # Don't spawn on entry, exit, or near entry
                 if (self.maze.is_path(x, y) and
@@ -118,8 +143,8 @@ class EnemyManager:
                     abs(x - self.maze.entry.x) + abs(y - self.maze.entry.y) > 5 and
                     not any(e.x == x and e.y == y for e in self.enemies)):
                     
-                    enemy_type = random.choice(enemy_types)
-                    self.enemies.append(Enemy(x, y, enemy_type, self.theme))
+                    enemy_type = self.rng.choice(enemy_types)
+                    self.enemies.append(Enemy(x, y, enemy_type, self.theme, self.rng))
                     break
                 
                 attempts += 1
@@ -0,0 +1,94 @@
+"""
+Internal event bus for game events
+Events are queued while a tick runs and dispatched once, in batches, at the
+end of the tick
+"""
+
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+
+class MoveEvent(NamedTuple):
+    """Player moved during a tick (pixel coordinates)"""
+    tick: int
+    x: float
+    y: float
+
+
+class CellEnteredEvent(NamedTuple):
+    """Player crossed into a new maze cell"""
+    tick: int
+    cell_x: int
+    cell_y: int
+
+
+class PowerUpCollectedEvent(NamedTuple):
+    """Player picked up a power-up"""
+    tick: int
+    power_type: str
+    cell_x: int
+    cell_y: int
+
+
+class KeyCollectedEvent(NamedTuple):
+    """Player picked up a puzzle key, opening that colour's doors"""
+    tick: int
+    colour: int
+    cell_x: int
+    cell_y: int
+
+
+class EnemyHitEvent(NamedTuple):
+    """Player touched an enemy and was sent back to the entry"""
+    tick: int
+    cell_x: int
+    cell_y: int
+
+
+class WinEvent(NamedTuple):
+    """Player reached the exit"""
+    tick: int
+    time: int
+
+
+class EventBus:
+    """Queues typed events and hands them to subscribers in per-type batches"""
+    
+    def __init__(self):
+        self.queue: List[NamedTuple] = []
+        self.subscribers: Dict[type, List[Tuple[Callable, bool]]] = {}
+    
+    def subscribe(self, event_type: type, handler: Callable, coalesce: bool = False):
+        """Register handler(events) for a type
+        
+        The handler receives the list of events of that type queued during the
+        tick; with coalesce=True it is called with only the latest one.
+        """
+        self.subscribers.setdefault(event_type, []).append((handler, coalesce))
+    
+    def unsubscribe(self, event_type: type, handler: Callable):
+        """Remove a handler registered for a type"""
+        handlers = self.subscribers.get(event_type, [])
+        self.subscribers[event_type] = [entry for entry in handlers if entry[0] != handler]
+    
+    def publish(self, event):
+        """Queue an event for the next dispatch"""
+        self.queue.append(event)
+    
+    def dispatch(self):
+        """Deliver every queued event, grouped by type in order of first appearance"""
+        if not self.queue:
+            return
+        
+        queue = self.queue
+        self.queue = []
+        batches: Dict[type, list] = {}
+        for event in queue:
+            batches.setdefault(type(event), []).append(event)
+        
+        for event_type, events in batches.items():
+            for handler, coalesce in self.subscribers.get(event_type, ()):
+                handler(events[-1:] if coalesce else events)
+    
+    def clear(self):
+        """Drop queued events without delivering them"""
+        self.queue = []
@@ -0,0 +1,112 @@
+"""
+Per-frame phase profiler
+Records how long each phase of a frame (events, update, draw layers, present)
+takes over a rolling window, for the HUD overlay and CSV dumps. Sections may
+nest (the draw layers inside 'draw'); a phase's time excludes its nested
+sections, so the phases of a frame add up without double counting
+"""
+
+import csv
+import os
+import time
+from collections import deque
+from typing import Dict, List
+
+
+class _Section:
+    """Reusable timing context for one phase name"""
+    
+    __slots__ = ('profiler', 'name', 'start', 'parent', 'nested')
+    
+    def __init__(self, profiler, name: str):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+        self.parent = None
+        self.nested = 0.0  # Time spent in sections opened inside this one
+    
+    def __enter__(self):
+        profiler = self.profiler
+        self.parent = profiler.active
+        profiler.active = self
+        self.nested = 0.0
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        profiler = self.profiler
+        phases = profiler.current
+        phases[self.name] = phases.get(self.name, 0.0) + elapsed - self.nested
+        profiler.active = self.parent
+        if self.parent is not None:
+            self.parent.nested += elapsed
+        self.parent = None
+        return False
+
+
+class FrameProfiler:
+    """Rolling window of per-frame, per-phase timings"""
+    
+    def __init__(self, history_seconds: int = 10, fps: int = 60):
+        self.frames = deque(maxlen=history_seconds * fps)  # (timestamp, frame seconds, phases)
+        self.phase_names: List[str] = []  # In first-seen order, for stable columns
+        self.current: Dict[str, float] = {}
+        self.overlay_visible = False
+        self.frame_start = None
+        self.frame_count = 0
+        self._sections: Dict[str, _Section] = {}
+        self.active = None  # Innermost open section
+    
+    def section(self, name: str) -> _Section:
+        """Context manager timing one phase of the current frame"""
+        section = self._sections.get(name)
+        if section is None:
+            section = self._sections[name] = _Section(self, name)
+            self.phase_names.append(name)
+        return section
+    
+    def end_frame(self):
+        """Close the current frame and start timing the next one"""
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            self.frames.append((time.time(), now - self.frame_start, self.current))
+            self.frame_count += 1
+        self.frame_start = now
+        self.current = {}
+    
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+    
+    def frame_times(self, count: int = None) -> List[float]:
+        """Most recent frame durations in seconds, oldest first"""
+        frames = list(self.frames)[-count:] if count else self.frames
+        return [frame[1] for frame in frames]
+    
+    def summary(self, window: int = 60) -> Dict[str, float]:
+        """Average phase times over the last window frames plus p99 and worst frame"""
+        recent = list(self.frames)[-window:]
+        if not recent:
+            return {}
+        ordered = sorted(frame[1] for frame in self.frames)
+        result = {
+            'frame': sum(frame[1] for frame in recent) / len(recent),
+            'p99': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+            'worst': ordered[-1],
+        }
+        for name in self.phase_names:
+            result[name] = sum(frame[2].get(name, 0.0) for frame in recent) / len(recent)
+        return result
+    
+    def dump_csv(self, directory: str) -> str:
+        """Write every buffered frame to a timestamped CSV, returns its path"""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, time.strftime('frames-%Y%m%d-%H%M%S.csv'))
+        first_frame = self.frame_count - len(self.frames)
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['frame', 'timestamp', 'frame_ms'] + [f"{name}_ms" for name in self.phase_names])
+            for i, (timestamp, duration, phases) in enumerate(self.frames):
+                writer.writerow([first_frame + i, f"{timestamp:.3f}", f"{duration * 1000:.3f}"] +
+                                [f"{phases.get(name, 0.0) * 1000:.3f}" for name in self.phase_names])
+        return path
@@ -0,0 +1,471 @@
+"""
+Headless frame server - play the game from a browser
+Each session runs a Game off-screen, streams only the changed region of each
+frame and takes batched input back over HTTP
+"""
+
+import io
+import struct
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Dict, Optional
+
+import numpy as np
+import pygame
+from flask import Blueprint, Response, jsonify, request, render_template_string
+
+import config
+import metrics
+from leaderboard import leaderboard
+from state_stream import StateStream
+
+
+# Chunk header on the delta stream: x, y, width, height, payload length
+CHUNK_HEADER = struct.Struct('<HHHHI')
+
+# Browser key names accepted by the input endpoint
+KEY_NAMES = {
+    'left': pygame.K_LEFT, 'right': pygame.K_RIGHT, 'up': pygame.K_UP, 'down': pygame.K_DOWN,
+    'a': pygame.K_a, 'd': pygame.K_d, 'w': pygame.K_w, 's': pygame.K_s,
+    'p': pygame.K_p, 'escape': pygame.K_ESCAPE, 'r': pygame.K_r, 'm': pygame.K_m, 'g': pygame.K_g,
+}
+
+SIM_FPS = config.SIM_TICKS_PER_SECOND
+MAX_CATCHUP_TICKS = 10  # Simulation ticks per frame at most, so a stalled client can't burn CPU
+
+ENCODE_SECONDS = metrics.histogram('play_frame_encode_seconds', 'Delta detection and image encoding per streamed frame',
+                                   ['format'])
+FRAME_BYTES = metrics.counter('play_stream_bytes_total', 'Encoded bytes produced for play streams', ['format'])
+
+# pygame font rendering is not thread-safe; sessions share one render lock
+_render_lock = threading.Lock()
+
+
+class FrameGovernor:
+    """Adapts the frame rate to how fast the client drains the stream"""
+    
+    def __init__(self, min_fps: float = 5, max_fps: float = 30):
+        self.min_fps = min_fps
+        self.max_fps = max_fps
+        self.fps = max_fps
+    
+    @property
+    def interval(self) -> float:
+        return 1.0 / self.fps
+    
+    def frame_sent(self, blocked_seconds: float):
+        """Feed back how long handing the last frame to the client took"""
+        if blocked_seconds > self.interval * 0.5:
+            # Client (or the socket buffer) is falling behind - back off
+            self.fps = max(self.min_fps, self.fps * 0.75)
+        elif blocked_seconds < self.interval * 0.1:
+            self.fps = min(self.max_fps, self.fps + 1)
+
+
+class PlaySession:
+    """One off-screen game plus its input, shared by every stream watching it"""
+    
+    def __init__(self, difficulty: str = 'medium', theme_name: str = 'classic'):
+        from game import Game
+        from input_state import InputCollector
+        
+        self.id = uuid.uuid4().hex[:12]
+        with _render_lock:
+            self.game = Game(difficulty, theme_name, 'lines')
+        self.input = InputCollector()
+        self.pending_events = deque()
+        self.last_active = time.monotonic()
+        self.last_tick = time.monotonic()
+        self.viewers = 0  # Open frame or state streams, changed under lock
+        self.lock = threading.Lock()  # One stepper at a time when several streams watch
+    
+    def queue_input(self, events):
+        """Queue a batch of browser input events for the next simulation step"""
+        for event in events:
+            kind = event.get('type')
+            if kind in ('keydown', 'keyup'):
+                key = KEY_NAMES.get(str(event.get('key', '')).lower())
+                if key is not None:
+                    event_type = pygame.KEYDOWN if kind == 'keydown' else pygame.KEYUP
+                    self.pending_events.append(pygame.event.Event(event_type, key=key))
+            elif kind in ('mousemove', 'click'):
+                pos = (int(event.get('x', 0)), int(event.get('y', 0)))
+                event_type = pygame.MOUSEMOTION if kind == 'mousemove' else pygame.MOUSEBUTTONDOWN
+                self.pending_events.append(pygame.event.Event(event_type, pos=pos, button=1))
+        self.last_active = time.monotonic()
+    
+    def attach(self):
+        """Count a stream that started watching"""
+        with self.lock:
+            self.viewers += 1
+    
+    def detach(self):
+        """Count a stream that stopped watching"""
+        with self.lock:
+            self.viewers -= 1
+            self.last_active = time.monotonic()
+    
+    def step(self, on_tick=None):
+        """Apply queued input and advance the simulation to real time, calling on_tick(game) after each tick"""
+        with self.lock:
+            self._step(on_tick)
+    
+    def _step(self, on_tick):
+        game = self.game
+        self.input.begin_frame()
+        while self.pending_events:
+            event = self.pending_events.popleft()
+            if self.input.process(event):
+                continue
+            if event.type == pygame.KEYDOWN:
+                action = game.handle_key(event.key)
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                action = game.handle_mouse(event)
+            else:
+                continue
+            if action in ('restart', 'menu'):
+                # No menu in browser play - both start a fresh maze
+                game.reset()
+            elif action == 'race':
+                # Same maze again, racing the ghosts of its best runs (flushed, so this one counts)
+                leaderboard.flush()
+                game.reset(seed=game.seed)
+            elif action == 'resume':
+                game.state = config.STATE_PLAYING
+        game.apply_input(self.input.state)
+        
+        now = time.monotonic()
+        ticks = min(MAX_CATCHUP_TICKS, int((now - self.last_tick) * SIM_FPS))
+        if ticks:
+            self.last_tick = now if ticks == MAX_CATCHUP_TICKS else self.last_tick + ticks / SIM_FPS
+            for _ in range(ticks):
+                game.update()
+                if on_tick:
+                    on_tick(game)
+
+
+class FrameStream:
+    """One viewer's frame state: its own surface, the last frame it was sent and how many,
+    so several streams on a session each get the changes since their own last frame"""
+    
+    def __init__(self, session: PlaySession):
+        self.session = session
+        self.surface = pygame.Surface((config.WINDOW_WIDTH, config.WINDOW_HEIGHT))
+        self.previous = None  # Last frame sent, as an RGB array
+        self.frames_sent = 0
+    
+    def render_delta(self, image_format: str = 'png', keyframe: bool = False):
+        """Render and return (rect, encoded image) of the changed region, or None"""
+        # Under the session lock, so another viewer's step can't change the game mid-draw
+        with self.session.lock, _render_lock:
+            self.session.game.draw(self.surface)
+        started = time.perf_counter()
+        frame = pygame.surfarray.array3d(self.surface)
+        
+        if keyframe or self.previous is None:
+            rect = pygame.Rect(0, 0, *self.surface.get_size())
+        else:
+            changed = np.any(frame != self.previous, axis=2)  # Indexed [x, y]
+            columns = np.flatnonzero(changed.any(axis=1))
+            if not len(columns):
+                return None
+            rows = np.flatnonzero(changed.any(axis=0))
+            rect = pygame.Rect(int(columns[0]), int(rows[0]),
+                               int(columns[-1] - columns[0] + 1), int(rows[-1] - rows[0] + 1))
+        self.previous = frame
+        
+        buffer = io.BytesIO()
+        pygame.image.save(self.surface.subsurface(rect), buffer, f"frame.{image_format}")
+        self.frames_sent += 1
+        ENCODE_SECONDS.labels(image_format).observe(time.perf_counter() - started)
+        FRAME_BYTES.labels(image_format).inc(buffer.tell())
+        return rect, buffer.getvalue()
+
+
+class SessionRegistry:
+    """Caps the number of concurrent play sessions and reaps idle ones"""
+    
+    def __init__(self, max_sessions: int, idle_timeout: float):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.sessions: Dict[str, PlaySession] = {}
+        self.starting = 0  # Slots reserved by sessions still being built
+        self.lock = threading.Lock()
+    
+    def create(self, difficulty: str, theme_name: str) -> Optional[PlaySession]:
+        """New session, or None when the cap is reached"""
+        self.reap()
+        with self.lock:
+            if len(self.sessions) + self.starting >= self.max_sessions:
+                return None
+            self.starting += 1
+        try:
+            session = PlaySession(difficulty, theme_name)
+        except BaseException:
+            with self.lock:
+                self.starting -= 1
+            raise
+        with self.lock:
+            self.starting -= 1
+            self.sessions[session.id] = session
+        return session
+    
+    def get(self, session_id: str) -> Optional[PlaySession]:
+        return self.sessions.get(session_id)
+    
+    def close(self, session_id: str):
+        with self.lock:
+            self.sessions.pop(session_id, None)
+    
+    def reap(self):
+        """Drop sessions nobody has streamed from or sent input to for a while"""
+        cutoff = time.monotonic() - self.idle_timeout
+        with self.lock:
+            for session_id in [sid for sid, s in self.sessions.items()
+                               if not s.viewers and s.last_active < cutoff]:
+                del self.sessions[session_id]
+
+
+def _ensure_pygame():
+    """Fonts and timers are all a headless session needs - never open a window. Browser
+    mazes skip best-of-N selection, which would spawn a process pool in the web server"""
+    from maze_selection import selector
+    selector.enabled = False
+    if not pygame.get_init():
+        pygame.init()
+    if not pygame.font.get_init():
+        pygame.font.init()
+
+
+def stream_frames(session: PlaySession, governor: FrameGovernor, image_format: str, multipart: bool):
+    """Generator of encoded frames paced by the governor"""
+    boundary = b'--frame\r\n'
+    mimetype = b'image/jpeg' if image_format == 'jpg' else b'image/png'
+    frames = FrameStream(session)
+    session.attach()
+    try:
+        keyframe = True
+        while session.id in registry.sessions:
+            started = time.monotonic()
+            session.step()
+            # MJPEG clients can't composite partial frames, so they always get full ones
+            delta = frames.render_delta(image_format, keyframe=keyframe or multipart)
+            keyframe = frames.frames_sent % config.PLAY_KEYFRAME_INTERVAL == 0
+            if delta is not None:
+                rect, payload = delta
+                if multipart:
+                    chunk = (boundary + b'Content-Type: ' + mimetype + b'\r\n' +
+                             b'Content-Length: ' + str(len(payload)).encode() + b'\r\n\r\n' +
+                             payload + b'\r\n')
+                else:
+                    chunk = CHUNK_HEADER.pack(rect.x, rect.y, rect.width, rect.height, len(payload)) + payload
+                handed_off = time.monotonic()
+                yield chunk
+                governor.frame_sent(time.monotonic() - handed_off)
+                session.last_active = time.monotonic()
+            sleep_for = governor.interval - (time.monotonic() - started)
+            if sleep_for > 0:
+                time.sleep(sleep_for)
+    finally:
+        session.detach()
+
+
+def stream_state(session: PlaySession, rate: float = 30, keepalive: float = 15):
+    """Generator of SSE messages: a keyframe, then per-tick deltas of whatever changed.
+    Every step yields, an empty string when there is nothing to send, so a caller
+    pulling it on a worker thread gets the thread back each step"""
+    stream = StateStream(config.SSE_KEYFRAME_INTERVAL)
+    messages = []
+    
+    def on_tick(game):
+        message = stream.update(game)
+        if message:
+            messages.append(message)
+    
+    session.attach()
+    try:
+        with session.lock:
+            first = stream.keyframe(session.game)
+        yield 'retry: 2000\n' + first
+        last_sent = time.monotonic()
+        while session.id in registry.sessions:
+            started = time.monotonic()
+            session.step(on_tick)
+            if messages:
+                yield ''.join(messages)
+                messages.clear()
+                last_sent = time.monotonic()
+            elif started - last_sent > keepalive:
+                yield ': keepalive\n\n'
+                last_sent = time.monotonic()
+            else:
+                yield ''
+            session.last_active = time.monotonic()
+            sleep_for = 1.0 / rate - (time.monotonic() - started)
+            if sleep_for > 0:
+                time.sleep(sleep_for)
+    finally:
+        session.detach()
+
+
+registry = SessionRegistry(config.MAX_PLAY_SESSIONS, config.PLAY_IDLE_TIMEOUT)
+metrics.gauge('play_sessions', 'Browser play sessions open', lambda: len(registry.sessions))
+metrics.gauge('play_viewers', 'Frame and state streams currently open',
+              lambda: sum(session.viewers for session in list(registry.sessions.values())))
+play_blueprint = Blueprint('play', __name__)
+
+
+@play_blueprint.route('/play')
+def play_page():
+    """Browser client: canvas fed by the delta stream, batched input"""
+    return render_template_string(PLAY_HTML, width=config.WINDOW_WIDTH, height=config.WINDOW_HEIGHT)
+
+
+def open_session(options):
+    """Start a headless game session, returns (payload, HTTP status)"""
+    _ensure_pygame()
+    difficulty = options.get('difficulty', 'medium')
+    if difficulty not in config.DIFFICULTIES:
+        return {'success': False, 'error': f'unknown difficulty {difficulty}'}, 400
+    session = registry.create(difficulty, options.get('theme', 'classic'))
+    if session is None:
+        return {'success': False, 'error': 'too many active sessions'}, 429
+    return {
+        'success': True,
+        'session_id': session.id,
+        'stream': f'/api/play/{session.id}/stream',
+        'mjpeg': f'/api/play/{session.id}/mjpeg',
+        'events': f'/api/play/{session.id}/events',
+        'input': f'/api/play/{session.id}/input',
+    }, 200
+
+
+@play_blueprint.route('/api/play', methods=['POST'])
+def create_session():
+    """Start a headless game session"""
+    payload, code = open_session(request.get_json(silent=True) or {})
+    return jsonify(payload), code
+
+
+@play_blueprint.route('/api/play/<session_id>/stream')
+def delta_stream(session_id):
+    """Chunked stream of changed regions (header + PNG/JPEG per chunk)"""
+    session = registry.get(session_id)
+    if session is None:
+        return jsonify({'success': False, 'error': 'no such session'}), 404
+    image_format = 'jpg' if request.args.get('format') == 'jpeg' else 'png'
+    governor = FrameGovernor(max_fps=config.PLAY_MAX_FPS)
+    return Response(stream_frames(session, governor, image_format, multipart=False),
+                    mimetype='application/octet-stream',
+                    headers={'Cache-Control': 'no-store', 'X-Chunk-Header': 'x,y,w,h,len <HHHHI'})
+
+
+@play_blueprint.route('/api/play/<session_id>/mjpeg')
+def mjpeg_stream(session_id):
+    """Full frames as multipart MJPEG, for plain <img> clients"""
+    session = registry.get(session_id)
+    if session is None:
+        return jsonify({'success': False, 'error': 'no such session'}), 404
+    governor = FrameGovernor(max_fps=config.PLAY_MAX_FPS)
+    return Response(stream_frames(session, governor, 'jpg', multipart=True),
+                    mimetype='multipart/x-mixed-replace; boundary=frame',
+                    headers={'Cache-Control': 'no-store'})
+
+
+@play_blueprint.route('/api/play/<session_id>/events')
+def state_events(session_id):
+    """Server-Sent Events: keyframe then compact per-tick state deltas (see state_stream)"""
+    session = registry.get(session_id)
+    if session is None:
+        return jsonify({'success': False, 'error': 'no such session'}), 404
+    return Response(stream_state(session), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-store', 'X-Accel-Buffering': 'no'})
+
+
+@play_blueprint.route('/api/play/<session_id>/input', methods=['POST'])
+def send_input(session_id):
+    """Batch of input events: [{type: keydown|keyup|mousemove|click, key, x, y}]"""
+    session = registry.get(session_id)
+    if session is None:
+        return jsonify({'success': False, 'error': 'no such session'}), 404
+    payload = request.get_json(silent=True) or {}
+    session.queue_input(payload.get('events', []))
+    return jsonify({'success': True})
+
+
+@play_blueprint.route('/api/play/<session_id>', methods=['DELETE'])
+def close_session(session_id):
+    registry.close(session_id)
+    return jsonify({'success': True})
+
+
+PLAY_HTML = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Maze Game - Browser Play</title>
+    <style>
+        body { margin: 0; background: #14141e; display: flex; align-items: center;
+               justify-content: center; min-height: 100vh; font-family: sans-serif; color: #ccc; }
+        canvas { border: 2px solid #667eea; border-radius: 6px; }
+    </style>
+</head>
+<body>
+    <canvas id="screen" width="{{ width }}" height="{{ height }}" tabindex="0"></canvas>
+    <script>
+        const KEYS = {ArrowLeft: 'left', ArrowRight: 'right', ArrowUp: 'up', ArrowDown: 'down',
+                      a: 'a', d: 'd', w: 'w', s: 's', p: 'p', Escape: 'escape', r: 'r', m: 'm',
+                      g: 'g'};
+        const canvas = document.getElementById('screen');
+        const ctx = canvas.getContext('2d');
+        let pending = [];
+        let inputUrl = null;
+
+        function queue(event) { pending.push(event); }
+        setInterval(() => {
+            if (!inputUrl || !pending.length) return;
+            const events = pending; pending = [];
+            fetch(inputUrl, {method: 'POST', headers: {'Content-Type': 'application/json'},
+                             body: JSON.stringify({events})});
+        }, 50);
+
+        document.addEventListener('keydown', e => {
+            if (KEYS[e.key] && !e.repeat) { queue({type: 'keydown', key: KEYS[e.key]}); e.preventDefault(); }
+        });
+        document.addEventListener('keyup', e => {
+            if (KEYS[e.key]) { queue({type: 'keyup', key: KEYS[e.key]}); e.preventDefault(); }
+        });
+        canvas.addEventListener('mousemove', e => queue({type: 'mousemove', x: e.offsetX, y: e.offsetY}));
+        canvas.addEventListener('mousedown', e => queue({type: 'click', x: e.offsetX, y: e.offsetY}));
+
+        async function play() {
+            const session = await (await fetch('/api/play', {method: 'POST'})).json();
+            if (!session.success) { document.body.textContent = session.error; return; }
+            inputUrl = session.input;
+            const reader = (await fetch(session.stream)).body.getReader();
+            let buffer = new Uint8Array(0);
+            for (;;) {
+                const {value, done} = await reader.read();
+                if (done) break;
+                const merged = new Uint8Array(buffer.length + value.length);
+                merged.set(buffer); merged.set(value, buffer.length); buffer = merged;
+                while (buffer.length >= 12) {
+                    const view = new DataView(buffer.buffer, buffer.byteOffset);
+                    const x = view.getUint16(0, true), y = view.getUint16(2, true);
+                    const length = view.getUint32(8, true);
+                    if (buffer.length < 12 + length) break;
+                    const image = await createImageBitmap(new Blob([buffer.slice(12, 12 + length)]));
+                    ctx.drawImage(image, x, y);
+                    buffer = buffer.slice(12 + length);
+                }
+            }
+        }
+        canvas.focus();
+        play();
+    </script>
+</body>
+</html>
+"""
@@ -2,32 +2,63 @@
 Core game loop and state management with UI integration
 """
 
+import random
+import time
 import pygame
 import config
+import metrics
+import snapshot
+import terrain
+from contextlib import nullcontext
 from maze_generator import Maze
 from player import Player
 from ui import HUD, WinScreen, PauseMenu
 from themes import get_theme
 from powerups import PowerUpManager
 from enemies import EnemyManager
+from ghosts import GhostRace
+from key_puzzle import KeyPuzzle
 from audio import audio_manager
+from leaderboard import leaderboard
+from replay import Layout, Replay, ReplayRecorder
+from events import (EventBus, MoveEvent, CellEnteredEvent, PowerUpCollectedEvent,
+                    KeyCollectedEvent, EnemyHitEvent, WinEvent)
+
+
+# Movement keys mapped to the Player direction flag they drive
+MOVE_KEYS = {
+    'left_pressed': (pygame.K_LEFT, pygame.K_a),
+    'right_pressed': (pygame.K_RIGHT, pygame.K_d),
+    'up_pressed': (pygame.K_UP, pygame.K_w),
+    'down_pressed': (pygame.K_DOWN, pygame.K_s),
+}
+MOVEMENT_KEYS = frozenset(key for keys in MOVE_KEYS.values() for key in keys)
+
+TICK_SECONDS = metrics.histogram('game_tick_seconds', 'Game.update time per simulated tick').labels()
+FRAME_SECONDS = metrics.histogram('game_frame_seconds', 'Game.draw time per rendered frame').labels()
+
+# Shared no-op context used when no frame profiler is attached
+_NO_PROFILE = nullcontext()
 
 
 class Game:
     """Main game class managing game state and loop"""
     
-    def __init__(self, difficulty='medium', theme_name='classic', visual_style='lines'):
+    def __init__(self, difficulty='medium', theme_name='classic', visual_style='lines', seed=None, live=True,
+                 layout=None):
         self.difficulty = difficulty
         self.theme = get_theme(theme_name)
         self.difficulty_config = config.DIFFICULTIES[difficulty]
         self.visual_style = visual_style  # Now always 'lines' (tutorial design)
+        # Braid, terrain and keys: the difficulty's unless given (replays bring their own)
+        self.layout = layout or Layout.of_tier(self.difficulty_config)
         
-        # Initialize maze with difficulty settings
-        self.maze = Maze(
-            self.difficulty_config['width'],
-            self.difficulty_config['height']
-        )
-        self.maze.generate()
+        # Initialize maze with difficulty settings; the seed identifies the layout on the leaderboard
+        self._build_maze(seed)
+        # Enemy and power-up placement and patrols draw from a generator seeded
+        # alongside the maze, so a seed plus inputs replays a run exactly
+        self.rng = random.Random(f"{self.seed}:entities")
+        self.run_id = random.getrandbits(32)  # Tells this run's snapshots from other runs on the seed
         
         # Initialize player at entry position (pixel coordinates)
         tile = self.difficulty_config['cell_size']
@@ -35,6 +66,11 @@ class Game:
         entry_y = self.maze.entry.y * tile + tile // 3
         self.player = Player(entry_x, entry_y)
         
+        # Optional FrameProfiler timing each draw layer
+        self.profiler = None
+        self.quicksave = None  # F9 stores a snapshot, F10 returns to it
+        self.movement_changed = False  # A movement key changed while not playing, applied on resume
+        
         # Mouse navigation
         self.mouse_navigation_enabled = True
         self.last_mouse_pos = None
@@ -49,19 +85,54 @@ class Game:
         self.pause_menu = PauseMenu(self.theme)
         
         # Power-ups and enemies (enemies disabled by default for less frustration)
-        self.powerup_manager = PowerUpManager(self.maze, self.theme, difficulty)
-        self.enemy_manager = EnemyManager(self.maze, self.theme, difficulty)
+        self.powerup_manager = PowerUpManager(self.maze, self.theme, difficulty, self.rng)
+        self.enemy_manager = EnemyManager(self.maze, self.theme, difficulty, self.rng)
         self.enable_powerups = True
         self.enable_enemies = False  # Disabled by default - can enable in menu later
         
+        # Live games play sounds, record a replay and submit wins; replay
+        # playback runs the same simulation without side effects
+        self.live = live
+        self.recorder = ReplayRecorder(self) if live else None
+        self.ghosts = GhostRace.for_game(self) if live else GhostRace([])
+        
+        # Game events are queued during a tick and dispatched at its end
+        self.events = EventBus()
+        self._subscribe_events()
+        self.tick = 0
+        self.current_cell = (self.maze.entry.x, self.maze.entry.y)
+        
         # Start HUD timer
         self.hud.start()
-        
-    def reset(self, difficulty=None, theme_name=None, visual_style=None):
-        """Reset game to initial state"""
+    
+    def _build_maze(self, seed=None):
+        """The seed's maze, or the best of several fresh candidates for this difficulty
+        (scored before braiding), with the layout's share of dead ends braided, of cells
+        painted with terrain, and its key colours' doors and keys placed"""
+        width, height = self.difficulty_config['width'], self.difficulty_config['height']
+        if seed is None:
+            self.maze = Maze.select(width, height, config.MAZE_SELECTION_BANDS[self.difficulty])
+            self.seed = self.maze.seed
+        else:
+            self.seed = seed
+            self.maze = Maze(width, height, seed=seed)
+            self.maze.generate()
+        braid, share, keys = self.layout
+        if braid:
+            self.maze.braid(braid)
+        if share:
+            self.maze.paint_terrain(share)
+        self.puzzle = KeyPuzzle.place(self.maze, keys) if keys else None
+        self.keys_held = 0  # Bit per key colour picked up
+    
+    def reset(self, difficulty=None, theme_name=None, visual_style=None, seed=None, layout=None):
+        """Reset game to initial state (a new difficulty brings its own layout unless one is given)"""
         if difficulty:
             self.difficulty = difficulty
             self.difficulty_config = config.DIFFICULTIES[difficulty]
+            self.layout = Layout.of_tier(self.difficulty_config)
+        if layout:
+            self.layout = layout
         
         if theme_name:
             self.theme = get_theme(theme_name)
@@ -72,12 +143,10 @@ class Game:
             self.win_screen.update_theme(self.theme)
             self.pause_menu.update_theme(self.theme)
         
-        # Regenerate maze
-        self.maze = Maze(
-            self.difficulty_config['width'],
-            self.difficulty_config['height']
-        )
-        self.maze.generate()
+        # Regenerate maze (a fresh layout unless a seed is given)
+        self._build_maze(seed)
+        self.rng = random.Random(f"{self.seed}:entities")
+        self.run_id = random.getrandbits(32)
         
         # Reset player at entry position (pixel coordinates)
         tile = self.difficulty_config['cell_size']
@@ -91,6 +160,12 @@ class Game:
         # Reset state
         self.won = False
         self.state = config.STATE_PLAYING
+        self.events.clear()
+        self.tick = 0
+        self.current_cell = (self.maze.entry.x, self.maze.entry.y)
+        if self.live:
+            self.recorder = ReplayRecorder(self)
+            self.ghosts = GhostRace.for_game(self)
         
         # Reset HUD
         self.hud.reset()
@@ -98,26 +173,74 @@ class Game:
         
         # Reset power-ups and enemies
         if self.enable_powerups:
-            self.powerup_manager = PowerUpManager(self.maze, self.theme, self.difficulty)
+            self.powerup_manager = PowerUpManager(self.maze, self.theme, self.difficulty, self.rng)
         if self.enable_enemies:
-            self.enemy_manager = EnemyManager(self.maze, self.theme, self.difficulty)
+            self.enemy_manager = EnemyManager(self.maze, self.theme, self.difficulty, self.rng)
         # Note: Enemies are disabled by default - they reset you to start on collision
     
+    def snapshot(self) -> bytes:
+        """Compact blob of the simulation state, for checkpoints and quick-save"""
+        return snapshot.pack(self)
+    
+    def restore(self, data: bytes):
+        """Return to a snapshot (regenerating its maze first if it was taken on another seed or layout)"""
+        seed, difficulty, enemies, powerups, run_id, layout = snapshot.read_options(data)
+        same_run = run_id == self.run_id
+        if seed != self.seed or difficulty != self.difficulty or layout != self.layout:
+            self.enable_enemies, self.enable_powerups = enemies, powerups
+            self.reset(difficulty=difficulty, seed=seed, layout=layout)
+        snapshot.unpack(self, data)
+        if self.recorder:
+            if same_run:
+                # Inputs before the snapshot are unchanged, later ones are undone
+                self.recorder.truncate(self.tick)
+            else:
+                # Another run's state cannot be replayed from this run's inputs
+                self.recorder = None
+        if self.ghosts:
+            self.ghosts.seek(self.tick)
+    
     def update(self):
         """Update game state"""
         if self.state != config.STATE_PLAYING:
             return
         
+        started = time.perf_counter()
+        if self.recorder:
+            # Held directions at the start of the tick are the only input the simulation reads
+            self.recorder.record(self.player)
+        self.tick += 1
+        self._step()
+        self.ghosts.step()
+        # Deliver this tick's events to audio, HUD and any other subscribers
+        self.events.dispatch()
+        TICK_SECONDS.observe(time.perf_counter() - started)
+    
+    def _step(self):
+        """Advance the simulation by one tick, publishing game events"""
         # Update player movement (pixel-based)
         tile = self.difficulty_config['cell_size']
+        terrain.pace(self.maze, self.player, tile)
+        locked = self.puzzle.locked(self.keys_held) if self.puzzle else None
         self.player.check_move(tile, self.maze.grid_cells, self.maze.thickness, 
-                              self.maze.width, self.maze.height)
+                              self.maze.width, self.maze.height, locked)
         self.player.update()
         
         # Track movement for HUD
+        player_pos = self.player.get_position()
+        player_cell_x = int(player_pos[0] // tile)
+        player_cell_y = int(player_pos[1] // tile)
         if self.player.velX != 0 or self.player.velY != 0:
-            self.hud.increment_move()
-            audio_manager.play_sound('move', 0.1)
+            self.events.publish(MoveEvent(self.tick, player_pos[0], player_pos[1]))
+            if (player_cell_x, player_cell_y) != self.current_cell:
+                self.current_cell = (player_cell_x, player_cell_y)
+                self.events.publish(CellEnteredEvent(self.tick, player_cell_x, player_cell_y))
+                if self.puzzle:
+                    held = self.puzzle.pick_up(self.keys_held, player_cell_x, player_cell_y)
+                    if held != self.keys_held:
+                        colour = (held ^ self.keys_held).bit_length() - 1
+                        self.keys_held = held
+                        self.events.publish(KeyCollectedEvent(self.tick, colour, player_cell_x, player_cell_y))
         
         # Update enemies
         if self.enable_enemies:
@@ -126,68 +249,87 @@ class Game:
         # Update power-ups
         if self.enable_powerups:
             self.powerup_manager.update()
-            # Apply time bonus if any
-            time_bonus = self.powerup_manager.get_time_bonus()
-            if time_bonus > 0:
-                # Add time bonus (subtract from elapsed time)
-                import time
-                if self.hud.start_time:
-                    self.hud.start_time -= time_bonus
         
         # Check enemy collision (only if enemies are enabled)
         if self.enable_enemies:
-            player_pos = self.player.get_position()
-            # Convert player pixel position to cell coordinates for collision check
-            player_cell_x = int(player_pos[0] // tile)
-            player_cell_y = int(player_pos[1] // tile)
             if self.enemy_manager.check_collisions(player_cell_x, player_cell_y):
                 # Reset to entry on collision with enemy
                 entry_x = self.maze.entry.x * tile + tile // 3
                 entry_y = self.maze.entry.y * tile + tile // 3
                 self.player.set_position(entry_x, entry_y)
-                audio_manager.play_sound('hit', 0.6)
+                self.current_cell = (self.maze.entry.x, self.maze.entry.y)
+                self.events.publish(EnemyHitEvent(self.tick, player_cell_x, player_cell_y))
                 return
         
-        # Check power-up collection (convert pixel coords to cell coords)
+        # Check power-up collection
         if self.enable_powerups:
-            player_pos = self.player.get_position()
-            player_cell_x = int(player_pos[0] // tile)
-            player_cell_y = int(player_pos[1] // tile)
             powerup_type = self.powerup_manager.check_collections(player_cell_x, player_cell_y)
             if powerup_type:
-                audio_manager.play_sound('powerup', 0.5)
+                self.events.publish(PowerUpCollectedEvent(
+                    self.tick, powerup_type, player_cell_x, player_cell_y))
         
         # Check win condition - check if player reached exit cell
-        player_pos = self.player.get_position()
-        exit_cell_x = self.maze.exit.x * tile
-        exit_cell_y = self.maze.exit.y * tile
-        if (exit_cell_x <= player_pos[0] < exit_cell_x + tile and 
-            exit_cell_y <= player_pos[1] < exit_cell_y + tile):
+        if (player_cell_x, player_cell_y) == (self.maze.exit.x, self.maze.exit.y):
             self.won = True
             self.state = config.STATE_WON
-            # Set win screen stats
-            self.win_screen.set_stats(self.hud.get_time(), self.hud.move_count)
-            # Play win sound
-            audio_manager.play_sound('win', 0.7)
+            self.events.publish(WinEvent(self.tick, self.hud.get_time()))
+    
+    def _subscribe_events(self):
+        """Wire HUD, audio and win screen to the event bus"""
+        self.events.subscribe(MoveEvent, self._on_moves)
+        self.events.subscribe(PowerUpCollectedEvent, self._on_powerups)
+        self.events.subscribe(WinEvent, self._on_win, coalesce=True)
+        if not self.live:
+            return
+        # One move sound per cell entered rather than one per frame
+        self.events.subscribe(CellEnteredEvent,
+                              lambda events: audio_manager.play_sound('move', 0.1),
+                              coalesce=True)
+        self.events.subscribe(EnemyHitEvent,
+                              lambda events: audio_manager.play_sound('hit', 0.6),
+                              coalesce=True)
+        self.events.subscribe(KeyCollectedEvent,
+                              lambda events: audio_manager.play_sound('powerup', 0.5),
+                              coalesce=True)
+    
+    def _on_moves(self, events):
+        """Count one move per frame the player moved"""
+        self.hud.increment_move(len(events))
+    
+    def _on_powerups(self, events):
+        """Play pickup sound and apply any time bonus"""
+        if self.live:
+            audio_manager.play_sound('powerup', 0.5)
+        if any(event.power_type == 'time' for event in events):
+            # Add time bonus (subtract from elapsed time)
+            time_bonus = self.powerup_manager.get_time_bonus()
+            if self.hud.start_time:
+                self.hud.start_time -= time_bonus
+    
+    def _on_win(self, events):
+        """Show final stats, queue the run for the leaderboard and play the win sound"""
+        # Move events of the winning tick were dispatched first, so the
+        # HUD count is final here
+        self.win_screen.set_stats(events[-1].time, self.hud.move_count)
+        if not self.live:
+            return
+        if self.recorder:
+            replay = self.recorder.finish(self, events[-1].time).to_bytes()
+            leaderboard.submit(self.seed, self.difficulty, events[-1].time, self.hud.move_count,
+                               Replay.hash_of(replay), replay)
+        else:
+            leaderboard.submit(self.seed, self.difficulty, events[-1].time, self.hud.move_count)
+        audio_manager.play_sound('win', 0.7)
     
     def handle_key(self, key):
-        """Handle keyboard input"""
+        """Handle keyboard input other than movement, which apply_input reads from the held keys"""
         if self.state == config.STATE_PLAYING:
-            if key == pygame.K_LEFT or key == pygame.K_a:
-                self.player.left_pressed = True
-            elif key == pygame.K_RIGHT or key == pygame.K_d:
-                self.player.right_pressed = True
-            elif key == pygame.K_UP or key == pygame.K_w:
-                self.player.up_pressed = True
-            elif key == pygame.K_DOWN or key == pygame.K_s:
-                self.player.down_pressed = True
-            elif key == pygame.K_p or key == pygame.K_ESCAPE:
+            if key == pygame.K_p or key == pygame.K_ESCAPE:
                 self.state = config.STATE_PAUSED
-            
-            # Check movement against walls
-            tile = self.difficulty_config['cell_size']
-            self.player.check_move(tile, self.maze.grid_cells, self.maze.thickness, 
-                                  self.maze.width, self.maze.height)
+            elif key == pygame.K_F9:
+                self.quicksave = self.snapshot()
+            elif key == pygame.K_F10 and self.quicksave:
+                self.restore(self.quicksave)
         
         elif self.state == config.STATE_PAUSED:
             if key == pygame.K_p or key == pygame.K_ESCAPE:
@@ -196,25 +338,30 @@ class Game:
         elif self.state == config.STATE_WON:
             if key == pygame.K_r:
                 return 'restart'
+            elif key == pygame.K_g:
+                return 'race'
             elif key == pygame.K_m:
                 return 'menu'
     
-    def handle_key_up(self, key):
-        """Handle key release events"""
-        if self.state == config.STATE_PLAYING:
-            if key == pygame.K_LEFT or key == pygame.K_a:
-                self.player.left_pressed = False
-            elif key == pygame.K_RIGHT or key == pygame.K_d:
-                self.player.right_pressed = False
-            elif key == pygame.K_UP or key == pygame.K_w:
-                self.player.up_pressed = False
-            elif key == pygame.K_DOWN or key == pygame.K_s:
-                self.player.down_pressed = False
+    def apply_input(self, input_state):
+        """Consume the coalesced input state once per tick"""
+        self.movement_changed |= not MOVEMENT_KEYS.isdisjoint(input_state.changed_keys)
+        if self.state == config.STATE_PLAYING and self.movement_changed:
+            # Direction flags follow the held keys; mouse navigation keeps
+            # control until a movement key is pressed or released
+            self.movement_changed = False
+            held = input_state.held_keys
+            for flag, keys in MOVE_KEYS.items():
+                setattr(self.player, flag, any(key in held for key in keys))
             
-            # Check movement against walls
             tile = self.difficulty_config['cell_size']
+            locked = self.puzzle.locked(self.keys_held) if self.puzzle else None
             self.player.check_move(tile, self.maze.grid_cells, self.maze.thickness, 
-                                  self.maze.width, self.maze.height)
+                                  self.maze.width, self.maze.height, locked)
+        
+        if input_state.mouse_moved:
+            return self.handle_mouse(input_state.motion_event())
+        return None
     
     def handle_mouse(self, event):
         """Handle mouse events for UI and navigation"""
@@ -281,8 +428,17 @@ class Game:
         
         self.last_mouse_pos = mouse_pos
     
+    def _layer(self, name):
+        """Profiler section for one draw layer (no-op without a profiler)"""
+        return self.profiler.section(name) if self.profiler else _NO_PROFILE
+    
     def draw(self, screen: pygame.Surface):
         """Draw game to screen"""
+        started = time.perf_counter()
+        self._draw_layers(screen)
+        FRAME_SECONDS.observe(time.perf_counter() - started)
+    
+    def _draw_layers(self, screen: pygame.Surface):
         tile = self.difficulty_config['cell_size']
         
         # Calculate offset to center maze
@@ -291,47 +447,85 @@ class Game:
         offset_x = (config.WINDOW_WIDTH - maze_pixel_width) // 2
         offset_y = (config.WINDOW_HEIGHT - maze_pixel_height) // 2
         
-        # Draw background
-        screen.fill(self.theme['background'])
-        
-        # Draw maze - use cell.draw() for walls
-        wall_color = self.theme['wall']
-        for cell in self.maze.grid_cells:
-            cell.draw(screen, tile, wall_color, offset_x, offset_y)
-        
-        # Draw exit (goal point) at exit cell
-        exit_x = offset_x + self.maze.exit.x * tile
-        exit_y = offset_y + self.maze.exit.y * tile
-        exit_rect = pygame.Rect(
-            exit_x + tile // 4,
-            exit_y + tile // 4,
-            tile // 2,
-            tile // 2
-        )
-        pygame.draw.rect(screen, self.theme['exit'], exit_rect)
-        # Add glow effect
-        pygame.draw.rect(screen, (255, 255, 200), exit_rect, 2)
+        with self._layer('draw.maze'):
+            # Draw background
+            screen.fill(self.theme['background'])
+            terrain.draw(screen, self.maze, tile, offset_x, offset_y)
+            
+            # Draw maze - use cell.draw() for walls
+            wall_color = self.theme['wall']
+            for cell in self.maze.grid_cells:
+                cell.draw(screen, tile, wall_color, offset_x, offset_y)
+            if self.puzzle:
+                self.puzzle.draw(screen, tile, offset_x, offset_y, self.keys_held)
+            
+            # Draw exit (goal point) at exit cell
+            exit_x = offset_x + self.maze.exit.x * tile
+            exit_y = offset_y + self.maze.exit.y * tile
+            exit_rect = pygame.Rect(
+                exit_x + tile // 4,
+                exit_y + tile // 4,
+                tile // 2,
+                tile // 2
+            )
+            pygame.draw.rect(screen, self.theme['exit'], exit_rect)
+            # Add glow effect
+            pygame.draw.rect(screen, (255, 255, 200), exit_rect, 2)
         
         # Draw hint path if active
         if self.enable_powerups and self.powerup_manager.has_hint():
-            player_pos = self.player.get_position()
-            # Convert player pixel pos to cell pos for hint path
-            player_cell_x = int(player_pos[0] // tile)
-            player_cell_y = int(player_pos[1] // tile)
-            exit_cell_pos = (self.maze.exit.x, self.maze.exit.y)
-            self.powerup_manager.draw_hint_path(
-                screen, tile, offset_x, offset_y,
-                (player_cell_x, player_cell_y), exit_cell_pos
-            )
+            with self._layer('draw.hint'):
+                player_pos = self.player.get_position()
+                # Convert player pixel pos to cell pos for hint path
+                player_cell_x = int(player_pos[0] // tile)
+                player_cell_y = int(player_pos[1] // tile)
+                exit_cell_pos = (self.maze.exit.x, self.maze.exit.y)
+                passages = None
+                if self.puzzle:
+                    # Lead to the next key needed while doors stand in the way
+                    exit_cell_pos = self.puzzle.next_goal((player_cell_x, player_cell_y), self.keys_held)
+                    passages = self.puzzle.passages(self.keys_held)
+                self.powerup_manager.draw_hint_path(
+                    screen, tile, offset_x, offset_y,
+                    (player_cell_x, player_cell_y), exit_cell_pos, passages
+                )
         
         # Draw power-ups
         if self.enable_powerups:
-            self.powerup_manager.draw(screen, tile, offset_x, offset_y)
+            with self._layer('draw.powerups'):
+                self.powerup_manager.draw(screen, tile, offset_x, offset_y)
         
         # Draw enemies
         if self.enable_enemies:
-            self.enemy_manager.draw(screen, tile, offset_x, offset_y)
+            with self._layer('draw.enemies'):
+                self.enemy_manager.draw(screen, tile, offset_x, offset_y)
+        
+        if self.ghosts:
+            with self._layer('draw.ghosts'):
+                self.ghosts.draw(screen, self.theme['player'], offset_x, offset_y)
         
+        with self._layer('draw.player'):
+            self._draw_player(screen, offset_x, offset_y)
+        
+        with self._layer('draw.ui'):
+            # Draw HUD
+            if self.state == config.STATE_PLAYING:
+                self.hud.draw(screen)
+            
+            # Draw pause menu
+            if self.state == config.STATE_PAUSED:
+                self.pause_menu.draw(screen)
+            
+            # Draw win screen
+            if self.state == config.STATE_WON:
+                self.win_screen.draw(screen)
+            
+            # Frame profiler overlay
+            if self.profiler and self.profiler.overlay_visible:
+                self.hud.draw_profiler(screen, self.profiler)
+    
+    def _draw_player(self, screen: pygame.Surface, offset_x: int, offset_y: int):
+        """Draw the player with shadow, speed-boost tint and highlight"""
         # Draw player at pixel coordinates (with offset)
         player_screen_x = offset_x + self.player.x
         player_screen_y = offset_y + self.player.y
@@ -367,16 +561,3 @@ class Game:
             self.player.player_size + 4
         )
         pygame.draw.rect(screen, (255, 255, 255, 100), highlight_rect, 2)
-        
-        # Draw HUD
-        if self.state == config.STATE_PLAYING:
-            self.hud.draw(screen)
-        
-        # Draw pause menu
-        if self.state == config.STATE_PAUSED:
-            self.pause_menu.draw(screen)
-        
-        # Draw win screen
-        if self.state == config.STATE_WON:
-            self.win_screen.draw(screen)
-
@@ -0,0 +1,184 @@
+"""
+Ghost racing
+Ghosts re-run the leaderboard's best replays for the current seed alongside
+the live game. Each one walks its replay's encoded input runs lazily (one run
+decoded at a time, never a per-tick array) and moves its own Player through
+the shared maze; replays recorded with enemies also re-run a private enemy
+patrol so resets to the entry happen where they did. Every
+GHOST_CHECKPOINT_INTERVAL ticks a ghost saves its state, so a seek (F10 restore,
+replay scrubbing) re-steps from the nearest checkpoint instead of tick 0.
+"""
+
+import random
+from itertools import islice
+from typing import Dict, List, Tuple
+
+import pygame
+
+import config
+import terrain
+from assets import get_sprite
+from enemies import EnemyManager
+from leaderboard import leaderboard
+from player import Player
+from powerups import PowerUpManager
+from replay import apply_flags, iter_runs, read_header
+
+
+# Opacity of the fastest ghost; slower ones fade towards GHOST_MIN_ALPHA
+GHOST_MAX_ALPHA = 140
+GHOST_MIN_ALPHA = 50
+
+
+def ghost_sprite(color, size: int, alpha: int) -> pygame.Surface:
+    """Cached translucent player square"""
+    def build():
+        sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+        sprite.fill((*color[:3], alpha))
+        pygame.draw.rect(sprite, (255, 255, 255, alpha), sprite.get_rect(), 1)
+        return sprite
+    return get_sprite(('ghost', tuple(color[:3]), size, alpha), build)
+
+
+class Ghost:
+    """One replay stepped in lockstep with the live game"""
+    
+    def __init__(self, data: bytes, game, alpha: int):
+        self.data = data
+        self.game = game
+        self.alpha = alpha
+        self.maze = game.maze
+        self.tile = game.difficulty_config['cell_size']
+        self.entry = (self.maze.entry.x * self.tile + self.tile // 3,
+                      self.maze.entry.y * self.tile + self.tile // 3)
+        self.player = Player(*self.entry)
+        self.rewind()
+        self.checkpoints: Dict[int, Tuple] = {0: self.checkpoint()}
+    
+    def rewind(self):
+        """Back to the start of the replay"""
+        seed, _, enemies, _, _, _, _, _ = read_header(self.data)
+        self.runs = iter_runs(self.data)
+        self.runs_read = 0
+        self.tick = 0
+        self.bits = 0
+        self.remaining = 0
+        self.finished = False
+        self.player.set_position(*self.entry)
+        self.keys_held = 0  # The ghost's own keys: doors it opened stay shut for the player
+        self.rng = None
+        self.enemy_manager = None
+        if enemies:
+            # Same spawn order as Game.__init__, so the patrol matches the recording
+            game = self.game
+            self.rng = random.Random(f"{seed}:entities")
+            PowerUpManager(self.maze, game.theme, game.difficulty, self.rng)
+            self.enemy_manager = EnemyManager(self.maze, game.theme, game.difficulty, self.rng)
+    
+    def checkpoint(self) -> Tuple:
+        """Everything step() changes, to hand back to restore()"""
+        player = self.player
+        enemies = None
+        if self.enemy_manager is not None:
+            enemies = ([(enemy.x, enemy.y, enemy.direction, enemy.move_timer) for enemy in self.enemy_manager.enemies],
+                       self.rng.getstate())
+        return (self.tick, self.runs_read, self.bits, self.remaining, self.finished, self.keys_held,
+                (player.x, player.y, player.velX, player.velY, player.speed), enemies)
+    
+    def restore(self, state: Tuple):
+        """Back to a checkpoint; the input runs are re-read up to where it was, which is
+        a few bytes per run rather than a simulation step per tick"""
+        self.tick, self.runs_read, self.bits, self.remaining, self.finished, self.keys_held, player, enemies = state
+        self.runs = iter_runs(self.data)
+        for _ in islice(self.runs, self.runs_read):
+            pass
+        x, y, self.player.velX, self.player.velY, self.player.speed = player
+        self.player.set_position(x, y)
+        if enemies is not None:
+            positions, rng_state = enemies
+            for enemy, (ex, ey, direction, move_timer) in zip(self.enemy_manager.enemies, positions):
+                enemy.x, enemy.y, enemy.direction, enemy.move_timer = ex, ey, direction, move_timer
+            self.rng.setstate(rng_state)
+    
+    def seek(self, tick: int):
+        """Put the ghost where it was after tick ticks, from the nearest earlier checkpoint when
+        going backwards or far ahead"""
+        start = max(t for t in self.checkpoints if t <= tick)
+        if tick < self.tick or start > self.tick:
+            self.restore(self.checkpoints[start])
+        while self.tick < tick and not self.finished:
+            self.step()
+        self.tick = max(self.tick, tick)  # A finished ghost stays at the exit
+    
+    def step(self):
+        """Advance one tick along the replay"""
+        self.tick += 1
+        if self.finished:
+            return
+        if not self.remaining:
+            try:
+                self.bits, self.remaining = next(self.runs)
+                self.runs_read += 1
+            except (StopIteration, ValueError):
+                # Out of inputs: the ghost has reached the exit and stays there
+                self.finished = True
+                return
+        self.remaining -= 1
+        
+        player, maze = self.player, self.maze
+        apply_flags(player, self.bits)
+        terrain.pace(maze, player, self.tile)
+        puzzle = self.game.puzzle
+        locked = puzzle.locked(self.keys_held) if puzzle else None
+        player.check_move(self.tile, maze.grid_cells, maze.thickness, maze.width, maze.height, locked)
+        player.update()
+        if puzzle:
+            self.keys_held = puzzle.pick_up(self.keys_held, int(player.x // self.tile), int(player.y // self.tile))
+        if self.enemy_manager is not None:
+            self.enemy_manager.update()
+            if self.enemy_manager.check_collisions(int(player.x // self.tile), int(player.y // self.tile)):
+                player.set_position(*self.entry)
+        if self.tick % config.GHOST_CHECKPOINT_INTERVAL == 0 and self.tick not in self.checkpoints:
+            self.checkpoints[self.tick] = self.checkpoint()
+
+
+class GhostRace:
+    """The ghosts racing the current game, drawn under the player"""
+    
+    def __init__(self, ghosts: List[Ghost]):
+        self.ghosts = ghosts
+    
+    @classmethod
+    def for_game(cls, game, limit: int = config.GHOST_COUNT) -> 'GhostRace':
+        """Top runs on the game's seed, difficulty and layout from the leaderboard"""
+        ghosts = []
+        if limit and leaderboard.enabled:
+            try:
+                runs, _ = leaderboard.top(game.difficulty, game.seed, limit)
+                for rank, run in enumerate(runs):
+                    data = run['replay_hash'] and leaderboard.replay(run['replay_hash'])
+                    # A run on another braid, terrain or key layout walked a different maze
+                    if data and read_header(data)[7] == game.layout:
+                        alpha = GHOST_MAX_ALPHA - (GHOST_MAX_ALPHA - GHOST_MIN_ALPHA) * rank // max(1, limit - 1)
+                        ghosts.append(Ghost(data, game, alpha))
+            except Exception as e:
+                print(f"Warning: could not load ghosts: {e}")
+        return cls(ghosts)
+    
+    def __len__(self):
+        return len(self.ghosts)
+    
+    def step(self):
+        for ghost in self.ghosts:
+            ghost.step()
+    
+    def seek(self, tick: int):
+        """Put every ghost where it was after tick ticks (after the game is rewound or restored)"""
+        for ghost in self.ghosts:
+            ghost.seek(tick)
+    
+    def draw(self, screen: pygame.Surface, color, offset_x: int, offset_y: int):
+        # Slowest first so the leader is drawn on top
+        for ghost in reversed(self.ghosts):
+            sprite = ghost_sprite(color, ghost.player.player_size, ghost.alpha)
+            screen.blit(sprite, (offset_x + int(ghost.player.x), offset_y + int(ghost.player.y)))
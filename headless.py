@@ -0,0 +1,25 @@
+"""
+Headless pygame setup for benchmarks, servers and batch tools
+Import this before any game module so SDL picks up the dummy drivers
+"""
+
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+
+
+def init_headless(audio: bool = False):
+    """Initialize pygame without a window; sound effects stay off unless asked for,
+    scripted runs never reach the leaderboard and mazes skip best-of-N selection"""
+    pygame.init()
+    if not audio:
+        from audio import audio_manager
+        audio_manager.enabled = False
+    from leaderboard import leaderboard
+    leaderboard.enabled = False
+    from maze_selection import selector
+    selector.enabled = False
@@ -0,0 +1,70 @@
+"""
+Per-frame input coalescing
+Collapses each frame's raw pygame events into a single input state that the
+game consumes once per tick
+"""
+
+import pygame
+from typing import Optional, Set, Tuple
+
+
+# Event types the game reacts to - everything else is blocked at the SDL queue
+ALLOWED_EVENTS = [
+    pygame.QUIT,
+    pygame.KEYDOWN,
+    pygame.KEYUP,
+    pygame.MOUSEMOTION,
+    pygame.MOUSEBUTTONDOWN,
+]
+
+
+def install_event_filter(allowed=None):
+    """Only let SDL queue the event types we actually handle"""
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed(allowed or ALLOWED_EVENTS)
+
+
+class InputState:
+    """Coalesced input for a single frame"""
+    
+    def __init__(self):
+        self.mouse_pos: Optional[Tuple[int, int]] = None
+        self.mouse_moved = False
+        self.motion_count = 0  # Raw MOUSEMOTION events folded into this frame
+        self.held_keys: Set[int] = set()
+        self.changed_keys: Set[int] = set()  # Pressed or released this frame
+    
+    def motion_event(self):
+        """Build a single MOUSEMOTION event carrying the latest position"""
+        return pygame.event.Event(pygame.MOUSEMOTION, pos=self.mouse_pos)
+
+
+class InputCollector:
+    """Folds a frame's worth of events into an InputState"""
+    
+    def __init__(self):
+        self.state = InputState()
+    
+    def begin_frame(self):
+        """Clear per-frame flags; held keys and mouse position carry over"""
+        self.state.mouse_moved = False
+        self.state.motion_count = 0
+        self.state.changed_keys.clear()
+    
+    def process(self, event) -> bool:
+        """Record an event, returns True if it was coalesced and needs no other handling"""
+        if event.type == pygame.MOUSEMOTION:
+            self.state.mouse_pos = event.pos
+            self.state.mouse_moved = True
+            self.state.motion_count += 1
+            return True
+        
+        if event.type == pygame.KEYDOWN:
+            if event.key not in self.state.held_keys:
+                self.state.held_keys.add(event.key)
+                self.state.changed_keys.add(event.key)
+        elif event.type == pygame.KEYUP:
+            if event.key in self.state.held_keys:
+                self.state.held_keys.discard(event.key)
+                self.state.changed_keys.add(event.key)
+        return False
@@ -0,0 +1,284 @@
+"""
+Keys-and-doors puzzles
+A puzzle locks some passages with coloured doors and leaves one key of each
+colour in the maze; a key opens every door of its colour for the rest of the
+game. KeyPuzzle.place puts the doors on bridges of the entry-to-exit route
+(passages with no way around them, however braided the maze) and only hands
+out layouts its solver has solved and that need every key.
+
+The solver is a breadth-first search over (cell, keys held) states. With k
+key colours a state is the integer cell * 2^k + mask, so visited states are a
+bitset of cells * 2^k bits (32 KB for a 1000-cell maze with all 8 colours).
+Finding the route as well keeps 4 bits per state: the step that reached it
+and whether it picked up a key.
+
+    puzzle = KeyPuzzle.place(maze, 4)
+    puzzle.solution.moves, puzzle.solution.order
+"""
+
+import random
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import pygame
+
+from maze_generator import WALL_BITS
+from pathfinding import Cell, bidirectional_bfs, bridge_bits, passage_bits
+
+MAX_KEYS = 8
+PLACE_ATTEMPTS = 20  # Door and key samples tried before place gives up
+KEY_COLORS = [(230, 60, 60), (60, 140, 240), (60, 200, 90), (240, 200, 40),
+              (180, 80, 220), (240, 130, 30), (40, 210, 210), (240, 240, 240)]
+
+# Sides are numbered up, right, down, left
+SIDE_BITS = (WALL_BITS['top'], WALL_BITS['right'], WALL_BITS['bottom'], WALL_BITS['left'])
+
+
+def _offsets(width: int) -> Tuple[int, int, int, int]:
+    """Cell index step per side"""
+    return -width, 1, width, -1
+
+
+class Solution(NamedTuple):
+    """Fewest cell steps from the start to the exit, the key colours in pickup
+    order and the cells walked (start included; both empty unless the route was
+    asked for), and how many states the search visited"""
+    moves: int
+    order: List[int]
+    path: List[Cell]
+    states: int
+
+
+class KeyPuzzle:
+    """Key and door placement on one maze"""
+    
+    def __init__(self, maze, keys: List[int], doors: Dict[Tuple[int, int], int]):
+        """keys[colour] is the cell index holding that key; doors maps
+        (cell index, side 0-3) to a colour, one entry per side"""
+        if len(keys) > MAX_KEYS:
+            raise ValueError(f"at most {MAX_KEYS} key colours, got {len(keys)}")
+        self.maze = maze
+        self.keys = keys
+        self.doors = doors
+        cells = maze.width * maze.height
+        self.key_at = bytearray(cells)  # Colour + 1, 0 for no key
+        for colour, cell in enumerate(keys):
+            self.key_at[cell] = colour + 1
+        self.door_at = bytearray(cells * 4)  # Colour + 1 per cell side, 0 for no door
+        for (cell, side), colour in doors.items():
+            self.door_at[cell * 4 + side] = colour + 1
+        self.open_passages = passage_bits(maze)
+        self._locked: Dict[int, bytes] = {}
+        self._passages: Dict[int, bytes] = {}
+        self._goals: Dict[int, Cell] = {}
+        self.solution: Optional[Solution] = None
+    
+    @property
+    def colours(self) -> int:
+        return len(self.keys)
+    
+    def pick_up(self, mask: int, x: int, y: int) -> int:
+        """Keys held after stepping onto (x, y)"""
+        colour = self.key_at[x + y * self.maze.width]
+        return mask | 1 << colour - 1 if colour else mask
+    
+    def locked(self, mask: int) -> bytes:
+        """Per cell, the WALL_BITS of sides whose door is still locked with these keys"""
+        locked = self._locked.get(mask)
+        if locked is None:
+            bits = bytearray(len(self.key_at))
+            for (cell, side), colour in self.doors.items():
+                if not mask >> colour & 1:
+                    bits[cell] |= SIDE_BITS[side]
+            locked = self._locked[mask] = bytes(bits)
+        return locked
+    
+    def passages(self, mask: int) -> bytes:
+        """passage_bits with the doors these keys cannot open closed"""
+        passages = self._passages.get(mask)
+        if passages is None:
+            passages = self._passages[mask] = bytes(
+                bits & ~locked for bits, locked in zip(self.open_passages, self.locked(mask)))
+        return passages
+    
+    def solve(self, start: Optional[Cell] = None, mask: int = 0, path: bool = True) -> Optional[Solution]:
+        """Fewest steps from start (default the entry) holding mask to the exit, None if
+        the exit cannot be reached; path=False skips the route and its 4 bits per state"""
+        maze, k = self.maze, self.colours
+        width, cells = maze.width, maze.width * maze.height
+        start = start or (maze.entry.x, maze.entry.y)
+        target = maze.exit.x + maze.exit.y * width
+        passages, door_at, key_at = self.open_passages, self.door_at, self.key_at
+        steps = tuple(zip(SIDE_BITS, _offsets(width)))
+        full = (1 << k) - 1
+        
+        source_cell = start[0] + start[1] * width
+        source = source_cell << k | self.pick_up(mask, *start)
+        visited = bytearray(((cells << k) + 7) >> 3)
+        visited[source >> 3] |= 1 << (source & 7)
+        # Per state: side stepped through + 1 (1-4), plus 8 if the step picked up a key
+        came = bytearray(((cells << k) + 1) >> 1) if path else None
+        frontier, moves, seen = [source], 0, 1
+        while frontier:
+            next_frontier = []
+            for state in frontier:
+                cell = state >> k
+                if cell == target:
+                    return self._solution(state, source, moves, seen, came)
+                held = state & full
+                bits, doors = passages[cell], cell * 4
+                for side, (bit, offset) in enumerate(steps):
+                    if not bits & bit:
+                        continue
+                    colour = door_at[doors + side]
+                    if colour and not held >> colour - 1 & 1:
+                        continue  # Locked for these keys
+                    neighbour = cell + offset
+                    key = key_at[neighbour]
+                    after = held | 1 << key - 1 if key else held
+                    reached = neighbour << k | after
+                    if visited[reached >> 3] >> (reached & 7) & 1:
+                        continue
+                    visited[reached >> 3] |= 1 << (reached & 7)
+                    if came is not None:
+                        came[reached >> 1] |= (side + 1 | (8 if after != held else 0)) << (reached & 1) * 4
+                    next_frontier.append(reached)
+            seen += len(next_frontier)
+            frontier = next_frontier
+            moves += 1
+        return None
+    
+    def _solution(self, state: int, source: int, moves: int, seen: int, came: Optional[bytearray]) -> Solution:
+        """Walk the recorded steps back from the exit state"""
+        if came is None:
+            return Solution(moves, [], [], seen)
+        k, width = self.colours, self.maze.width
+        offsets = _offsets(width)
+        cells, order = [state >> k], []
+        while state != source:
+            cell, held = state >> k, state & (1 << k) - 1
+            step = came[state >> 1] >> (state & 1) * 4 & 15
+            if step & 8:
+                colour = self.key_at[cell] - 1
+                order.append(colour)
+                held ^= 1 << colour
+            state = (cell - offsets[(step & 7) - 1]) << k | held
+            cells.append(state >> k)
+        return Solution(moves, order[::-1], [(cell % width, cell // width) for cell in reversed(cells)], seen)
+    
+    def needs_every_key(self) -> bool:
+        """Whether the exit becomes unreachable when any one key is left out of the maze"""
+        for colour, cell in enumerate(self.keys):
+            self.key_at[cell] = 0
+            try:
+                if self.solve(path=False) is not None:
+                    return False
+            finally:
+                self.key_at[cell] = colour + 1
+        return True
+    
+    def next_goal(self, cell: Cell, mask: int) -> Cell:
+        """Where the hint should lead with these keys: the next key on a shortest
+        solution from cell, or the exit. Kept per key set, since every cell reachable
+        without another key leads on to the same solution"""
+        goal = self._goals.get(mask)
+        if goal is None:
+            goal = (self.maze.exit.x, self.maze.exit.y)
+            solution = self.solve(cell, mask)
+            held = mask
+            for x, y in (solution.path if solution else []):
+                if self.pick_up(held, x, y) != held:
+                    goal = (x, y)
+                    break
+            self._goals[mask] = goal
+        return goal
+    
+    @classmethod
+    def place(cls, maze, colours: int, rng=None) -> 'KeyPuzzle':
+        """Doors of distinct colours on bridges of the entry-to-exit route (fewer colours
+        if the route has fewer bridges), in a random colour order, each colour's key
+        somewhere the doors before it have opened up (behind the previous door when there
+        is room). A layout is only returned once the solver has solved it and found that
+        leaving out any one key makes it unsolvable; the default generator is seeded from
+        the maze seed"""
+        if not 0 < colours <= MAX_KEYS:
+            raise ValueError(f"key colours must be 1-{MAX_KEYS}, got {colours}")
+        rng = rng or random.Random(f"{maze.seed}:keys")
+        width = maze.width
+        passages = passage_bits(maze)
+        bridges = bridge_bits(maze, passages)
+        route = bidirectional_bfs(maze, (maze.entry.x, maze.entry.y), (maze.exit.x, maze.exit.y), passages)
+        route = [x + y * width for x, y in route]
+        steps = _offsets(width)
+        # A door between route[p] and route[p + 1] for p > 0 leaves the cells before
+        # it room for a key besides the entry; only bridges cannot be walked around
+        positions = [p for p in range(1, len(route) - 1)
+                     if bridges[route[p]] & SIDE_BITS[steps.index(route[p + 1] - route[p])]]
+        colours = min(colours, len(positions))
+        
+        for _ in range(PLACE_ATTEMPTS):
+            at = sorted(rng.sample(positions, colours))
+            colour_order = list(range(colours))
+            rng.shuffle(colour_order)
+            gates = []
+            for i, position in enumerate(at):
+                cell, after = route[position], route[position + 1]
+                side = steps.index(after - cell)
+                gates.append(((cell, side), (after, (side + 2) % 4), colour_order[i]))
+            
+            keys = [0] * colours
+            taken = {route[0], route[-1]}
+            opened = set()
+            for i, (_, _, colour) in enumerate(gates):
+                region = cls._reachable(route[0], passages, steps, [gate[:2] for gate in gates[i:]])
+                candidates = [cell for cell in region - opened if cell not in taken]
+                candidates = candidates or [cell for cell in region if cell not in taken]
+                keys[colour] = rng.choice(sorted(candidates))
+                taken.add(keys[colour])
+                opened = region
+            
+            doors = {}
+            for front, back, colour in gates:
+                doors[front] = doors[back] = colour
+            puzzle = cls(maze, keys, doors)
+            puzzle.solution = puzzle.solve()
+            if puzzle.solution is not None and puzzle.needs_every_key():
+                return puzzle
+        raise RuntimeError(f"no key placement needing every key on maze seed {maze.seed}")
+    
+    @staticmethod
+    def _reachable(start: int, passages: bytes, steps: Tuple[int, ...], closed) -> set:
+        """Cells reachable from start without going through any of the closed door sides"""
+        blocked = {side for pair in closed for side in pair}
+        reached = {start}
+        frontier = [start]
+        while frontier:
+            cell = frontier.pop()
+            bits = passages[cell]
+            for side, offset in enumerate(steps):
+                if bits & SIDE_BITS[side] and (cell, side) not in blocked and cell + offset not in reached:
+                    reached.add(cell + offset)
+                    frontier.append(cell + offset)
+        return reached
+    
+    def draw(self, screen: pygame.Surface, tile: int, offset_x: int, offset_y: int, mask: int):
+        """Locked doors as bars across their passage, keys not yet held as key icons"""
+        width, thickness = self.maze.width, self.maze.thickness
+        for (cell, side), colour in self.doors.items():
+            if mask >> colour & 1 or side not in (1, 2):
+                continue  # Open, or drawn from the cell on the other side
+            left = offset_x + cell % width * tile
+            top = offset_y + cell // width * tile
+            if side == 1:
+                bar = (left + tile - thickness, top, thickness * 2, tile)
+            else:
+                bar = (left, top + tile - thickness, tile, thickness * 2)
+            pygame.draw.rect(screen, KEY_COLORS[colour], bar)
+        for colour, cell in enumerate(self.keys):
+            if not mask >> colour & 1:
+                cx = offset_x + cell % width * tile + tile // 2
+                cy = offset_y + cell // width * tile + tile // 2
+                radius = max(3, tile // 6)
+                color = KEY_COLORS[colour]
+                pygame.draw.circle(screen, color, (cx - radius, cy), radius, 2)
+                pygame.draw.line(screen, color, (cx, cy), (cx + radius * 2, cy), 2)
+                pygame.draw.line(screen, color, (cx + radius * 2, cy), (cx + radius * 2, cy + radius), 2)
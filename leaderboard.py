@@ -0,0 +1,185 @@
+"""
+Persistent leaderboard in SQLite (WAL mode)
+Finished runs are queued and written in batches by a background thread so
+winning never blocks a frame; top-N reads use keyset pagination over the
+(seed, time) and (difficulty, time) indexes
+"""
+
+import base64
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import config
+import metrics
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    seed INTEGER NOT NULL,
+    difficulty TEXT NOT NULL,
+    time REAL NOT NULL,
+    moves INTEGER NOT NULL,
+    replay_hash TEXT,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_seed_time ON runs (seed, time, id);
+CREATE INDEX IF NOT EXISTS idx_runs_difficulty_time ON runs (difficulty, time, id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_runs_replay_hash ON runs (replay_hash) WHERE replay_hash IS NOT NULL;
+CREATE TABLE IF NOT EXISTS replays (
+    hash TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Older databases may hold a verified run more than once; keep the first of each
+DEDUPE_RUNS = """
+DELETE FROM runs WHERE replay_hash IS NOT NULL AND id NOT IN
+    (SELECT MIN(id) FROM runs WHERE replay_hash IS NOT NULL GROUP BY replay_hash);
+"""
+
+COLUMNS = ('id', 'seed', 'difficulty', 'time', 'moves', 'replay_hash', 'created')
+
+
+def encode_cursor(time_value: float, row_id: int) -> str:
+    """Opaque cursor pointing just after (time, id)"""
+    return base64.urlsafe_b64encode(json.dumps([time_value, row_id]).encode()).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        time_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return float(time_value), int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError('invalid cursor')
+
+
+class Leaderboard:
+    """Queued, batched writes and indexed top-N queries over one SQLite file"""
+    
+    def __init__(self, path: str, batch_size: int = 64, flush_interval: float = 0.5):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enabled = True
+        self.pending: queue.Queue = queue.Queue()
+        self.written = 0
+        self.batches = 0
+        self._readers = threading.local()
+        self._writer: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')  # Durable at checkpoints, safe under WAL
+        try:
+            connection.executescript(SCHEMA)
+        except sqlite3.IntegrityError:
+            connection.executescript(DEDUPE_RUNS + SCHEMA)
+        return connection
+    
+    def _start(self):
+        with self._start_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name='leaderboard-writer', daemon=True)
+                self._writer.start()
+    
+    def submit(self, seed: int, difficulty: str, time_taken: float, moves: int,
+               replay_hash: Optional[str] = None, replay: Optional[bytes] = None):
+        """Queue a finished run (and its replay blob, stored under replay_hash); returns immediately"""
+        if not self.enabled:
+            return
+        if self._writer is None:
+            self._start()
+        self.pending.put(((seed, difficulty, time_taken, moves, replay_hash, time.time()), replay))
+    
+    def flush(self):
+        """Block until every queued run is on disk (or dropped, if the database cannot be opened)"""
+        if self._writer is not None and self._writer.is_alive():
+            self.pending.join()
+    
+    def _write_loop(self):
+        try:
+            connection = self._connect()
+        except (sqlite3.Error, OSError) as e:
+            print(f"Warning: leaderboard disabled, could not open {self.path}: {e}")
+            self.enabled = False
+            # Drop runs queued before (or while) submit saw enabled, so flush still returns
+            while True:
+                self.pending.get()
+                self.pending.task_done()
+        while True:
+            batch = [self.pending.get()]
+            # Gather whatever else arrives shortly after, up to a batch
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                with connection:
+                    connection.executemany(
+                        'INSERT OR IGNORE INTO runs (seed, difficulty, time, moves, replay_hash, created) '
+                        'VALUES (?, ?, ?, ?, ?, ?)', [run for run, _ in batch])
+                    connection.executemany(
+                        'INSERT OR IGNORE INTO replays (hash, data) VALUES (?, ?)',
+                        [(run[4], replay) for run, replay in batch if replay is not None])
+                self.written += len(batch)
+                self.batches += 1
+            except sqlite3.Error as e:
+                print(f"Warning: could not save {len(batch)} leaderboard run(s): {e}")
+            finally:
+                for _ in batch:
+                    self.pending.task_done()
+    
+    def _reader(self) -> sqlite3.Connection:
+        connection = getattr(self._readers, 'connection', None)
+        if connection is None:
+            self._start()
+            connection = self._readers.connection = self._connect()
+        return connection
+    
+    def replay(self, replay_hash: str) -> Optional[bytes]:
+        """Stored replay blob, or None"""
+        row = self._reader().execute('SELECT data FROM replays WHERE hash = ?', (replay_hash,)).fetchone()
+        return row[0] if row else None
+    
+    def top(self, difficulty: Optional[str] = None, seed: Optional[int] = None,
+            limit: int = 10, cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """Fastest runs for a difficulty and/or seed, plus a cursor for the next page"""
+        clauses, params = [], []
+        if seed is not None:
+            clauses.append('seed = ?')
+            params.append(seed)
+        if difficulty is not None:
+            clauses.append('difficulty = ?')
+            params.append(difficulty)
+        if cursor:
+            after_time, after_id = decode_cursor(cursor)
+            clauses.append('(time, id) > (?, ?)')  # Row-value compare keeps the index seek exact
+            params.extend([after_time, after_id])
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self._reader().execute(
+            f"SELECT {', '.join(COLUMNS)} FROM runs {where} ORDER BY time, id LIMIT ?",
+            params + [limit + 1]).fetchall()
+        
+        runs = [dict(zip(COLUMNS, row)) for row in rows[:limit]]
+        next_cursor = encode_cursor(runs[-1]['time'], runs[-1]['id']) if len(rows) > limit else None
+        return runs, next_cursor
+
+
+leaderboard = Leaderboard(config.LEADERBOARD_PATH)
+metrics.gauge('leaderboard_pending_runs', 'Finished runs waiting to be written', lambda: leaderboard.pending.qsize())
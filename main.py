@@ -2,24 +2,62 @@
 Main entry point for the Maze Game with full UI integration
 """
 
+import time
+LAUNCH_TIME = time.perf_counter()  # Taken before the heavy imports below
+
 import pygame
 import sys
+import tracemalloc
 import config
 from game import Game
 from ui import Menu
 from themes import get_theme
+from input_state import InputCollector, install_event_filter
+from assets import AssetLoader, StartupReport
+from frame_profiler import FrameProfiler
+from leaderboard import leaderboard
+from maze_selection import selector
+from profiling import ProfileCapture
+
+
+# Debug hotkeys handled in every state
+PROFILER_KEYS = (pygame.K_F3, pygame.K_F4, pygame.K_F5, pygame.K_F6)
 
 
-def main():
-    """Main game loop"""
+def main(launch_time=None):
+    """Main game loop (launch_time overrides the import-time clock for pre-warmed processes)"""
+    startup = StartupReport(launch_time or LAUNCH_TIME)
+    
     # Initialize Pygame
     pygame.init()
+    startup.mark('pygame_init')
     
     # Create window
     screen = pygame.display.set_mode((config.WINDOW_WIDTH, config.WINDOW_HEIGHT))
     pygame.display.set_caption(config.WINDOW_TITLE)
     clock = pygame.time.Clock()
     
+    # Drop event types we never handle before SDL queues them
+    if config.FILTER_INPUT_EVENTS:
+        install_event_filter()
+    input_collector = InputCollector()
+    
+    # Per-phase frame timings for the F3 overlay and F4 CSV dump
+    profiler = FrameProfiler(history_seconds=config.PROFILE_HISTORY_SECONDS)
+    # cProfile / tracemalloc captures armed by MAZE_PROFILE_FRAMES, MAZE_TRACEMALLOC, F5, F6
+    capture = ProfileCapture.from_env(config.PROFILE_DIR)
+    
+    def reset_game(seed=None):
+        """Restart the current game (on a given maze seed), snapshotting allocations around it when tracing"""
+        if tracemalloc.is_tracing():
+            capture.mark('before_reset')
+        if seed is not None:
+            # Racing the same maze: the run just won must be on disk before its ghost is loaded
+            leaderboard.flush()
+        game.reset(visual_style=current_visual_style, seed=seed)
+        if tracemalloc.is_tracing():
+            capture.mark('after_reset')
+    
     # Initialize game state
     current_theme = 'classic'
     current_difficulty = 'medium'
@@ -28,98 +66,149 @@ def main():
     menu = Menu(get_theme(current_theme))
     state = 'menu'  # 'menu' or 'game'
     
+    # Warm fonts, sprites, overlays and sound effects while the menu runs
+    def on_progress(completed, total, name):
+        menu.loading_progress = completed / total
+    
+    menu.loading_progress = 0.0
+    loader = AssetLoader(on_progress=on_progress).start()
+    # Start the maze candidate generators too, so the first game's selection is warm
+    selector.start()
+    report_written = False
+    
     # Main game loop
     running = True
     while running:
-        # Handle events
-        for event in pygame.event.get():
-            
-            if event.type == pygame.QUIT:
-                running = False
-            
-            elif state == 'menu':
-                # Handle menu events
-                action = menu.handle_event(event)
+        with profiler.section('events'):
+            # Handle events - mouse motion and held keys are folded into one
+            # input state per frame instead of being handled event by event
+            input_collector.begin_frame()
+            for event in pygame.event.get():
+                if input_collector.process(event):
+                    continue
                 
-                if action == 'start':
-                    # Start new game
-                    try:
-                        game = Game(menu.selected_difficulty, menu.selected_theme, menu.selected_visual_style)
-                        current_difficulty = menu.selected_difficulty
-                        current_theme = menu.selected_theme
-                        current_visual_style = menu.selected_visual_style
-                        state = 'game'
-                    except Exception as e:
-                        print(f"Error starting game: {e}")
-                        import traceback
-                        traceback.print_exc()
-                        # Keep in menu state if game fails to start
-                        state = 'menu'
-                
-                elif action == 'quit':
+                if event.type == pygame.QUIT:
                     running = False
                 
-                elif action and action.startswith('difficulty_'):
-                    # Difficulty already handled in menu
-                    pass
-                
-                elif action and action.startswith('theme_'):
-                    # Theme already handled in menu
-                    theme_name = action.replace('theme_', '')
-                    current_theme = theme_name
-                    menu.update_theme(get_theme(theme_name))
+                elif event.type == pygame.KEYDOWN and event.key in PROFILER_KEYS:
+                    # F3 overlay, F4 frame CSV, F5 cProfile window, F6 tracemalloc snapshot
+                    if event.key == pygame.K_F3:
+                        profiler.toggle_overlay()
+                    elif event.key == pygame.K_F4:
+                        print(f"Frame profile written to {profiler.dump_csv(config.PROFILE_DIR)}")
+                    elif event.key == pygame.K_F5:
+                        capture.arm_cprofile(config.PROFILE_CPROFILE_FRAMES)
+                    else:
+                        capture.mark('hotkey')
                 
-                elif action and action.startswith('style_'):
-                    # Visual style already handled in menu
-                    pass
-            
-            elif state == 'game':
-                # Handle game events
-                if event.type == pygame.KEYDOWN:
-                    action = game.handle_key(event.key)
+                elif state == 'menu':
+                    # Handle menu events
+                    action = menu.handle_event(event)
                     
-                    if action == 'restart':
-                        game.reset(visual_style=current_visual_style)
-                    elif action == 'menu':
-                        state = 'menu'
-                        menu.selected_difficulty = current_difficulty
-                        menu.selected_theme = current_theme
-                        menu.selected_visual_style = current_visual_style
-                        menu.update_theme(get_theme(current_theme))
-                
-                elif event.type == pygame.KEYUP:
-                    game.handle_key_up(event.key)
+                    if action == 'start':
+                        # Start new game
+                        try:
+                            game = Game(menu.selected_difficulty, menu.selected_theme, menu.selected_visual_style)
+                            game.profiler = profiler
+                            current_difficulty = menu.selected_difficulty
+                            current_theme = menu.selected_theme
+                            current_visual_style = menu.selected_visual_style
+                            state = 'game'
+                        except Exception as e:
+                            print(f"Error starting game: {e}")
+                            import traceback
+                            traceback.print_exc()
+                            # Keep in menu state if game fails to start
+                            state = 'menu'
+                    
+                    elif action == 'quit':
+                        running = False
+                    
+                    elif action and action.startswith('difficulty_'):
+                        # Difficulty already handled in menu
+                        pass
+                    
+                    elif action and action.startswith('theme_'):
+                        # Theme already handled in menu
+                        theme_name = action.replace('theme_', '')
+                        current_theme = theme_name
+                        menu.update_theme(get_theme(theme_name))
+                    
+                    elif action and action.startswith('style_'):
+                        # Visual style already handled in menu
+                        pass
                 
-                elif event.type == pygame.MOUSEBUTTONDOWN or event.type == pygame.MOUSEMOTION:
-                    action = game.handle_mouse(event)
+                elif state == 'game':
+                    # Handle game events
+                    if event.type == pygame.KEYDOWN:
+                        action = game.handle_key(event.key)
+                        
+                        if action == 'restart':
+                            reset_game()
+                        elif action == 'race':
+                            # Same maze again, racing the ghosts of its best runs
+                            reset_game(seed=game.seed)
+                        elif action == 'menu':
+                            state = 'menu'
+                            menu.selected_difficulty = current_difficulty
+                            menu.selected_theme = current_theme
+                            menu.selected_visual_style = current_visual_style
+                            menu.update_theme(get_theme(current_theme))
                     
-                    if action == 'restart':
-                        game.reset(visual_style=current_visual_style)
-                    elif action == 'menu':
-                        state = 'menu'
-                        menu.selected_difficulty = current_difficulty
-                        menu.selected_theme = current_theme
-                        menu.selected_visual_style = current_visual_style
-                        menu.update_theme(get_theme(current_theme))
-                    elif action == 'resume':
-                        game.state = config.STATE_PLAYING
+                    elif event.type == pygame.MOUSEBUTTONDOWN:
+                        action = game.handle_mouse(event)
+                        
+                        if action == 'restart':
+                            reset_game()
+                        elif action == 'race':
+                            # Same maze again, racing the ghosts of its best runs
+                            reset_game(seed=game.seed)
+                        elif action == 'menu':
+                            state = 'menu'
+                            menu.selected_difficulty = current_difficulty
+                            menu.selected_theme = current_theme
+                            menu.selected_visual_style = current_visual_style
+                            menu.update_theme(get_theme(current_theme))
+                        elif action == 'resume':
+                            game.state = config.STATE_PLAYING
+            
+            # Consume the coalesced input once per frame
+            input_state = input_collector.state
+            if state == 'menu':
+                if input_state.mouse_moved:
+                    menu.handle_event(input_state.motion_event())
+            elif state == 'game' and game:
+                game.apply_input(input_state)
         
         # Update game
         if state == 'game' and game:
-            game.update()
+            with profiler.section('update'):
+                game.update()
         
         # Draw everything
-        if state == 'menu':
-            menu.draw(screen)
-        elif state == 'game' and game:
-            game.draw(screen)
+        with profiler.section('draw'):
+            if state == 'menu':
+                menu.draw(screen)
+            elif state == 'game' and game:
+                game.draw(screen)
+        
+        with profiler.section('present'):
+            pygame.display.flip()
+        profiler.end_frame()
+        capture.end_frame()
         
-        pygame.display.flip()
+        # Startup report once the menu is up and warm-up has finished
+        startup.mark('menu_interactive')
+        if not report_written and loader.done.is_set():
+            startup.mark('assets_warm')
+            startup.write(loader)
+            report_written = True
         
         # Cap framerate
         clock.tick(60)
     
-    # Cleanup
+    # Cleanup - the leaderboard writer is a daemon thread, so land queued runs first
+    leaderboard.flush()
     pygame.quit()
     sys.exit()
 
@@ -0,0 +1,205 @@
+"""
+Maze analytics over wall bytes
+Works on a batch of same-sized mazes as one (count, height, width) uint8 array
+of WALL_BITS (Maze.to_wall_bytes / the maze API's binary format), so every
+measure is a handful of NumPy operations across the whole batch. The entry is
+the top-left cell and the exit the bottom-right one, as in Maze.generate.
+
+    python maze_analytics.py --difficulty medium --count 10000
+"""
+
+import argparse
+import time
+from typing import Dict, Iterable, Union
+
+import numpy as np
+
+from maze_generator import WALL_BITS
+
+
+CHUNK = 1024  # Mazes per pass, keeps the working arrays cache sized
+DISTANCE_BINS = 10  # distance_histogram buckets, each 1/10 of the cell count
+FILLED = 64  # Dead-end filling marker degree
+
+
+def as_batch(data: Union[bytes, Iterable[bytes], np.ndarray], width: int, height: int) -> np.ndarray:
+    """(count, height, width) uint8 array from one or many wall byte strings"""
+    if isinstance(data, np.ndarray):
+        return data.reshape(-1, height, width).astype(np.uint8, copy=False)
+    if not isinstance(data, (bytes, bytearray, memoryview)):
+        data = b''.join(data)
+    if len(data) % (width * height):
+        raise ValueError(f"{len(data)} bytes is not a whole number of {width}x{height} mazes")
+    return np.frombuffer(data, np.uint8).reshape(-1, height, width)
+
+
+def passages(walls: np.ndarray):
+    """Open passages as (right, down) bool arrays: right[:, y, x] joins (x, y) and (x + 1, y),
+    down[:, y, x] joins (x, y) and (x, y + 1); the open outer entry and exit walls are left out"""
+    right = (walls[:, :, :-1] & WALL_BITS['right']) == 0
+    down = (walls[:, :-1, :] & WALL_BITS['bottom']) == 0
+    return right, down
+
+
+def _spread(cells: np.ndarray, right: np.ndarray, down: np.ndarray) -> np.ndarray:
+    """Cells one open step away from any of the given cells"""
+    reached = np.zeros_like(cells)
+    reached[:, :, 1:] |= cells[:, :, :-1] & right
+    reached[:, :, :-1] |= cells[:, :, 1:] & right
+    reached[:, 1:, :] |= cells[:, :-1, :] & down
+    reached[:, :-1, :] |= cells[:, 1:, :] & down
+    return reached
+
+
+def _count_neighbours(cells: np.ndarray, right: np.ndarray, down: np.ndarray) -> np.ndarray:
+    """Per cell, how many of the given cells are one open step away"""
+    count = np.zeros(cells.shape, np.int8)
+    count[:, :, 1:] += cells[:, :, :-1] & right
+    count[:, :, :-1] += cells[:, :, 1:] & right
+    count[:, 1:, :] += cells[:, :-1, :] & down
+    count[:, :-1, :] += cells[:, 1:, :] & down
+    return count
+
+
+def exit_distances(walls: np.ndarray) -> np.ndarray:
+    """Steps from every cell to the exit (-1 where unreachable), one breadth-first
+    wave per step advanced across the whole batch at once"""
+    right, down = passages(walls)
+    count, height, width = walls.shape
+    distances = np.full(walls.shape, -1, np.int32)
+    frontier = np.zeros(walls.shape, bool)
+    frontier[:, height - 1, width - 1] = True
+    distances[frontier] = 0
+    visited = frontier.copy()
+    step = 0
+    while frontier.any():
+        step += 1
+        frontier = _spread(frontier, right, down)
+        frontier &= ~visited
+        visited |= frontier
+        np.copyto(distances, step, where=frontier)
+    return distances
+
+
+def _longest_run(open_: np.ndarray) -> np.ndarray:
+    """Longest run of consecutive True along the last axis, per maze"""
+    if open_.shape[-1] == 0:
+        return np.zeros(open_.shape[0], np.int32)
+    total = np.cumsum(open_, axis=-1, dtype=np.int32)
+    # Running total at the last closed position, subtracted to restart each run at 0
+    restart = np.maximum.accumulate(np.where(open_, 0, total), axis=-1)
+    return (total - restart).max(axis=(1, 2))
+
+
+def _dead_end_fill(degree: np.ndarray, right: np.ndarray, down: np.ndarray) -> np.ndarray:
+    """Cells removed by repeatedly filling dead ends (never the entry or exit), per maze:
+    in a perfect maze that is everything off the solution, in a braided one loops survive"""
+    count, height, width = degree.shape
+    # Filled cells (and the entry and exit) get a degree no decrement can bring back to 1
+    degree = degree.copy()
+    degree[:, 0, 0] = degree[:, height - 1, width - 1] = FILLED
+    while True:
+        tips = degree <= 1
+        if not tips.any():
+            return (degree >= FILLED - 4).sum(axis=(1, 2)) - 2
+        degree[tips] = FILLED
+        degree -= _count_neighbours(tips, right, down)
+
+
+def _analyze_chunk(walls: np.ndarray) -> Dict[str, np.ndarray]:
+    count, height, width = walls.shape
+    cells = width * height
+    right, down = passages(walls)
+    degree = _count_neighbours(np.ones(walls.shape, bool), right, down)
+    
+    # Cells by number of open sides (0-4); junctions are 3- and 4-way cells
+    branching = np.stack([(degree == sides).sum(axis=(1, 2)) for sides in range(5)], axis=1)
+    ends = degree == 1
+    ends[:, 0, 0] = ends[:, height - 1, width - 1] = False  # Open to the outside, not dead ends
+    dead_ends = ends.sum(axis=(1, 2))
+    junctions = branching[:, 3] + branching[:, 4]
+    choices = branching[:, 3] * 2 + branching[:, 4] * 3
+    
+    distances = exit_distances(walls)
+    reachable = distances >= 0
+    solution = distances[:, 0, 0]
+    bins = np.where(reachable, distances * DISTANCE_BINS // cells, DISTANCE_BINS)
+    offsets = (np.arange(count) * (DISTANCE_BINS + 1))[:, None, None]
+    histogram = np.bincount((bins + offsets).ravel(), minlength=count * (DISTANCE_BINS + 1))
+    histogram = histogram.reshape(count, DISTANCE_BINS + 1)[:, :DISTANCE_BINS]
+    
+    filled = _dead_end_fill(degree, right, down)
+    return {
+        'solution_length': np.where(solution >= 0, solution + 1, -1),  # Cells on the route, entry and exit included
+        'dead_ends': dead_ends,
+        'dead_end_ratio': dead_ends / cells,
+        'junction_histogram': branching[:, 3:],  # [3-way, 4-way]
+        'branching_histogram': branching,  # Cells with 0..4 open sides
+        'branching_factor': np.divide(choices, junctions, out=np.zeros(count), where=junctions > 0),
+        'longest_corridor': np.maximum(_longest_run(right), _longest_run(down.transpose(0, 2, 1))) + 1,
+        # Mean dead-end branch length: few long winding branches (high) vs many short stubs (low)
+        'river_factor': np.divide(filled, dead_ends, out=np.zeros(count), where=dead_ends > 0),
+        'distance_mean': np.where(reachable, distances, 0).sum(axis=(1, 2)) / np.maximum(1, reachable.sum(axis=(1, 2))),
+        'distance_max': distances.max(axis=(1, 2)),
+        'distance_histogram': histogram,  # Reachable cells per tenth of the cell count away from the exit
+    }
+
+
+def analyze(walls: np.ndarray) -> Dict[str, np.ndarray]:
+    """Per-maze measures for a (count, height, width) batch, each an array with one row per maze"""
+    if walls.ndim == 2:
+        walls = walls[None]
+    parts = [_analyze_chunk(walls[start:start + CHUNK]) for start in range(0, len(walls), CHUNK)]
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+
+def analyze_maze(maze) -> Dict:
+    """Measures of one generated Maze as plain Python values"""
+    stats = analyze(as_batch(maze.to_wall_bytes(), maze.width, maze.height))
+    return {name: values[0].tolist() for name, values in stats.items()}
+
+
+def summarize(stats: Dict[str, np.ndarray]) -> Dict:
+    """Batch distribution: mean and p10/median/p90 per measure, mean per bucket for histograms"""
+    summary = {}
+    for name, values in stats.items():
+        if values.ndim > 1:
+            summary[name] = [round(float(value), 3) for value in values.mean(axis=0)]
+        else:
+            p10, p50, p90 = np.percentile(values, [10, 50, 90])
+            summary[name] = {'mean': round(float(values.mean()), 3), 'p10': round(float(p10), 3),
+                             'median': round(float(p50), 3), 'p90': round(float(p90), 3)}
+    return summary
+
+
+def main(argv=None):
+    import json
+    import config
+    from maze_generator import Maze
+    
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--difficulty', choices=list(config.DIFFICULTIES), default='medium')
+    parser.add_argument('--count', type=int, default=1000, help='mazes to generate and measure')
+    parser.add_argument('--seed', type=int, default=0, help='first seed (mazes use seed, seed + 1, ...)')
+    args = parser.parse_args(argv)
+    
+    size = config.DIFFICULTIES[args.difficulty]
+    width, height = size['width'], size['height']
+    started = time.perf_counter()
+    blobs = []
+    for seed in range(args.seed, args.seed + args.count):
+        maze = Maze(width, height, seed=seed)
+        maze.generate()
+        blobs.append(maze.to_wall_bytes())
+    generated = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    stats = analyze(as_batch(blobs, width, height))
+    analyzed = time.perf_counter() - started
+    print(json.dumps({'difficulty': args.difficulty, 'mazes': args.count,
+                      'generate_seconds': round(generated, 2), 'analyze_seconds': round(analyzed, 3),
+                      'summary': summarize(stats)}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+Generated maze layouts for the web API
+Mazes are kept as compact wall bytes (see Maze.to_wall_bytes) in a size-bounded
+LRU keyed by (algo, width, height, seed), and streamed out row by row
+"""
+
+import hashlib
+import json
+import random
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import config
+import metrics
+from maze_generator import Maze, WALL_BITS
+
+
+FORMAT_VERSION = 1  # Bump when the encoding or a generator's output changes
+
+_REQUESTS = metrics.counter('maze_cache_requests_total', 'Maze layout cache lookups', ['result'])
+_hit, _miss = _REQUESTS.labels('hit'), _REQUESTS.labels('miss')
+
+
+def _backtracker(width: int, height: int, seed) -> bytes:
+    maze = Maze(width, height, seed=seed)
+    maze.generate()
+    return maze.to_wall_bytes()
+
+
+# Algorithm name -> generator returning wall bytes
+ALGORITHMS: Dict[str, Callable[[int, int, object], bytes]] = {
+    'backtracker': _backtracker,
+}
+
+
+class MazeKey(NamedTuple):
+    algo: str
+    width: int
+    height: int
+    seed: int
+
+
+def etag_for(key: MazeKey, representation: str) -> str:
+    """Strong ETag (unquoted) computed from the request parameters alone, so a 304 needs no generation"""
+    raw = f"v{FORMAT_VERSION}:{representation}:{key.algo}:{key.width}x{key.height}:{key.seed}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+
+class MazeCache:
+    """Thread-safe LRU of wall bytes bounded by entry count and total size"""
+    
+    def __init__(self, max_entries: int = 64, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries: 'OrderedDict[MazeKey, bytes]' = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self._generating: Dict[MazeKey, threading.Event] = {}
+    
+    def get(self, key: MazeKey) -> Optional[bytes]:
+        with self.lock:
+            data = self.entries.get(key)
+            if data is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                _hit.inc()
+            return data
+    
+    def put(self, key: MazeKey, data: bytes):
+        with self.lock:
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key))
+            self.entries[key] = data
+            self.size += len(data)
+            while self.entries and (len(self.entries) > self.max_entries or self.size > self.max_bytes):
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+    
+    def discard(self, key: MazeKey):
+        with self.lock:
+            data = self.entries.pop(key, None)
+            if data is not None:
+                self.size -= len(data)
+    
+    def sized(self, algo: str, width: int, height: int, limit: int) -> List[Tuple[int, bytes]]:
+        """(seed, data) of up to limit cached layouts of one algorithm and size, most recent first"""
+        with self.lock:
+            found = []
+            for key in reversed(self.entries):
+                if key.algo == algo and key.width == width and key.height == height:
+                    found.append((key.seed, self.entries[key]))
+                    if len(found) >= limit:
+                        break
+            return found
+    
+    def get_or_generate(self, key: MazeKey) -> bytes:
+        """Cached layout, generating it once even when several requests race for it"""
+        while True:
+            with self.lock:
+                data = self.entries.get(key)
+                if data is not None:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    _hit.inc()
+                    return data
+                pending = self._generating.get(key)
+                if pending is None:
+                    self._generating[key] = threading.Event()
+                    self.misses += 1
+                    _miss.inc()
+                    break
+            pending.wait()
+        
+        try:
+            data = ALGORITHMS[key.algo](key.width, key.height, key.seed)
+            self.put(key, data)
+            return data
+        finally:
+            with self.lock:
+                self._generating.pop(key).set()
+    
+    def stats(self) -> Dict:
+        with self.lock:
+            return {'entries': len(self.entries), 'bytes': self.size,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+maze_cache = MazeCache(config.MAZE_CACHE_ENTRIES, config.MAZE_CACHE_BYTES)
+
+
+def iter_binary(data: bytes, width: int) -> Iterator[bytes]:
+    """Raw wall bytes, one row per chunk"""
+    view = memoryview(data)
+    for start in range(0, len(data), width):
+        yield bytes(view[start:start + width])
+
+
+def iter_json(key: MazeKey, data: bytes) -> Iterator[str]:
+    """JSON document streamed a row at a time instead of built in memory"""
+    header = {'algo': key.algo, 'width': key.width, 'height': key.height, 'seed': key.seed,
+              'wall_bits': WALL_BITS, 'entry': [0, 0], 'exit': [key.width - 1, key.height - 1]}
+    yield json.dumps(header)[:-1] + ', "rows": [\n'
+    for y, row in enumerate(iter_binary(data, key.width)):
+        yield ('' if y == 0 else ',\n') + json.dumps(list(row))
+    yield '\n]}\n'
+
+
+def parse_query(args, max_size: int):
+    """(MazeKey, 'json' | 'binary', seeded) from query parameters; ValueError explains bad input"""
+    try:
+        width = int(args.get('w', 20))
+        height = int(args.get('h', 15))
+        seed = args.get('seed')
+        seeded = seed not in (None, '')
+        seed = int(seed) if seeded else random.getrandbits(32)
+    except ValueError:
+        raise ValueError('w, h and seed must be integers')
+    if not (2 <= width <= max_size and 2 <= height <= max_size):
+        raise ValueError(f'w and h must be between 2 and {max_size}')
+    algo = args.get('algo', 'backtracker')
+    if algo not in ALGORITHMS:
+        raise ValueError(f"unknown algo '{algo}', expected one of {', '.join(ALGORITHMS)}")
+    representation = 'binary' if args.get('format') in ('bin', 'binary') else 'json'
+    return MazeKey(algo, width, height, seed), representation, seeded
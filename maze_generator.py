@@ -4,16 +4,32 @@ Uses Cell-based system where each cell has walls that can be removed
 """
 
 import random
+import time
 from typing import List, Tuple, Set
 from cell import Cell
+import metrics
+import terrain
+
+
+GENERATION_SECONDS = metrics.histogram('maze_generation_seconds', 'Maze generation time',
+                                       ['algo', 'size'])
+
+# Bit per wall in the compact one-byte-per-cell encoding
+WALL_BITS = {'top': 1, 'right': 2, 'bottom': 4, 'left': 8}
+
+# Conveyor kind -> wall it runs through
+CONVEYOR_SIDES = {terrain.CONVEYOR_UP: 'top', terrain.CONVEYOR_RIGHT: 'right',
+                  terrain.CONVEYOR_DOWN: 'bottom', terrain.CONVEYOR_LEFT: 'left'}
 
 
 class Maze:
     """Represents a maze with cells that have walls"""
     
-    def __init__(self, width: int, height: int):
+    def __init__(self, width: int, height: int, seed=None):
         self.width = width  # Number of columns
         self.height = height  # Number of rows
+        self.seed = seed
+        self.rng = random.Random(seed)  # Same seed, same maze
         self.thickness = 4  # Wall thickness
         # Create grid of cells
         self.grid_cells = [Cell(col, row, self.thickness) 
@@ -22,7 +38,9 @@ class Maze:
         # Entry and exit cells
         self.entry = None
         self.exit = None
-        
+        # Floor kind per cell (see terrain.py); None is plain floor everywhere
+        self.terrain = None
+    
     def remove_walls(self, current, next):
         """Remove walls between two adjacent cells"""
         dx = current.x - next.x
@@ -43,13 +61,14 @@ class Maze:
     
     def generate(self):
         """Generate maze using recursive backtracking algorithm"""
+        started = time.perf_counter()
         current_cell = self.grid_cells[0]
         array = []
         break_count = 1
         
         while break_count != len(self.grid_cells):
             current_cell.visited = True
-            next_cell = current_cell.check_neighbors(self.width, self.height, self.grid_cells)
+            next_cell = current_cell.check_neighbors(self.width, self.height, self.grid_cells, self.rng)
             
             if next_cell:
                 next_cell.visited = True
@@ -68,6 +87,122 @@ class Maze:
         self.entry.walls['top'] = False
         # Remove exit wall (bottom of last cell)
         self.exit.walls['bottom'] = False
+        GENERATION_SECONDS.labels('backtracker', metrics.size_class(len(self.grid_cells))).observe(
+            time.perf_counter() - started)
+    
+    def _walled_neighbours(self, cell) -> List[Tuple[Cell, bool]]:
+        """(neighbour, wall standing between them) for each in-grid neighbour"""
+        x, y, walls, cells, width = cell.x, cell.y, cell.walls, self.grid_cells, self.width
+        index = x + y * width
+        result = []
+        if y > 0:
+            result.append((cells[index - width], walls['top']))
+        if x < width - 1:
+            result.append((cells[index + 1], walls['right']))
+        if y < self.height - 1:
+            result.append((cells[index + width], walls['bottom']))
+        if x > 0:
+            result.append((cells[index - 1], walls['left']))
+        return result
+    
+    def braid(self, fraction: float, rng=None) -> int:
+        """Knock through a share of the dead ends to make loops (after generate), returning
+        how many were opened; the default generator is seeded from the maze seed"""
+        rng = rng or random.Random(f"{self.seed}:braid")
+        is_dead_end = lambda cell: sum(not wall for _, wall in self._walled_neighbours(cell)) == 1
+        dead_ends = [cell for cell in self.grid_cells if is_dead_end(cell)]
+        rng.shuffle(dead_ends)
+        opened = 0
+        for cell in dead_ends[:round(len(dead_ends) * fraction)]:
+            if not is_dead_end(cell):
+                continue  # Already joined up by an earlier opening
+            closed = [neighbour for neighbour, wall in self._walled_neighbours(cell) if wall]
+            # Joining two dead ends removes both with one opening
+            choices = [neighbour for neighbour in closed if is_dead_end(neighbour)] or closed
+            self.remove_walls(cell, rng.choice(choices))
+            opened += 1
+        return opened
+    
+    def _in_grid(self, cell, conveyor: int) -> bool:
+        """Whether the cell a conveyor on this cell carries towards is inside the grid"""
+        dx, dy = terrain.CONVEYORS[conveyor]
+        return 0 <= cell.x + dx < self.width and 0 <= cell.y + dy < self.height
+    
+    def paint_terrain(self, share: float, rng=None) -> int:
+        """Lay mud and ice patches and straight conveyor runs over about a share of the
+        cells (after generate and braid), returning how many were painted; the entry and
+        exit stay plain and the default generator is seeded from the maze seed"""
+        rng = rng or random.Random(f"{self.seed}:terrain")
+        cells, width = self.grid_cells, self.width
+        floor = bytearray(len(cells))
+        keep_plain = {self.entry.x + self.entry.y * width, self.exit.x + self.exit.y * width}
+        target = round(len(cells) * share)
+        painted = 0
+        for _ in range(len(cells) * 4):  # Bounded: a crowded maze may never reach the share
+            if painted >= target:
+                break
+            start = rng.randrange(len(cells))
+            if floor[start] or start in keep_plain:
+                continue
+            if rng.random() < 1 / 3:
+                # A conveyor runs straight the way it carries, up to a wall or other terrain
+                open_sides = [kind for kind, side in CONVEYOR_SIDES.items()
+                              if not cells[start].walls[side] and self._in_grid(cells[start], kind)]
+                if not open_sides:
+                    continue
+                kind = rng.choice(open_sides)
+                side = CONVEYOR_SIDES[kind]
+                dx, dy = terrain.CONVEYORS[kind]
+                index = start
+                for _ in range(rng.randint(2, 6)):
+                    floor[index] = kind
+                    painted += 1
+                    cell = cells[index]
+                    index += dx + dy * width
+                    if (cell.walls[side] or not self._in_grid(cell, kind)
+                            or floor[index] or index in keep_plain):
+                        break
+            else:
+                # Mud and ice spread as a patch through open passages
+                kind = rng.choice((terrain.MUD, terrain.ICE))
+                frontier = [cells[start]]
+                size = min(rng.randint(3, 8), target - painted)
+                while frontier and size:
+                    cell = frontier.pop(rng.randrange(len(frontier)))
+                    index = cell.x + cell.y * width
+                    if floor[index] or index in keep_plain:
+                        continue
+                    floor[index] = kind
+                    painted += 1
+                    size -= 1
+                    frontier.extend(neighbour for neighbour, wall in self._walled_neighbours(cell) if not wall)
+        self.terrain = floor
+        return painted
+    
+    def to_wall_bytes(self) -> bytes:
+        """One byte per cell, row-major, with a WALL_BITS flag set for each standing wall"""
+        bits = tuple(WALL_BITS.items())
+        return bytes(sum(bit for side, bit in bits if cell.walls[side]) for cell in self.grid_cells)
+    
+    @classmethod
+    def from_wall_bytes(cls, width: int, height: int, data: bytes, seed=None) -> 'Maze':
+        """Rebuild a generated maze from to_wall_bytes output"""
+        if len(data) != width * height:
+            raise ValueError(f"expected {width * height} bytes for a {width}x{height} maze, got {len(data)}")
+        maze = cls(width, height, seed)
+        for cell, value in zip(maze.grid_cells, data):
+            cell.walls = {side: bool(value & bit) for side, bit in WALL_BITS.items()}
+            cell.visited = True
+        maze.entry = maze.grid_cells[0]
+        maze.exit = maze.grid_cells[-1]
+        return maze
+    
+    @classmethod
+    def select(cls, width: int, height: int, band, **options) -> 'Maze':
+        """Best of several random layouts for a metric band (see maze_selection.py)"""
+        from maze_selection import selector  # Imports this module
+        seed, data = selector.select(width, height, band, **options)
+        return cls.from_wall_bytes(width, height, data, seed)
     
     def get_cell_at(self, x: int, y: int) -> Cell:
         """Get cell at grid coordinates"""
@@ -0,0 +1,172 @@
+"""
+Best-of-N maze selection
+Random backtracker layouts vary a lot within one size, so new games can draw
+several candidates, generated in parallel worker processes, and keep the one
+whose metric (a maze_analytics measure) falls in the difficulty's target band.
+Selection waits at most a time budget; candidates that were not picked, and
+any that finish late, go into the maze cache and are scored again by later
+selections of the same size.
+
+    maze = Maze.select(30, 20, band=(0.45, 0.55))
+"""
+
+import multiprocessing
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+import config
+import maze_analytics
+import metrics
+from maze_cache import ALGORITHMS, MazeKey, maze_cache
+
+
+ALGO = 'backtracker'
+
+SELECTION_SECONDS = metrics.histogram('maze_selection_seconds', 'Time to pick a maze for a new game')
+CANDIDATES = metrics.counter('maze_selection_candidates_total', 'Maze candidates by where they came from',
+                             ['source'])
+
+
+def _init_worker():
+    """Worker process setup: keep pygame quiet, no window or audio needed"""
+    import headless  # noqa: F401  (sets the SDL dummy drivers before pygame loads)
+
+
+def _warm():
+    return os.getpid()
+
+
+def metric_values(stats, metric: str, cells: int) -> np.ndarray:
+    """One value per maze: a maze_analytics measure, or solution_ratio (route cells / all cells)"""
+    if metric == 'solution_ratio':
+        return stats['solution_length'] / cells
+    values = stats[metric]
+    if values.ndim != 1:
+        raise ValueError(f"'{metric}' is a histogram, not a scalar measure")
+    return values
+
+
+def band_scores(values: np.ndarray, band: Tuple[float, float]) -> np.ndarray:
+    """Distance outside the band (0 inside), with closeness to its middle as a tie-break; lower is better"""
+    low, high = band
+    outside = np.maximum(low - values, 0) + np.maximum(values - high, 0)
+    return outside * 1000 + np.abs(values - (low + high) / 2)
+
+
+class MazeSelector:
+    """Process pool generating maze candidates, scored in the calling thread"""
+    
+    def __init__(self, workers: Optional[int] = None, cache=maze_cache):
+        self.workers = workers or os.cpu_count() or 1
+        self.cache = cache
+        self.enabled = True
+        self.selections = 0
+        self.in_band = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+    
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.workers, multiprocessing.get_context('spawn'),
+                                                     initializer=_init_worker)
+            return self._executor
+    
+    def start(self):
+        """Spawn the workers now (e.g. while the menu is up) so the first selection is not cold"""
+        if self.enabled:
+            pool = self._pool()
+            for _ in range(self.workers):
+                pool.submit(_warm)
+        return self
+    
+    def _generate(self, width: int, height: int, seeds: List[int]) -> List[Future]:
+        try:
+            pool = self._pool()
+            return [pool.submit(ALGORITHMS[ALGO], width, height, seed) for seed in seeds]
+        except BrokenProcessPool:
+            with self._lock:
+                self._executor = None
+            pool = self._pool()
+            return [pool.submit(ALGORITHMS[ALGO], width, height, seed) for seed in seeds]
+    
+    def _store_late(self, width: int, height: int, seed: int):
+        """Done callback: a candidate that missed the budget still goes into the cache"""
+        def store(future: Future):
+            if not future.cancelled() and future.exception() is None:
+                self.cache.put(MazeKey(ALGO, width, height, seed), future.result())
+                CANDIDATES.labels('late').inc()
+        return store
+    
+    def select(self, width: int, height: int, band: Tuple[float, float],
+               metric: str = config.MAZE_SELECTION_METRIC,
+               candidates: int = config.MAZE_SELECTION_CANDIDATES,
+               budget: float = config.MAZE_SELECTION_BUDGET) -> Tuple[int, bytes]:
+        """(seed, wall bytes) of the best candidate for the band"""
+        started = time.perf_counter()
+        if not self.enabled or candidates <= 1:
+            seed = random.getrandbits(32)
+            return seed, ALGORITHMS[ALGO](width, height, seed)
+        seeds = [random.getrandbits(32) for _ in range(candidates)]
+        
+        futures = dict(zip(self._generate(width, height, seeds), seeds))
+        pool: List[Tuple[int, bytes]] = self.cache.sized(ALGO, width, height, candidates)
+        CANDIDATES.labels('cached').inc(len(pool))
+        
+        # Wait out the budget, or until every candidate is in
+        pending = set(futures)
+        deadline = started + budget
+        while pending:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    pool.append((futures[future], future.result()))
+                    CANDIDATES.labels('fresh').inc()
+        for future in pending:
+            if not future.cancel():
+                future.add_done_callback(self._store_late(width, height, futures[future]))
+        if not pool:
+            # Nothing in time (workers still starting, or a broken pool): one local candidate
+            seed = random.getrandbits(32)
+            pool.append((seed, ALGORITHMS[ALGO](width, height, seed)))
+            CANDIDATES.labels('local').inc()
+        
+        stats = maze_analytics.analyze(maze_analytics.as_batch([data for _, data in pool], width, height))
+        values = metric_values(stats, metric, width * height)
+        best = int(np.argmin(band_scores(values, band)))
+        seed, data = pool[best]
+        for i, (other, other_data) in enumerate(pool):
+            if i != best:
+                self.cache.put(MazeKey(ALGO, width, height, other), other_data)
+        # The chosen layout is in play now; later selections should not offer it again
+        self.cache.discard(MazeKey(ALGO, width, height, seed))
+        
+        with self._lock:
+            self.selections += 1
+            self.in_band += bool(band[0] <= values[best] <= band[1])
+        SELECTION_SECONDS.observe(time.perf_counter() - started)
+        return seed, data
+    
+    def stats(self):
+        with self._lock:
+            return {'workers': self.workers, 'selections': self.selections,
+                    'in_band_rate': self.in_band / self.selections if self.selections else 0.0}
+    
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+selector = MazeSelector(config.MAZE_SELECTION_WORKERS)
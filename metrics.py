@@ -0,0 +1,278 @@
+"""
+Process-wide metrics registry with Prometheus text exposition
+Counters and histograms record into per-thread shards, so hot loops never take
+a lock or contend with each other; a scrape sums the shards. A thread's shard
+is folded into a base total when the thread exits, so short-lived threads do
+not pile up shards. Gauges are read from callbacks at scrape time.
+
+    TICKS = metrics.histogram('game_tick_seconds', 'Game.update duration')
+    TICKS.observe(0.0004)
+    LAUNCHES = metrics.counter('launches_total', 'Games launched', ['warm'])
+    LAUNCHES.labels('true').inc()
+"""
+
+import bisect
+import threading
+import weakref
+from typing import Callable, Dict, List, Sequence, Tuple
+
+
+# Seconds; spans sub-millisecond ticks up to multi-second maze generation
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Shard:
+    """Thread-local holder of one shard; collected when its thread exits"""
+    
+    __slots__ = ('values', '__weakref__')
+    
+    def __init__(self):
+        self.values: Dict = {}
+
+
+class _Sharded:
+    """Per-thread value dicts, created on a thread's first write and summed on read;
+    fold(base, values) merges a finished thread's values into the base total"""
+    
+    def __init__(self, fold: Callable[[Dict, Dict], None]):
+        self._local = threading.local()
+        self._fold = fold
+        self._base: Dict = {}
+        self._shards: List[Dict] = [self._base]
+        self._lock = threading.Lock()
+    
+    def shard(self) -> Dict:
+        try:
+            return self._local.shard.values
+        except AttributeError:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard.values)
+            weakref.finalize(shard, self._retire, shard.values)
+            return shard.values
+    
+    def _retire(self, values: Dict):
+        with self._lock:
+            # By identity: list.remove would match any shard with equal values
+            self._shards = [shard for shard in self._shards if shard is not values]
+            self._fold(self._base, values)
+    
+    def merged(self) -> Dict:
+        """Sum of every shard; under the lock, so a retiring thread is counted once"""
+        total: Dict = {}
+        with self._lock:
+            for shard in self._shards:
+                self._fold(total, shard)
+        return total
+
+
+class _Metric:
+    kind = ''
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = _Sharded(self._fold)
+        self._children: Dict[Tuple[str, ...], object] = {}
+    
+    def labels(self, *values):
+        """Child bound to one label combination (cache it in hot loops)"""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            child = self._children.setdefault(key, self._child(self, key))
+        return child
+    
+    @staticmethod
+    def _fold(base: Dict, values: Dict):
+        """Add one shard's values into base"""
+    
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class _CounterChild:
+    __slots__ = ('metric', 'key')
+    
+    def __init__(self, metric, key):
+        self.metric = metric
+        self.key = key
+    
+    def inc(self, amount: float = 1):
+        values = self.metric._values.shard()
+        values[self.key] = values.get(self.key, 0) + amount
+
+
+class Counter(_Metric):
+    """Monotonic total"""
+    
+    kind = 'counter'
+    _child = _CounterChild
+    
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+    
+    @staticmethod
+    def _fold(base, values):
+        for key, value in list(values.items()):
+            base[key] = base.get(key, 0) + value
+    
+    def totals(self) -> Dict[Tuple[str, ...], float]:
+        return self._values.merged()
+    
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(self.totals().items())]
+
+
+class _HistogramChild:
+    __slots__ = ('metric', 'key', 'bounds')
+    
+    def __init__(self, metric, key):
+        self.metric = metric
+        self.key = key
+        self.bounds = metric.buckets
+    
+    def observe(self, value: float):
+        values = self.metric._values.shard()
+        state = values.get(self.key)
+        if state is None:
+            # [bucket counts..., +Inf count, sum]
+            state = values[self.key] = [0] * (len(self.bounds) + 1) + [0.0]
+        state[bisect.bisect_left(self.bounds, value)] += 1
+        state[-1] += value
+
+
+class Histogram(_Metric):
+    """Bucketed distribution with sum and count"""
+    
+    kind = 'histogram'
+    _child = _HistogramChild
+    
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+    
+    def observe(self, value: float):
+        self.labels().observe(value)
+    
+    @staticmethod
+    def _fold(base, values):
+        for key, state in list(values.items()):
+            merged = base.get(key)
+            if merged is None:
+                base[key] = list(state)
+            else:
+                for i, value in enumerate(state):
+                    merged[i] += value
+    
+    def totals(self) -> Dict[Tuple[str, ...], List[float]]:
+        return self._values.merged()
+    
+    def samples(self) -> List[str]:
+        lines = []
+        for key, state in sorted(self.totals().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), state[:-1]):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Current value(s) read from a callback at scrape time"""
+    
+    kind = 'gauge'
+    
+    def __init__(self, name, documentation, function: Callable[[], object], labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+    
+    def samples(self) -> List[str]:
+        try:
+            value = self.function()
+        except Exception as e:
+            return [f"# {self.name} unavailable: {_escape(e)}"]
+        # Unlabelled gauges return a number, labelled ones {label tuple: number}
+        items = value.items() if isinstance(value, dict) else [((), value)]
+        return [f"{self.name}{_format_labels(self.labelnames, key if isinstance(key, tuple) else (key,))} "
+                f"{_format_value(number)}" for key, number in items]
+
+
+class Registry:
+    """Named metrics; asking for an existing name returns the same metric"""
+    
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+        self.lock = threading.Lock()
+    
+    def _register(self, name: str, factory):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = factory()
+            return metric
+    
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._register(name, lambda: Counter(name, documentation, labelnames))
+    
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(name, lambda: Histogram(name, documentation, labelnames, buckets))
+    
+    def gauge(self, name, documentation, function, labelnames=()) -> Gauge:
+        """Register (or replace) a callback gauge"""
+        with self.lock:
+            metric = self.metrics[name] = Gauge(name, documentation, function, labelnames)
+            return metric
+    
+    def render(self) -> str:
+        """Prometheus text exposition format 0.0.4"""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+counter = REGISTRY.counter
+histogram = REGISTRY.histogram
+gauge = REGISTRY.gauge
+render = REGISTRY.render
+
+
+def size_class(cells: int) -> str:
+    """Coarse maze-size label (keeps label cardinality bounded for arbitrary API sizes)"""
+    for limit in (1_000, 10_000, 100_000, 1_000_000):
+        if cells <= limit:
+            return f"le{limit}"
+    return 'huge'
@@ -0,0 +1,425 @@
+"""
+Path finding over the maze's cell grid
+Cells are (x, y) tuples; two cells are connected when the wall between them
+is open. Moves leaving the grid (through the open entry and exit walls) are
+never taken.
+
+The BFS helpers walk Cell objects and suit small mazes and one-off queries.
+bidirectional_bfs and astar work on passage_bits (one byte per cell, a bit
+per open in-grid side) with flat cell indices, for big and braided mazes
+where routes are not unique. dijkstra and cost_field weigh each step by the
+terrain it crosses (terrain.py).
+"""
+
+import heapq
+import threading
+from array import array
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import terrain
+from maze_generator import WALL_BITS
+
+Cell = Tuple[int, int]
+
+# Wall name -> step, clockwise from up
+STEPS = {'top': (0, -1), 'right': (1, 0), 'bottom': (0, 1), 'left': (-1, 0)}
+
+
+def neighbours(maze, cell: Cell) -> List[Cell]:
+    """Cells reachable in one step"""
+    x, y = cell
+    walls = maze.grid_cells[x + y * maze.width].walls
+    result = []
+    for wall, (dx, dy) in STEPS.items():
+        nx, ny = x + dx, y + dy
+        if not walls[wall] and 0 <= nx < maze.width and 0 <= ny < maze.height:
+            result.append((nx, ny))
+    return result
+
+
+def bfs_distances(maze, start: Cell) -> Dict[Cell, int]:
+    """Steps from start to every reachable cell"""
+    distances = {start: 0}
+    frontier = deque([start])
+    while frontier:
+        cell = frontier.popleft()
+        step = distances[cell] + 1
+        for neighbour in neighbours(maze, cell):
+            if neighbour not in distances:
+                distances[neighbour] = step
+                frontier.append(neighbour)
+    return distances
+
+
+def shortest_path(maze, start: Cell, goal: Cell) -> Optional[List[Cell]]:
+    """Cells from start to goal inclusive (breadth-first), None if unreachable"""
+    previous: Dict[Cell, Optional[Cell]] = {start: None}
+    frontier = deque([start])
+    while frontier:
+        cell = frontier.popleft()
+        if cell == goal:
+            path = [goal]
+            while previous[path[-1]] is not None:
+                path.append(previous[path[-1]])
+            return path[::-1]
+        for neighbour in neighbours(maze, cell):
+            if neighbour not in previous:
+                previous[neighbour] = cell
+                frontier.append(neighbour)
+    return None
+
+
+def solve(maze) -> List[Cell]:
+    """Entry-to-exit route"""
+    return shortest_path(maze, (maze.entry.x, maze.entry.y), (maze.exit.x, maze.exit.y))
+
+
+def passage_bits(maze) -> bytes:
+    """One byte per cell (row-major) with a WALL_BITS flag per open side leading to an in-grid cell"""
+    width, height = maze.width, maze.height
+    bits = bytearray(0xF ^ value for value in maze.to_wall_bytes())
+    # The entry and exit walls open onto the outside; so would any gap in the border
+    for x in range(width):
+        bits[x] &= ~WALL_BITS['top']
+        bits[x + (height - 1) * width] &= ~WALL_BITS['bottom']
+    for y in range(height):
+        bits[y * width] &= ~WALL_BITS['left']
+        bits[width - 1 + y * width] &= ~WALL_BITS['right']
+    return bytes(bits)
+
+
+def bridge_bits(maze, passages: Optional[bytes] = None) -> bytes:
+    """passage_bits keeping only the bridges: passages that are the sole link between
+    the two parts of the maze they join (every passage of a perfect maze). Tarjan's
+    low-link search, iterative so big mazes don't hit the recursion limit"""
+    width = maze.width
+    passages = passages or passage_bits(maze)
+    cells = len(passages)
+    steps = _steps(width)
+    side_bits = {offset: bit for bit, offset in steps}
+    order = array('i', [-1]) * cells  # Discovery index, -1 until visited
+    low = array('i', bytes(4 * cells))  # Lowest discovery index reachable without the parent passage
+    bridges = bytearray(cells)
+    counter = 0
+    for root in range(cells):
+        if order[root] >= 0:
+            continue
+        order[root] = low[root] = counter
+        counter += 1
+        stack = [[root, -1, 0]]  # Cell, parent, next direction to try
+        while stack:
+            frame = stack[-1]
+            cell, parent, direction = frame
+            if direction < 4:
+                frame[2] += 1
+                bit, offset = steps[direction]
+                if passages[cell] & bit:
+                    neighbour = cell + offset
+                    if order[neighbour] < 0:
+                        order[neighbour] = low[neighbour] = counter
+                        counter += 1
+                        stack.append([neighbour, cell, 0])
+                    elif neighbour != parent and order[neighbour] < low[cell]:
+                        low[cell] = order[neighbour]
+                continue
+            stack.pop()
+            if parent >= 0:
+                if low[cell] < low[parent]:
+                    low[parent] = low[cell]
+                if low[cell] > order[parent]:
+                    bridges[parent] |= side_bits[cell - parent]
+                    bridges[cell] |= side_bits[parent - cell]
+    return bytes(bridges)
+
+
+def _steps(width: int):
+    """(bit, index offset) per direction"""
+    return ((WALL_BITS['top'], -width), (WALL_BITS['right'], 1),
+            (WALL_BITS['bottom'], width), (WALL_BITS['left'], -1))
+
+
+def _cells(indices: List[int], width: int) -> List[Cell]:
+    return [(index % width, index // width) for index in indices]
+
+
+class _Scratch(threading.local):
+    """Per-thread search buffers, flat arrays sized to the maze and reused by every
+    search on a maze of that size. An entry only counts where its stamp equals the
+    current search's generation, so nothing has to be cleared between searches"""
+    
+    def __init__(self):
+        self.cells = 0
+        self.generation = 0
+    
+    def begin(self, cells: int) -> int:
+        """Generation number of a new search over this many cells"""
+        if cells != self.cells or self.generation == 0xFFFFFFFF:
+            zeros = bytes(4 * cells)
+            # One stamp, parent and distance buffer per search side
+            self.stamps = (array('I', zeros), array('I', zeros))
+            self.parents = (array('i', zeros), array('i', zeros))
+            self.distances = (array('i', zeros), array('i', zeros))
+            self.cells, self.generation = cells, 0
+        self.generation += 1
+        return self.generation
+
+
+_scratch = _Scratch()
+
+
+def bidirectional_bfs(maze, start: Cell, goal: Cell, passages: Optional[bytes] = None) -> Optional[List[Cell]]:
+    """Shortest path by breadth-first search from both ends at once, expanding the
+    smaller frontier a whole layer at a time; None if unreachable"""
+    width = maze.width
+    passages = passages or passage_bits(maze)
+    source, target = start[0] + start[1] * width, goal[0] + goal[1] * width
+    if source == target:
+        return [start]
+    steps = _steps(width)
+    generation = _scratch.begin(len(passages))
+    stamps, parents, distances = _scratch.stamps, _scratch.parents, _scratch.distances
+    for side, end in enumerate((source, target)):
+        stamps[side][end] = generation
+        parents[side][end] = -1
+        distances[side][end] = 0
+    frontiers = ([source], [target])
+    layers = [0, 0]
+    while frontiers[0] and frontiers[1]:
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        seen, parent, distance = stamps[side], parents[side], distances[side]
+        their_seen, their_distance = stamps[1 - side], distances[1 - side]
+        layers[side] += 1
+        layer = layers[side]
+        next_frontier = []
+        meet, best = -1, None
+        for cell in frontiers[side]:
+            bits = passages[cell]
+            for bit, offset in steps:
+                if bits & bit:
+                    neighbour = cell + offset
+                    if seen[neighbour] != generation:
+                        seen[neighbour] = generation
+                        parent[neighbour] = cell
+                        distance[neighbour] = layer
+                        next_frontier.append(neighbour)
+                        # Finish the layer: the first meeting is not always the shortest
+                        if their_seen[neighbour] == generation and (best is None or their_distance[neighbour] < best):
+                            meet, best = neighbour, their_distance[neighbour]
+        if meet >= 0:
+            forward = [meet]
+            while parents[0][forward[-1]] >= 0:
+                forward.append(parents[0][forward[-1]])
+            backward = [meet]
+            while parents[1][backward[-1]] >= 0:
+                backward.append(parents[1][backward[-1]])
+            return _cells(forward[::-1] + backward[1:], width)
+        frontiers = (next_frontier, frontiers[1]) if side == 0 else (frontiers[0], next_frontier)
+    return None
+
+
+def astar(maze, start: Cell, goal: Cell, passages: Optional[bytes] = None) -> Optional[List[Cell]]:
+    """Shortest path by A* with the Manhattan distance to the goal (exact on a grid of
+    unit steps); ties go to the deeper node. None if unreachable"""
+    width = maze.width
+    passages = passages or passage_bits(maze)
+    source, target = start[0] + start[1] * width, goal[0] + goal[1] * width
+    goal_x, goal_y = goal
+    steps = _steps(width)
+    generation = _scratch.begin(len(passages))
+    seen, parents, cost = _scratch.stamps[0], _scratch.parents[0], _scratch.distances[0]
+    seen[source] = generation
+    parents[source] = -1
+    cost[source] = 0
+    heap = [(abs(start[0] - goal_x) + abs(start[1] - goal_y), 0, source)]
+    while heap:
+        _, negative_cost, cell = heapq.heappop(heap)
+        if cell == target:
+            path = [cell]
+            while parents[path[-1]] >= 0:
+                path.append(parents[path[-1]])
+            return _cells(path[::-1], width)
+        if -negative_cost > cost[cell]:
+            continue  # Stale entry, reached more cheaply since
+        bits = passages[cell]
+        step_cost = cost[cell] + 1
+        for bit, offset in steps:
+            if bits & bit:
+                neighbour = cell + offset
+                if seen[neighbour] != generation or step_cost < cost[neighbour]:
+                    seen[neighbour] = generation
+                    cost[neighbour] = step_cost
+                    parents[neighbour] = cell
+                    x, y = neighbour % width, neighbour // width
+                    heapq.heappush(heap, (step_cost + abs(x - goal_x) + abs(y - goal_y), -step_cost, neighbour))
+    return None
+
+
+# cost_field entry for cells with no route to the goal
+UNREACHED = -1
+
+
+def _floor(maze, floor):
+    """Terrain bytes to weigh steps by: the given ones, else the maze's, else all plain"""
+    if floor is not None:
+        return floor
+    return maze.terrain if maze.terrain is not None else bytes(maze.width * maze.height)
+
+
+def dijkstra(maze, start: Cell, goal: Cell, passages: Optional[bytes] = None,
+             floor: Optional[bytes] = None) -> Optional[List[Cell]]:
+    """Cheapest path when each step costs the terrain of the cell it enters, None if
+    unreachable. Step costs are small integers (at most terrain.MAX_COST), so the queue
+    is Dial's bucket ring: MAX_COST + 1 lists indexed by cost modulo the ring size,
+    emptied in cost order, instead of a heap"""
+    width = maze.width
+    passages = passages or passage_bits(maze)
+    floor = _floor(maze, floor)
+    enter = terrain.enter_costs()
+    source, target = start[0] + start[1] * width, goal[0] + goal[1] * width
+    steps = tuple((bit, offset, direction) for direction, (bit, offset) in enumerate(_steps(width)))
+    size = terrain.MAX_COST + 1
+    ring = [[] for _ in range(size)]
+    ring[0].append(source)
+    cost = {source: 0}
+    parents = {source: -1}
+    queued, current = 1, 0
+    while queued:
+        bucket = ring[current % size]
+        while bucket:
+            cell = bucket.pop()
+            queued -= 1
+            if cost[cell] != current:
+                continue  # Stale entry, reached more cheaply since
+            if cell == target:
+                path = [cell]
+                while parents[path[-1]] >= 0:
+                    path.append(parents[path[-1]])
+                return _cells(path[::-1], width)
+            bits = passages[cell]
+            for bit, offset, direction in steps:
+                if bits & bit:
+                    neighbour = cell + offset
+                    step_cost = current + enter[floor[neighbour]][direction]
+                    if step_cost < cost.get(neighbour, step_cost + 1):
+                        cost[neighbour] = step_cost
+                        parents[neighbour] = cell
+                        # Never lands in the bucket being emptied: every step costs at least 1
+                        ring[step_cost % size].append(neighbour)
+                        queued += 1
+        current += 1
+    return None
+
+
+def cost_field(maze, goal: Cell, passages: Optional[bytes] = None,
+               floor: Optional[bytes] = None) -> Tuple[List[int], List[int]]:
+    """(cost, toward) per flat cell index: the cheapest cost from each cell to the goal
+    (UNREACHED where there is none) and the next cell on that cheapest route. dijkstra's
+    bucket ring run backwards from the goal over the whole maze"""
+    width = maze.width
+    passages = passages or passage_bits(maze)
+    floor = _floor(maze, floor)
+    enter = terrain.enter_costs()
+    target = goal[0] + goal[1] * width
+    # Reaching cell from a neighbour means moving opposite to the step that found the neighbour
+    steps = tuple((bit, offset, (direction + 2) % 4) for direction, (bit, offset) in enumerate(_steps(width)))
+    size = terrain.MAX_COST + 1
+    ring = [[] for _ in range(size)]
+    ring[0].append(target)
+    cost = [UNREACHED] * len(passages)
+    toward = [UNREACHED] * len(passages)
+    cost[target] = 0
+    done = bytearray(len(passages))
+    queued, current = 1, 0
+    while queued:
+        bucket = ring[current % size]
+        while bucket:
+            cell = bucket.pop()
+            queued -= 1
+            if done[cell]:
+                continue
+            done[cell] = 1
+            bits, costs = passages[cell], enter[floor[cell]]
+            for bit, offset, towards in steps:
+                if bits & bit:
+                    neighbour = cell + offset
+                    step_cost = current + costs[towards]
+                    if cost[neighbour] == UNREACHED or step_cost < cost[neighbour]:
+                        cost[neighbour] = step_cost
+                        toward[neighbour] = cell
+                        ring[step_cost % size].append(neighbour)
+                        queued += 1
+        current += 1
+    return cost, toward
+
+
+def descend(maze, toward: List[int], start: Cell, goal: Cell) -> List[Cell]:
+    """Cheapest path from start to cost_field's goal, following its toward pointers
+    (empty if unreachable); one list lookup per path cell, whatever the maze size"""
+    width = maze.width
+    cell, target = start[0] + start[1] * width, goal[0] + goal[1] * width
+    path = [cell]
+    while cell != target:
+        cell = toward[cell]
+        if cell == UNREACHED:
+            return []
+        path.append(cell)
+    return _cells(path, width)
+
+
+class Route:
+    """Route to a fixed goal, kept up to date as the start moves: a start on the
+    route reads the rest of it from there, one off the route searches outwards
+    for the nearest route cell and splices the detour on. Only the first query
+    pays for a full bidirectional search.
+
+    On a maze with terrain the route is the cheapest one instead: the first
+    query builds a cost_field to the goal and a start off the route follows it"""
+    
+    def __init__(self, maze, goal: Cell, passages: Optional[bytes] = None):
+        self.maze = maze
+        self.goal = goal
+        self.passages = passages or passage_bits(maze)
+        self.path: List[Cell] = []
+        self.index: Dict[Cell, int] = {}
+        self.toward: Optional[List[int]] = None
+    
+    def _set(self, path: Optional[List[Cell]]):
+        self.path = path or []
+        self.index = {cell: i for i, cell in enumerate(self.path)}
+    
+    def _rejoin(self, start: Cell) -> Optional[List[Cell]]:
+        """Breadth-first from start to the nearest cell already on the route"""
+        width = self.maze.width
+        source = start[0] + start[1] * width
+        steps = _steps(width)
+        on_route = {x + y * width: i for (x, y), i in self.index.items()}
+        parents = {source: -1}
+        frontier = deque([source])
+        while frontier:
+            cell = frontier.popleft()
+            if cell in on_route:
+                detour = [cell]
+                while parents[detour[-1]] >= 0:
+                    detour.append(parents[detour[-1]])
+                return _cells(detour[:0:-1], width) + self.path[on_route[cell]:]
+            bits = self.passages[cell]
+            for bit, offset in steps:
+                if bits & bit and cell + offset not in parents:
+                    parents[cell + offset] = cell
+                    frontier.append(cell + offset)
+        return None
+    
+    def from_cell(self, start: Cell) -> List[Cell]:
+        """Cells from start to the goal, both included (empty if unreachable)"""
+        i = self.index.get(start)
+        if i is None:
+            if self.maze.terrain is not None:
+                if self.toward is None:
+                    _, self.toward = cost_field(self.maze, self.goal, self.passages)
+                self._set(descend(self.maze, self.toward, start, self.goal))
+            else:
+                self._set(self._rejoin(start) if self.path else bidirectional_bfs(
+                    self.maze, start, self.goal, self.passages))
+            i = 0
+        return self.path[i:]
@@ -5,6 +5,7 @@ Player class for pixel-based movement with wall collision detection
 import pygame
 from typing import Tuple
 import config
+from maze_generator import WALL_BITS
 
 
 class Player:
@@ -33,8 +34,9 @@ class Player:
             return None
         return grid_cells[find_index(cell_x, cell_y)]
     
-    def check_move(self, tile, grid_cells, thickness, cols, rows):
-        """Stop player from passing through walls"""
+    def check_move(self, tile, grid_cells, thickness, cols, rows, locked=None):
+        """Stop player from passing through walls (and, given a puzzle's locked sides
+        per cell, through locked doors)"""
         current_cell_x = int(self.x // tile)
         current_cell_y = int(self.y // tile)
         current_cell = self.get_current_cell(self.x, self.y, tile, grid_cells, cols, rows)
@@ -44,24 +46,25 @@ class Player:
         
         current_cell_abs_x = current_cell_x * tile
         current_cell_abs_y = current_cell_y * tile
+        doors = locked[current_cell_x + current_cell_y * cols] if locked else 0
         
         if self.left_pressed:
-            if current_cell.walls['left']:
+            if current_cell.walls['left'] or doors & WALL_BITS['left']:
                 if self.x <= current_cell_abs_x + thickness:
                     self.left_pressed = False
         
         if self.right_pressed:
-            if current_cell.walls['right']:
+            if current_cell.walls['right'] or doors & WALL_BITS['right']:
                 if self.x >= current_cell_abs_x + tile - (self.player_size + thickness):
                     self.right_pressed = False
         
         if self.up_pressed:
-            if current_cell.walls['top']:
+            if current_cell.walls['top'] or doors & WALL_BITS['top']:
                 if self.y <= current_cell_abs_y + thickness:
                     self.up_pressed = False
         
         if self.down_pressed:
-            if current_cell.walls['bottom']:
+            if current_cell.walls['bottom'] or doors & WALL_BITS['bottom']:
                 if self.y >= current_cell_abs_y + tile - (self.player_size + thickness):
                     self.down_pressed = False
     
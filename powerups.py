@@ -4,7 +4,66 @@ Power-up system for the maze game
 
 import random
 import pygame
+import config
 from typing import List, Tuple, Optional
+from timers import TimerWheel, EffectTimers
+from assets import get_glyph, get_sprite
+from pathfinding import Route
+
+
+POWER_TYPES = ['speed', 'hint', 'time']
+PULSE_STEPS = 3  # Pulse adds 0-2 pixels to the radius
+
+# Power-up colors
+POWER_COLORS = {
+    'speed': (100, 255, 100),
+    'hint': (255, 255, 100),
+    'time': (100, 200, 255)
+}
+
+SPEED_BOOST_TICKS = 300  # 5 seconds at 60 FPS
+TIME_BONUS_SECONDS = 10
+
+
+def powerup_sprite(power_type: str, radius: int) -> pygame.Surface:
+    """Cached power-up sprite at a given pulse radius, centered on the surface"""
+    return get_sprite(('powerup', power_type, radius),
+                      lambda: _build_powerup_sprite(power_type, radius))
+
+
+def _build_powerup_sprite(power_type: str, radius: int) -> pygame.Surface:
+    """Render a power-up orb with its type icon"""
+    half = radius + 1
+    sprite = pygame.Surface((half * 2 + 1, half * 2 + 1), pygame.SRCALPHA)
+    center_x = center_y = half
+    
+    color = POWER_COLORS.get(power_type, (255, 255, 255))
+    pygame.draw.circle(sprite, color, (center_x, center_y), radius)
+    pygame.draw.circle(sprite, (255, 255, 255), (center_x, center_y), radius, 2)
+    
+    # Icon based on type
+    if power_type == 'speed':
+        # Lightning bolt
+        points = [
+            (center_x - 3, center_y - 5),
+            (center_x, center_y - 2),
+            (center_x - 2, center_y),
+            (center_x + 3, center_y + 5),
+            (center_x, center_y + 2),
+            (center_x + 2, center_y)
+        ]
+        pygame.draw.polygon(sprite, (255, 255, 255), points)
+    elif power_type == 'hint':
+        # Question mark
+        text = get_glyph("?", 20, (0, 0, 0))
+        text_rect = text.get_rect(center=(center_x, center_y))
+        sprite.blit(text, text_rect)
+    elif power_type == 'time':
+        # Clock icon
+        pygame.draw.circle(sprite, (255, 255, 255), (center_x, center_y), radius - 2, 2)
+        pygame.draw.line(sprite, (255, 255, 255), (center_x, center_y), (center_x, center_y - 4), 2)
+        pygame.draw.line(sprite, (255, 255, 255), (center_x, center_y), (center_x + 3, center_y), 2)
+    return sprite
 
 
 class PowerUp:
@@ -17,13 +76,7 @@ class PowerUp:
         self.collected = False
         self.theme = theme
         self.animation_frame = 0
-        
-        # Power-up colors
-        self.colors = {
-            'speed': (100, 255, 100),
-            'hint': (255, 255, 100),
-            'time': (100, 200, 255)
-        }
+        self.colors = POWER_COLORS
     
     def draw(self, screen: pygame.Surface, cell_size: int, offset_x: int, offset_y: int):
         """Draw power-up"""
@@ -38,33 +91,9 @@ class PowerUp:
         pulse = int(2 * abs(pygame.time.get_ticks() % 1000 - 500) / 500)
         radius = radius + pulse
         
-        color = self.colors.get(self.type, (255, 255, 255))
-        pygame.draw.circle(screen, color, (center_x, center_y), radius)
-        pygame.draw.circle(screen, (255, 255, 255), (center_x, center_y), radius, 2)
-        
-        # Icon based on type
-        if self.type == 'speed':
-            # Lightning bolt
-            points = [
-                (center_x - 3, center_y - 5),
-                (center_x, center_y - 2),
-                (center_x - 2, center_y),
-                (center_x + 3, center_y + 5),
-                (center_x, center_y + 2),
-                (center_x + 2, center_y)
-            ]
-            pygame.draw.polygon(screen, (255, 255, 255), points)
-        elif self.type == 'hint':
-            # Question mark
-            font = pygame.font.Font(None, 20)
-            text = font.render("?", True, (0, 0, 0))
-            text_rect = text.get_rect(center=(center_x, center_y))
-            screen.blit(text, text_rect)
-        elif self.type == 'time':
-            # Clock icon
-            pygame.draw.circle(screen, (255, 255, 255), (center_x, center_y), radius - 2, 2)
-            pygame.draw.line(screen, (255, 255, 255), (center_x, center_y), (center_x, center_y - 4), 2)
-            pygame.draw.line(screen, (255, 255, 255), (center_x, center_y), (center_x + 3, center_y), 2)
+        sprite = powerup_sprite(self.type, radius)
+        half = sprite.get_width() // 2
+        screen.blit(sprite, (center_x - half, center_y - half))
     
     def check_collection(self, player_x: int, player_y: int) -> bool:
         """Check if player collected this power-up"""
@@ -80,30 +109,31 @@ class PowerUp:
 class PowerUpManager:
     """Manages all power-ups in the game"""
     
-    def __init__(self, maze, theme, difficulty='medium'):
+    def __init__(self, maze, theme, difficulty='medium', rng=random):
         self.maze = maze
         self.theme = theme
+        self.rng = rng
         self.powerups: List[PowerUp] = []
-        self.active_effects = {
-            'speed': 0,  # Frames remaining
-            'hint': False,
-            'time': 0  # Seconds to add
-        }
+        # Timed effects live on a timer wheel advanced once per tick
+        self.timers = TimerWheel()
+        self.effects = EffectTimers(self.timers)
+        self.time_bonus = 0  # Seconds to add, consumed by get_time_bonus()
+        self.hint_route: Optional[Route] = None  # Built on the first hint frame
         
         # Spawn power-ups based on difficulty
-        spawn_count = {'easy': 3, 'medium': 5, 'hard': 7}[difficulty]
+        spawn_count = config.DIFFICULTIES[difficulty]['powerups']
         self.spawn_powerups(spawn_count)
     
     def spawn_powerups(self, count: int):
         """Spawn power-ups randomly in the maze"""
-        power_types = ['speed', 'hint', 'time']
+        power_types = POWER_TYPES
         
         for _ in range(count):
             # Find random path cell
             attempts = 0
             while attempts < 100:
-                x = random.randint(1, self.maze.width - 2)
-                y = random.randint(1, self.maze.height - 2)
+                x = self.rng.randint(1, self.maze.width - 2)
+                y = self.rng.randint(1, self.maze.height - 2)
                 
                 # Don't spawn on entry, exit, or existing power-ups
                 if (self.maze.is_path(x, y) and
@@ -111,7 +141,7 @@ class PowerUpManager:
                     (x, y) != (self.maze.exit.x, self.maze.exit.y) and
                     not any(p.x == x and p.y == y for p in self.powerups)):
                     
-                    power_type = random.choice(power_types)
+                    power_type = self.rng.choice(power_types)
                     self.powerups.append(PowerUp(x, y, power_type, self.theme))
                     break
                 
@@ -128,30 +158,29 @@ class PowerUpManager:
     def activate_powerup(self, power_type: str):
         """Activate a power-up effect"""
         if power_type == 'speed':
-            self.active_effects['speed'] = 300  # 5 seconds at 60 FPS
+            # Each pickup stacks its own timer; the boost lasts until the last one expires
+            self.effects.add('speed', SPEED_BOOST_TICKS)
         elif power_type == 'hint':
-            self.active_effects['hint'] = True
+            self.effects.add('hint')  # Lasts for the rest of the game
         elif power_type == 'time':
-            self.active_effects['time'] = 10  # Add 10 seconds
+            self.time_bonus += TIME_BONUS_SECONDS
     
     def update(self):
-        """Update power-up effects"""
-        # Decrease speed boost timer
-        if self.active_effects['speed'] > 0:
-            self.active_effects['speed'] -= 1
+        """Advance effect timers by one tick"""
+        self.timers.advance()
     
     def get_speed_multiplier(self) -> float:
         """Get current speed multiplier"""
-        return 2.0 if self.active_effects['speed'] > 0 else 1.0
+        return 2.0 if self.effects.is_active('speed') else 1.0
     
     def has_hint(self) -> bool:
         """Check if hint is active"""
-        return self.active_effects['hint']
+        return self.effects.is_active('hint')
     
     def get_time_bonus(self) -> int:
         """Get time bonus and reset"""
-        bonus = self.active_effects['time']
-        self.active_effects['time'] = 0
+        bonus = self.time_bonus
+        self.time_bonus = 0
         return bonus
     
     def draw(self, screen: pygame.Surface, cell_size: int, offset_x: int, offset_y: int):
@@ -159,31 +188,18 @@ class PowerUpManager:
         for powerup in self.powerups:
             powerup.draw(screen, cell_size, offset_x, offset_y)
     
-    def draw_hint_path(self, screen: pygame.Surface, cell_size: int, offset_x: int, offset_y: int, player_pos: Tuple[int, int], exit_pos: Tuple[int, int]):
-        """Draw hint path to exit (simplified A* pathfinding)"""
-        if not self.active_effects['hint']:
+    def draw_hint_path(self, screen: pygame.Surface, cell_size: int, offset_x: int, offset_y: int, player_pos: Tuple[int, int], exit_pos: Tuple[int, int],
+                       passages: Optional[bytes] = None):
+        """Draw the route from the player to the exit (or another goal, through the
+        given passages when locked doors close some)"""
+        if not self.has_hint():
             return
         
-        # Simple pathfinding - just show direction arrows
-        px, py = player_pos
-        ex, ey = exit_pos
-        
-        # Draw arrow pointing towards exit
-        if abs(ex - px) > abs(ey - py):
-            # Horizontal direction
-            direction = 1 if ex > px else -1
-            for x in range(px, ex, direction):
-                if self.maze.is_path(x, py):
-                    arrow_x = offset_x + x * cell_size + cell_size // 2
-                    arrow_y = offset_y + py * cell_size + cell_size // 2
-                    # Draw arrow
-                    pygame.draw.circle(screen, (255, 255, 0, 100), (arrow_x, arrow_y), 3)
-        else:
-            # Vertical direction
-            direction = 1 if ey > py else -1
-            for y in range(py, ey, direction):
-                if self.maze.is_path(px, y):
-                    arrow_x = offset_x + px * cell_size + cell_size // 2
-                    arrow_y = offset_y + y * cell_size + cell_size // 2
-                    # Draw arrow
-                    pygame.draw.circle(screen, (255, 255, 0, 100), (arrow_x, arrow_y), 3)
+        # Solved once, then trimmed or spliced as the player moves (see pathfinding.Route)
+        if (self.hint_route is None or self.hint_route.goal != exit_pos or
+                passages is not None and self.hint_route.passages is not passages):
+            self.hint_route = Route(self.maze, exit_pos, passages)
+        for x, y in self.hint_route.from_cell(player_pos)[1:]:
+            dot_x = offset_x + x * cell_size + cell_size // 2
+            dot_y = offset_y + y * cell_size + cell_size // 2
+            pygame.draw.circle(screen, (255, 255, 0, 100), (dot_x, dot_y), 3)
@@ -0,0 +1,123 @@
+"""
+On-demand cProfile and tracemalloc capture for the running game
+Armed from the environment at launch or with hotkeys in game:
+
+    MAZE_PROFILE_FRAMES=300   profile the first 300 frames with cProfile
+    MAZE_TRACEMALLOC=1        trace allocations from launch and diff around
+                              every Game.reset
+    F5                        profile the next PROFILE_CPROFILE_FRAMES frames
+    F6                        take a tracemalloc snapshot and diff it against
+                              the previous one (starts tracing on first press)
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import time
+import tracemalloc
+from typing import Optional
+
+
+def _timestamp() -> str:
+    return time.strftime('%Y%m%d-%H%M%S')
+
+
+class ProfileCapture:
+    """Captures cProfile windows and tracemalloc diffs into timestamped files"""
+    
+    def __init__(self, output_dir: str, top: int = 25):
+        self.output_dir = output_dir
+        self.top = top
+        self.profiler: Optional[cProfile.Profile] = None
+        self.frames_left = 0
+        self.frames_requested = 0
+        self.baseline_snapshot = None
+        self.last_snapshot = None
+        self.last_label = None
+    
+    @classmethod
+    def from_env(cls, output_dir: str, environ=os.environ):
+        """Build a capture and arm whatever the environment asks for"""
+        capture = cls(output_dir)
+        frames = environ.get('MAZE_PROFILE_FRAMES')
+        if frames:
+            capture.arm_cprofile(int(frames))
+        if environ.get('MAZE_TRACEMALLOC', '') not in ('', '0'):
+            capture.mark('launch')
+        return capture
+    
+    # cProfile
+    
+    def arm_cprofile(self, frames: int):
+        """Profile the next N frames (ignored while a capture is running)"""
+        if self.profiler is not None:
+            return
+        self.frames_requested = self.frames_left = frames
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+        print(f"Profiling the next {frames} frames...")
+    
+    def end_frame(self):
+        """Call once per frame; finishes the cProfile window when it runs out"""
+        if self.profiler is None:
+            return
+        self.frames_left -= 1
+        if self.frames_left <= 0:
+            self.profiler.disable()
+            self._write_cprofile(self.profiler)
+            self.profiler = None
+    
+    def _write_cprofile(self, profiler: cProfile.Profile):
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"cprofile-{_timestamp()}")
+        profiler.dump_stats(base + '.prof')
+        
+        summary = io.StringIO()
+        summary.write(f"cProfile window: {self.frames_requested} frames\n\n")
+        stats = pstats.Stats(profiler, stream=summary)
+        stats.strip_dirs()
+        summary.write("== Top functions by cumulative time ==\n")
+        stats.sort_stats('cumulative').print_stats(self.top)
+        summary.write("== Top functions by own time ==\n")
+        stats.sort_stats('tottime').print_stats(self.top)
+        with open(base + '.txt', 'w') as f:
+            f.write(summary.getvalue())
+        print(f"cProfile written to {base}.prof (summary in {base}.txt)")
+    
+    # tracemalloc
+    
+    def mark(self, label: str):
+        """Snapshot allocations; diffs against the previous and first snapshot"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            print("tracemalloc started")
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+        if self.last_snapshot is not None:
+            self._write_diff(snapshot, label)
+        else:
+            self.baseline_snapshot = snapshot
+        self.last_snapshot = snapshot
+        self.last_label = label
+    
+    def _write_diff(self, snapshot, label: str):
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"tracemalloc-{_timestamp()}-{label}.txt")
+        current, peak = tracemalloc.get_traced_memory()
+        with open(path, 'w') as f:
+            f.write(f"traced memory: {current / 1024:.1f} KiB (peak {peak / 1024:.1f} KiB)\n\n")
+            for title, older in ((f"since '{self.last_label}'", self.last_snapshot),
+                                 ("since first snapshot", self.baseline_snapshot)):
+                f.write(f"== Top allocation sites {title} ==\n")
+                for stat in snapshot.compare_to(older, 'lineno')[:self.top]:
+                    f.write(f"{stat}\n")
+                f.write("\n")
+            f.write("== Largest allocation sites now ==\n")
+            for stat in snapshot.statistics('traceback')[:5]:
+                f.write(f"{stat.size / 1024:.1f} KiB in {stat.count} blocks\n")
+                for line in stat.traceback.format():
+                    f.write(f"    {line}\n")
+        print(f"tracemalloc diff written to {path}")
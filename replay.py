@@ -0,0 +1,251 @@
+"""
+Deterministic replays
+A replay is the maze seed, game options and the player's held directions at
+the start of every tick, run-length encoded as XOR deltas between runs, so a
+typical run is a few hundred bytes. Playback re-runs the simulation core with
+the same seed and inputs, which reproduces the run exactly.
+
+Layout (little endian):
+    header  4s magic, B version, I seed, B difficulty, B options, I ticks, f time, I moves,
+            d braid, d terrain, B key colours (version 1 stops after moves: a plain maze)
+    runs    one byte per run: low nibble = flags XOR previous flags, high nibble = length
+            (15 means "15 + varint that follows")
+"""
+
+import hashlib
+import struct
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import config
+
+
+MAGIC = b'MZR1'
+VERSION = 2
+HEADER = struct.Struct('<4sBIBBIfIddB')
+HEADER_V1 = struct.Struct('<4sBIBBIfI')
+
+# Bit order of the held-direction flags
+FLAG_ATTRS = ('left_pressed', 'right_pressed', 'up_pressed', 'down_pressed')
+DIFFICULTY_NAMES = list(config.DIFFICULTIES)
+
+OPTION_ENEMIES = 1
+OPTION_POWERUPS = 2
+
+
+class Layout(NamedTuple):
+    """Maze options a run was played with besides its seed: the share of dead ends
+    braided, the share of cells painted with terrain and the key colours"""
+    braid: float = 0.0
+    terrain: float = 0.0
+    keys: int = 0
+    
+    @classmethod
+    def of_tier(cls, tier: Dict) -> 'Layout':
+        """The layout a difficulty's config entry builds"""
+        return cls(tier['braid'], tier['terrain'], tier['keys'])
+
+
+def pack_flags(player) -> int:
+    """Player's held directions as a 4-bit mask"""
+    return (player.left_pressed | player.right_pressed << 1 |
+            player.up_pressed << 2 | player.down_pressed << 3)
+
+
+def apply_flags(player, bits: int):
+    player.left_pressed = bool(bits & 1)
+    player.right_pressed = bool(bits & 2)
+    player.up_pressed = bool(bits & 4)
+    player.down_pressed = bool(bits & 8)
+
+
+def _write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _header(data: bytes) -> struct.Struct:
+    """Header layout of this replay's version"""
+    if len(data) < HEADER_V1.size:
+        raise ValueError('replay too short')
+    if data[:4] != MAGIC or data[4] not in (1, VERSION):
+        raise ValueError('not a replay (or an unsupported version)')
+    header = HEADER if data[4] == VERSION else HEADER_V1
+    if len(data) < header.size:
+        raise ValueError('replay too short')
+    return header
+
+
+def read_header(data: bytes) -> Tuple[int, str, bool, bool, int, float, int, Layout]:
+    """(seed, difficulty, enemies, powerups, ticks, time, moves, layout) without decoding the inputs"""
+    fields = _header(data).unpack_from(data)
+    _, _, seed, difficulty, options, ticks, time, moves = fields[:8]
+    if difficulty >= len(DIFFICULTY_NAMES):
+        raise ValueError(f'unknown difficulty index {difficulty}')
+    return (seed, DIFFICULTY_NAMES[difficulty], bool(options & OPTION_ENEMIES),
+            bool(options & OPTION_POWERUPS), ticks, time, moves, Layout(*fields[8:]))
+
+
+def iter_runs(data: bytes) -> Iterator[Tuple[int, int]]:
+    """Decode (flags, tick count) runs one at a time straight from the encoded stream"""
+    previous, pos = 0, _header(data).size
+    try:
+        while pos < len(data):
+            byte = data[pos]
+            pos += 1
+            count = byte >> 4
+            if count == 15:
+                extra, pos = _read_varint(data, pos)
+                count += extra
+            previous ^= byte & 0x0F
+            yield previous, count
+    except IndexError:
+        raise ValueError('truncated replay')
+
+
+class Replay:
+    """Decoded replay: run options plus (flags, tick count) input runs"""
+    
+    def __init__(self, seed: int, difficulty: str, enemies: bool, powerups: bool,
+                 runs: List[Tuple[int, int]], time: float = 0.0, moves: int = 0, layout: Layout = Layout()):
+        self.seed = seed
+        self.difficulty = difficulty
+        self.enemies = enemies
+        self.powerups = powerups
+        self.runs = runs
+        self.time = time
+        self.moves = moves
+        self.layout = layout
+    
+    @property
+    def ticks(self) -> int:
+        return sum(count for _, count in self.runs)
+    
+    def inputs(self) -> Iterator[int]:
+        """Flags for every tick in order"""
+        for bits, count in self.runs:
+            for _ in range(count):
+                yield bits
+    
+    def to_bytes(self) -> bytes:
+        options = (OPTION_ENEMIES if self.enemies else 0) | (OPTION_POWERUPS if self.powerups else 0)
+        out = bytearray(HEADER.pack(MAGIC, VERSION, self.seed, DIFFICULTY_NAMES.index(self.difficulty),
+                                    options, self.ticks, self.time, self.moves, *self.layout))
+        previous = 0
+        for bits, count in self.runs:
+            out.append((bits ^ previous) | min(count, 15) << 4)
+            if count >= 15:
+                _write_varint(out, count - 15)
+            previous = bits
+        return bytes(out)
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Replay':
+        seed, difficulty, enemies, powerups, ticks, time, moves, layout = read_header(data)
+        replay = cls(seed, difficulty, enemies, powerups, list(iter_runs(data)), time, moves, layout)
+        if replay.ticks != ticks:
+            raise ValueError(f'replay header says {ticks} ticks, inputs cover {replay.ticks}')
+        return replay
+    
+    @staticmethod
+    def hash_of(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()[:32]
+
+
+class ReplayRecorder:
+    """Collects per-tick input runs while a game is played"""
+    
+    def __init__(self, game):
+        self.seed = game.seed
+        self.difficulty = game.difficulty
+        self.runs: List[List[int]] = []
+        self.ticks = 0
+    
+    def record(self, player):
+        """Call at the start of every simulated tick"""
+        bits = pack_flags(player)
+        self.ticks += 1
+        runs = self.runs
+        if runs and runs[-1][0] == bits:
+            runs[-1][1] += 1
+        else:
+            runs.append([bits, 1])
+    
+    def truncate(self, ticks: int):
+        """Forget inputs after the first ticks (the game was rewound to that tick)"""
+        runs = self.runs
+        while runs and self.ticks - runs[-1][1] >= ticks:
+            self.ticks -= runs.pop()[1]
+        if runs and self.ticks > ticks:
+            runs[-1][1] -= self.ticks - ticks
+            self.ticks = ticks
+    
+    def finish(self, game, time: float) -> Replay:
+        return Replay(self.seed, self.difficulty, game.enable_enemies, game.enable_powerups,
+                      [(bits, count) for bits, count in self.runs], time, game.hud.move_count, game.layout)
+
+
+class ReplayPlayer:
+    """Re-runs a replay on the simulation core with fast-forward and seeking"""
+    
+    def __init__(self, replay: Replay, checkpoint_interval: int = 600, theme_name: str = 'classic'):
+        from game import Game
+        self.replay = replay
+        self.checkpoint_interval = checkpoint_interval
+        self.game = Game(replay.difficulty, theme_name, 'lines', seed=replay.seed, live=False,
+                         layout=replay.layout)
+        self.game.enable_enemies = replay.enemies
+        self.game.enable_powerups = replay.powerups
+        self.inputs = list(replay.inputs())
+        self.checkpoints: Dict[int, bytes] = {0: self.game.snapshot()}
+    
+    @property
+    def tick(self) -> int:
+        return self.game.tick
+    
+    @property
+    def finished(self) -> bool:
+        return self.game.tick >= len(self.inputs) or self.game.state != config.STATE_PLAYING
+    
+    def step(self) -> bool:
+        """Advance one tick; False once the inputs run out or the game has ended"""
+        if self.finished:
+            return False
+        apply_flags(self.game.player, self.inputs[self.game.tick])
+        self.game.update()
+        if self.game.tick % self.checkpoint_interval == 0 and self.game.tick not in self.checkpoints:
+            self.checkpoints[self.game.tick] = self.game.snapshot()
+        return True
+    
+    def fast_forward(self, ticks: Optional[int] = None) -> int:
+        """Run up to ticks more ticks (all remaining if None) without drawing; returns ticks run"""
+        ran = 0
+        while (ticks is None or ran < ticks) and self.step():
+            ran += 1
+        return ran
+    
+    def seek(self, tick: int):
+        """Jump to a tick, restoring the nearest earlier checkpoint when going backwards or far ahead"""
+        tick = max(0, min(tick, len(self.inputs)))
+        start = max(t for t in self.checkpoints if t <= tick)
+        if tick < self.game.tick or start > self.game.tick:
+            self.game.restore(self.checkpoints[start])
+        self.fast_forward(tick - self.game.tick)
+    
+    def verify(self) -> bool:
+        """Play to the end and check the recorded outcome (a win on the last tick, same move count)"""
+        self.fast_forward()
+        return (self.game.won and self.game.tick == len(self.inputs) and
+                self.game.hud.move_count == self.replay.moves)
@@ -0,0 +1,216 @@
+"""
+Server-side replay verification
+Submitted replays are re-simulated headless in a pool of worker processes; a
+run only reaches the leaderboard if it arrives at the maze exit within its
+claimed tick count, with its claimed move count, and no faster than the
+simulation allows for its claimed time.
+
+    verifier.submit(data, on_result)      # from request handlers, non-blocking
+    verifier.verify_many(blobs)           # batch re-checks and benchmarks
+"""
+
+import collections
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterable, List, Optional
+
+import config
+import metrics
+from replay import Replay
+
+
+VERIFICATIONS = metrics.counter('replay_verifications_total', 'Replays verified', ['result', 'reason'])
+VERIFY_SECONDS = metrics.histogram('replay_verify_seconds', 'Worker time to re-simulate one replay')
+
+# How far back replays_per_second looks
+RATE_WINDOW = 60.0
+
+
+def _init_worker():
+    """Worker process setup: headless pygame, no audio, no leaderboard writes"""
+    from headless import init_headless
+    init_headless()
+
+
+def _result(replay_hash: str, reason: Optional[str], started: float, **fields) -> Dict:
+    result = {'replay_hash': replay_hash, 'ok': reason is None, 'reason': reason,
+              'seconds': time.perf_counter() - started}
+    result.update(fields)
+    return result
+
+
+def verify_replay(data: bytes) -> Dict:
+    """Re-simulate one replay and judge its claims (runs in a worker process)"""
+    from events import PowerUpCollectedEvent
+    from powerups import TIME_BONUS_SECONDS
+    from replay import ReplayPlayer
+    
+    started = time.perf_counter()
+    replay_hash = Replay.hash_of(data)
+    try:
+        replay = Replay.from_bytes(data)
+    except ValueError as e:
+        return _result(replay_hash, 'malformed', started, detail=str(e))
+    claimed_ticks = replay.ticks
+    if claimed_ticks > config.REPLAY_MAX_TICKS:
+        return _result(replay_hash, 'too_long', started, ticks=claimed_ticks)
+    
+    player = ReplayPlayer(replay, checkpoint_interval=claimed_ticks + 1)  # Straight run, no checkpoints
+    bonuses = []
+    player.game.events.subscribe(PowerUpCollectedEvent, lambda events: bonuses.extend(
+        event for event in events if event.power_type == 'time'))
+    player.fast_forward()
+    game = player.game
+    fields = {'ticks': game.tick, 'moves': game.hud.move_count, 'seed': replay.seed,
+              'difficulty': replay.difficulty, 'time': replay.time}
+    
+    if not game.won:
+        return _result(replay_hash, 'no_exit', started, **fields)
+    if game.hud.move_count != replay.moves:
+        return _result(replay_hash, 'moves', started, **fields)
+    # The HUD clock is whole seconds of wall time plus TIME_BONUS_SECONDS per
+    # time power-up (it moves the start back); the game cannot tick faster
+    # than real time, so that is a floor for the claim
+    simulated = game.tick / config.SIM_TICKS_PER_SECOND + len(bonuses) * TIME_BONUS_SECONDS
+    if replay.time < int(simulated) - 1:
+        return _result(replay_hash, 'time', started, **fields)
+    return _result(replay_hash, None, started, **fields)
+
+
+class ReplayVerifier:
+    """Bounded queue of replays verified by a process pool, with running statistics"""
+    
+    def __init__(self, workers: Optional[int] = None, max_pending: int = 10000, results_kept: int = 4096):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.results_kept = results_kept
+        self.pending = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.reasons: Dict[str, int] = collections.Counter()
+        self.results: 'collections.OrderedDict[str, Dict]' = collections.OrderedDict()
+        self._inflight: Dict[str, Future] = {}  # Replay hash -> verdict future, while queued
+        self._completed = collections.deque()  # Completion times inside RATE_WINDOW
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+    
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Spawned rather than forked: callers are threaded web servers
+                self._executor = ProcessPoolExecutor(self.workers, multiprocessing.get_context('spawn'),
+                                                     initializer=_init_worker)
+            return self._executor
+    
+    def submit(self, data: bytes, on_result: Optional[Callable[[Dict], None]] = None) -> Optional[Future]:
+        """Queue a replay; on_result(result) runs when it is judged. None when the queue is full.
+        A replay already queued or accepted is not verified again: the future of its
+        verdict comes back and on_result is not called"""
+        replay_hash = Replay.hash_of(data)
+        with self._lock:
+            inflight = self._inflight.get(replay_hash)
+            if inflight is not None:
+                return inflight
+            known = self.results.get(replay_hash)
+            if known is not None and known['ok']:
+                settled = Future()
+                settled.set_result(known)
+                return settled
+            if self.pending >= self.max_pending:
+                return None
+            self.pending += 1
+            self._remember(replay_hash, {'replay_hash': replay_hash, 'ok': None, 'reason': 'pending'})
+            verdict = self._inflight[replay_hash] = Future()
+        
+        try:
+            future = self._pool().submit(verify_replay, data)
+        except BrokenProcessPool:
+            # A worker died (killed, out of memory); start a fresh pool for this and later jobs
+            with self._lock:
+                self._executor = None
+            future = self._pool().submit(verify_replay, data)
+        
+        def done(future: Future):
+            try:
+                result = future.result()
+            except Exception as e:  # Worker crashed; judge it unverifiable rather than lose it
+                result = {'replay_hash': replay_hash, 'ok': False, 'reason': 'error', 'detail': str(e)}
+            self._record(result)
+            try:
+                if on_result is not None:
+                    on_result(result)
+            finally:
+                with self._lock:
+                    self._inflight.pop(replay_hash, None)
+                verdict.set_result(result)
+        
+        future.add_done_callback(done)
+        return verdict
+    
+    def verify_many(self, blobs: Iterable[bytes], chunksize: int = 8) -> List[Dict]:
+        """Verify a batch across the pool and wait for every result"""
+        blobs = list(blobs)
+        with self._lock:
+            self.pending += len(blobs)
+        results = []
+        for result in self._pool().map(verify_replay, blobs, chunksize=chunksize):
+            self._record(result)
+            results.append(result)
+        return results
+    
+    def _remember(self, replay_hash: str, result: Dict):
+        self.results[replay_hash] = result
+        self.results.move_to_end(replay_hash)
+        while len(self.results) > self.results_kept:
+            self.results.popitem(last=False)
+    
+    def _record(self, result: Dict):
+        now = time.monotonic()
+        with self._lock:
+            self.pending -= 1
+            if result['ok']:
+                self.accepted += 1
+            else:
+                self.rejected += 1
+                self.reasons[result['reason']] += 1
+            self._remember(result['replay_hash'], result)
+            self._completed.append(now)
+            while self._completed and self._completed[0] < now - RATE_WINDOW:
+                self._completed.popleft()
+        VERIFICATIONS.labels('accepted' if result['ok'] else 'rejected', result['reason'] or '').inc()
+        if 'seconds' in result:
+            VERIFY_SECONDS.observe(result['seconds'])
+    
+    def result(self, replay_hash: str) -> Optional[Dict]:
+        with self._lock:
+            return self.results.get(replay_hash)
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            judged = self.accepted + self.rejected
+            now = time.monotonic()
+            recent = sum(1 for stamp in self._completed if stamp >= now - RATE_WINDOW)
+            return {
+                'workers': self.workers,
+                'pending': self.pending,
+                'accepted': self.accepted,
+                'rejected': self.rejected,
+                'rejection_rate': self.rejected / judged if judged else 0.0,
+                'replays_per_second': recent / RATE_WINDOW,
+                'reasons': dict(self.reasons),
+            }
+    
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+verifier = ReplayVerifier(config.REPLAY_VERIFY_WORKERS, config.REPLAY_VERIFY_QUEUE)
+metrics.gauge('replay_verifier_pending', 'Replays waiting for or under verification', lambda: verifier.pending)
+metrics.gauge('replay_rejection_ratio', 'Share of verified replays rejected', lambda: verifier.stats()['rejection_rate'])
@@ -0,0 +1,198 @@
+"""
+Bounded pool of desktop game processes for the web launcher
+Keeps a few pre-warmed interpreters (pygame and the game already imported)
+waiting on stdin, caps how many games run at once, queues launches beyond
+the cap and reaps exited or long-idle children
+"""
+
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import metrics
+
+
+_LAUNCHED = metrics.counter('game_processes_launched_total', 'Desktop games started by the pool', ['warm'])
+_REAPED = metrics.counter('game_processes_reaped_total', 'Exited or retired game processes').labels()
+
+
+class Worker:
+    """One child interpreter, either warm (waiting) or running a game"""
+    
+    __slots__ = ('process', 'spawned', 'launched', 'prewarmed')
+    
+    def __init__(self, process: subprocess.Popen):
+        self.process = process
+        self.spawned = time.monotonic()
+        self.launched = None  # Set when the worker is handed a game
+        self.prewarmed = False
+    
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+    
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+
+class SessionPool:
+    """Launches games from warm workers within a concurrency cap"""
+    
+    def __init__(self, command: List[str], cwd: str, max_games: int = 4, warm_size: int = 1,
+                 queue_size: int = 8, warm_idle_timeout: float = 600, reap_interval: float = 1.0):
+        self.command = command
+        self.cwd = cwd
+        self.max_games = max_games
+        self.warm_size = warm_size
+        self.queue_size = queue_size
+        self.warm_idle_timeout = warm_idle_timeout
+        self.reap_interval = reap_interval
+        
+        self.warm: deque = deque()
+        self.games: Dict[int, Worker] = {}
+        self.queued = 0  # Launch requests waiting for a free game slot
+        self.launched_total = 0
+        self.reaped_total = 0
+        self.last_demand = time.monotonic()
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._reaper: Optional[threading.Thread] = None
+    
+    def start(self):
+        """Warm the pool and start the reaper thread"""
+        with self.lock:
+            self._fill_warm()
+        self._reaper = threading.Thread(target=self._reap_loop, name='session-reaper', daemon=True)
+        self._reaper.start()
+    
+    def launch(self) -> Dict:
+        """Start a game now, queue it, or refuse when the queue is full"""
+        with self.lock:
+            self.last_demand = time.monotonic()
+            idle = self._reap()
+            if len(self.games) < self.max_games:
+                worker = self._start_game()
+                result = {'status': 'started', 'pid': worker.pid, 'warm': worker.prewarmed}
+            elif self.queued < self.queue_size:
+                self.queued += 1
+                result = {'status': 'queued', 'position': self.queued}
+            else:
+                result = {'status': 'full'}
+        self._retire(idle)
+        return result
+    
+    def stats(self) -> Dict:
+        """Pool and queue state for the status endpoints"""
+        with self.lock:
+            now = time.monotonic()
+            return {
+                'max_games': self.max_games,
+                'running': len(self.games),
+                'warm': len(self.warm),
+                'queued': self.queued,
+                'queue_size': self.queue_size,
+                'launched_total': self.launched_total,
+                'reaped_total': self.reaped_total,
+                'games': [{'pid': w.pid, 'uptime': round(now - w.launched, 1)} for w in self.games.values()],
+            }
+    
+    def shutdown(self):
+        """Stop the reaper and retire warm workers; running games are left alone"""
+        self._stop.set()
+        with self.lock:
+            idle = self._take_warm()
+        self._retire(idle)
+    
+    def _retire(self, workers: List[Worker]):
+        """Closing stdin tells a warm worker to exit without opening a window (call without the lock)"""
+        for worker in workers:
+            try:
+                worker.process.stdin.close()
+                worker.process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                worker.process.kill()
+    
+    # Internals (callers hold self.lock)
+    
+    def _spawn(self) -> Worker:
+        process = subprocess.Popen(self.command, cwd=self.cwd, stdin=subprocess.PIPE,
+                                   start_new_session=True)
+        return Worker(process)
+    
+    def _start_game(self) -> Worker:
+        """Hand a game to a warm worker, spawning one cold if none is ready"""
+        worker = None
+        while self.warm and worker is None:
+            candidate = self.warm.popleft()
+            if candidate.alive():
+                worker = candidate
+                worker.prewarmed = True
+            else:
+                self.reaped_total += 1
+                _REAPED.inc()
+        if worker is None:
+            worker = self._spawn()
+        try:
+            worker.process.stdin.write(b'launch\n')
+            worker.process.stdin.close()
+        except BrokenPipeError:
+            # Died between the liveness check and the hand-off - fall back to a cold start
+            worker = self._spawn()
+            worker.process.stdin.write(b'launch\n')
+            worker.process.stdin.close()
+        worker.launched = time.monotonic()
+        self.games[worker.pid] = worker
+        self.launched_total += 1
+        _LAUNCHED.labels('true' if worker.prewarmed else 'false').inc()
+        self._fill_warm()
+        return worker
+    
+    def _take_warm(self) -> List[Worker]:
+        """Remove every warm worker, counting them as reaped; retire them once the lock is released"""
+        workers = list(self.warm)
+        self.warm.clear()
+        self.reaped_total += len(workers)
+        _REAPED.inc(len(workers))
+        return workers
+    
+    def _fill_warm(self):
+        """Keep warm workers for free game slots, unless nobody has launched in a while"""
+        if time.monotonic() - self.last_demand > self.warm_idle_timeout:
+            return
+        wanted = min(self.warm_size, self.max_games - len(self.games))
+        while len(self.warm) < wanted:
+            self.warm.append(self._spawn())
+    
+    def _reap(self) -> List[Worker]:
+        """Drop exited children and start queued launches; returns the warm workers
+        idle past warm_idle_timeout, for the caller to retire after releasing the lock"""
+        for pid in [pid for pid, worker in self.games.items() if not worker.alive()]:
+            del self.games[pid]
+            self.reaped_total += 1
+            _REAPED.inc()
+        
+        for worker in [w for w in self.warm if not w.alive()]:
+            self.warm.remove(worker)
+            self.reaped_total += 1
+            _REAPED.inc()
+        
+        while self.queued and len(self.games) < self.max_games:
+            self._start_game()
+            self.queued -= 1
+        self._fill_warm()
+        
+        if time.monotonic() - self.last_demand > self.warm_idle_timeout:
+            return self._take_warm()
+        return []
+    
+    def _reap_loop(self):
+        while not self._stop.wait(self.reap_interval):
+            try:
+                with self.lock:
+                    idle = self._reap()
+                self._retire(idle)
+            except Exception as e:
+                # Keep reaping: a failed launch is retried on the next pass
+                print(f"Warning: session reaper: {e}")
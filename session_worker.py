@@ -0,0 +1,20 @@
+"""
+Pre-warmed game interpreter for the web launcher's session pool
+Imports pygame and the whole game up front, then blocks until the launcher
+writes a line to stdin; end of input means the pool retired it unused
+"""
+
+import sys
+import time
+
+import main as game_main
+
+
+def wait_for_launch() -> bool:
+    """Block until the launcher asks for a game"""
+    return bool(sys.stdin.readline().strip())
+
+
+if __name__ == '__main__':
+    if wait_for_launch():
+        game_main.main(launch_time=time.perf_counter())
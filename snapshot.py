@@ -0,0 +1,166 @@
+"""
+Compact game-state snapshots
+Game.snapshot() packs everything the simulation reads into a small bytes blob
+and Game.restore() puts it back: the maze by seed and layout, the player, enemies as
+columns, a power-up collection bitmap, effect timers by remaining ticks, the
+HUD counters, the puzzle keys held and, when enemies are on, the state of the
+entity generator that steers their patrols. Used for checkpoints, quick-save and replay seeking.
+
+Layout (little endian):
+    header   4s magic, B version, I seed, B difficulty, B flags, I run id, B state, I tick, I moves,
+             f elapsed, H time bonus, d x, d y, b velX, b velY, B held flags, h cell x, h cell y,
+             d braid, d terrain, B key colours
+    powerups B count, collected bitmap
+    enemies  B count, H x[], H y[], B type[], B direction[], B move timer[]
+    effects  B count, (B effect, i ticks left; -1 = permanent)[]
+    keys     B key colours held, bit per colour
+    rng      625 I (only with enemies on)
+"""
+
+import struct
+import time
+from typing import Tuple
+
+from enemies import ENEMY_TYPES, Enemy
+from replay import DIFFICULTY_NAMES, Layout, apply_flags, pack_flags
+
+
+MAGIC = b'MZS1'
+VERSION = 3
+HEADER = struct.Struct('<4sBIBBIBIIfHddbbBhhddB')
+EFFECT = struct.Struct('<Bi')
+
+FLAG_ENEMIES = 1
+FLAG_POWERUPS = 2
+FLAG_WON = 4
+FLAG_RNG = 8
+
+DIRECTIONS = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+EFFECT_NAMES = ['speed', 'hint']
+RNG_STATE = struct.Struct('<625I')
+
+
+def _columns(count: int, code: str, values) -> bytes:
+    return struct.pack(f'<{count}{code}', *values)
+
+
+def pack(game) -> bytes:
+    """Snapshot of a game's simulation state"""
+    player, hud = game.player, game.hud
+    manager = game.powerup_manager
+    enemies = game.enemy_manager.enemies
+    flags = ((FLAG_ENEMIES if game.enable_enemies else 0) | (FLAG_POWERUPS if game.enable_powerups else 0) |
+             (FLAG_WON if game.won else 0) | (FLAG_RNG if game.enable_enemies else 0))
+    elapsed = time.time() - hud.start_time if hud.start_time else 0.0
+    out = [HEADER.pack(MAGIC, VERSION, game.seed, DIFFICULTY_NAMES.index(game.difficulty), flags,
+                       game.run_id, game.state, game.tick, hud.move_count, elapsed, manager.time_bonus,
+                       player.x, player.y, player.velX, player.velY, pack_flags(player),
+                       game.current_cell[0], game.current_cell[1], *game.layout)]
+    
+    collected = 0
+    for i, powerup in enumerate(manager.powerups):
+        collected |= powerup.collected << i
+    out.append(bytes([len(manager.powerups)]))
+    out.append(collected.to_bytes((len(manager.powerups) + 7) // 8, 'little'))
+    
+    count = len(enemies)
+    out.append(bytes([count]))
+    out.append(_columns(count, 'H', (enemy.x for enemy in enemies)))
+    out.append(_columns(count, 'H', (enemy.y for enemy in enemies)))
+    out.append(_columns(count, 'B', (ENEMY_TYPES.index(enemy.type) for enemy in enemies)))
+    out.append(_columns(count, 'B', (DIRECTIONS.index(enemy.direction) for enemy in enemies)))
+    out.append(_columns(count, 'B', (enemy.move_timer for enemy in enemies)))
+    
+    effects = [(EFFECT_NAMES.index(name), -1 if handle is None else manager.timers.remaining(handle))
+               for name, stack in manager.effects.stacks.items() for handle in stack]
+    out.append(bytes([len(effects)]))
+    out.extend(EFFECT.pack(*effect) for effect in effects)
+    out.append(bytes([game.keys_held]))
+    
+    if flags & FLAG_RNG:
+        version, state, gauss = game.rng.getstate()
+        out.append(RNG_STATE.pack(*state))
+    return b''.join(out)
+
+
+def read_options(data: bytes) -> Tuple[int, str, bool, bool, int, Layout]:
+    """(seed, difficulty, enemies, powerups, run id, layout) of a snapshot, to rebuild the maze before unpacking"""
+    if len(data) < HEADER.size or data[:4] != MAGIC or data[4] != VERSION:
+        raise ValueError('not a snapshot (or an unsupported version)')
+    fields = HEADER.unpack_from(data)
+    _, _, seed, difficulty, flags, run_id = fields[:6]
+    if difficulty >= len(DIFFICULTY_NAMES):
+        raise ValueError(f'unknown difficulty index {difficulty}')
+    return (seed, DIFFICULTY_NAMES[difficulty], bool(flags & FLAG_ENEMIES), bool(flags & FLAG_POWERUPS), run_id,
+            Layout(*fields[-3:]))
+
+
+def unpack(game, data: bytes):
+    """Load a snapshot into a game already on the snapshot's seed, difficulty and layout"""
+    try:
+        (_, _, _, _, flags, _, state, tick, moves, elapsed, time_bonus,
+         x, y, vel_x, vel_y, held, cell_x, cell_y, _, _, _) = HEADER.unpack_from(data)
+        pos = HEADER.size
+        
+        game.enable_enemies = bool(flags & FLAG_ENEMIES)
+        game.enable_powerups = bool(flags & FLAG_POWERUPS)
+        game.won = bool(flags & FLAG_WON)
+        game.state = state
+        game.tick = tick
+        game.current_cell = (cell_x, cell_y)
+        game.hud.move_count = moves
+        game.hud.start_time = time.time() - elapsed
+        game.events.clear()
+        
+        player = game.player
+        player.set_position(x, y)
+        player.velX, player.velY = vel_x, vel_y
+        apply_flags(player, held)
+        
+        manager = game.powerup_manager
+        count = data[pos]
+        collected = int.from_bytes(data[pos + 1:pos + 1 + (count + 7) // 8], 'little')
+        pos += 1 + (count + 7) // 8
+        if count != len(manager.powerups):
+            raise ValueError('snapshot power-ups do not match this maze')
+        for i, powerup in enumerate(manager.powerups):
+            powerup.collected = bool(collected >> i & 1)
+        manager.time_bonus = time_bonus
+        
+        count = data[pos]
+        pos += 1
+        xs = struct.unpack_from(f'<{count}H', data, pos)
+        ys = struct.unpack_from(f'<{count}H', data, pos + 2 * count)
+        types, directions, move_timers = (data[pos + 4 * count:pos + 5 * count],
+                                          data[pos + 5 * count:pos + 6 * count],
+                                          data[pos + 6 * count:pos + 7 * count])
+        pos += 7 * count
+        enemies = game.enemy_manager.enemies
+        if len(enemies) != count:
+            enemies[:] = [Enemy(0, 0, ENEMY_TYPES[types[i]], game.theme, game.rng) for i in range(count)]
+        for enemy, ex, ey, kind, direction, move_timer in zip(enemies, xs, ys, types, directions, move_timers):
+            if enemy.type != ENEMY_TYPES[kind]:
+                enemy.__init__(ex, ey, ENEMY_TYPES[kind], game.theme, game.rng)
+            enemy.x, enemy.y = ex, ey
+            enemy.direction = DIRECTIONS[direction]
+            enemy.move_timer = move_timer
+        
+        # Running effects are cancelled (the wheel drops them lazily) and re-added
+        # with the snapshot's ticks left, so they expire on the same tick
+        effects = manager.effects
+        for name in list(effects.stacks):
+            effects.cancel(name)
+        count = data[pos]
+        pos += 1
+        for _ in range(count):
+            effect, remaining = EFFECT.unpack_from(data, pos)
+            pos += EFFECT.size
+            effects.add(EFFECT_NAMES[effect], None if remaining < 0 else remaining)
+        game.keys_held = data[pos]
+        pos += 1
+        
+        if flags & FLAG_RNG:
+            game.rng.setstate((3, RNG_STATE.unpack_from(data, pos), None))
+            pos += RNG_STATE.size
+    except (struct.error, IndexError):
+        raise ValueError('truncated snapshot')
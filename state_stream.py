@@ -0,0 +1,94 @@
+"""
+Compact game-state deltas for Server-Sent Events
+A keyframe carries the whole state (maze walls included); after that each tick
+only sends the fields that changed, so traffic follows activity rather than
+maze size or entity count. Encoded as compact JSON with short keys:
+
+    t   tick                  s   game state        mv  move count
+    p   player pixel [x, y]   e   {enemy index: [x, y]}
+    pu  {power-up index: [x, y, type]}  (null once collected)
+    fx  {effect: expiry tick, -1 if permanent}  (null once expired)
+    m   maze {w, h, cell, walls}  (keyframes only, walls base64 of Maze.to_wall_bytes)
+"""
+
+import base64
+import json
+from typing import Dict, Optional
+
+
+def capture(game) -> Dict:
+    """Current game state as a flat dict of comparable fields"""
+    enemies = game.enemy_manager.enemies if game.enable_enemies else []
+    powerups = game.powerup_manager.powerups if game.enable_powerups else []
+    effects = game.powerup_manager.effects
+    return {
+        's': game.state,
+        'mv': game.hud.move_count,
+        'p': [int(game.player.x), int(game.player.y)],
+        'e': {str(i): [enemy.x, enemy.y] for i, enemy in enumerate(enemies)},
+        'pu': {str(i): [p.x, p.y, p.type] for i, p in enumerate(powerups) if not p.collected},
+        # Expiry tick instead of ticks left so a running timer doesn't change every tick
+        'fx': {name: (-1 if effects.remaining(name) == -1 else game.tick + effects.remaining(name))
+               for name in effects.stacks},
+    }
+
+
+def diff(previous: Dict, current: Dict) -> Dict:
+    """Fields of current that differ from previous; dict fields diff per entry, None marks removal"""
+    delta = {}
+    for key, value in current.items():
+        old = previous.get(key)
+        if isinstance(value, dict):
+            old = old or {}
+            changed = {k: v for k, v in value.items() if old.get(k) != v}
+            changed.update((k, None) for k in old if k not in value)
+            if changed:
+                delta[key] = changed
+        elif value != old:
+            delta[key] = value
+    return delta
+
+
+def _encode(event: str, tick: int, payload: Dict) -> str:
+    data = json.dumps(payload, separators=(',', ':'))
+    return f"event: {event}\nid: {tick}\ndata: {data}\n\n"
+
+
+class StateStream:
+    """Turns successive game ticks into SSE keyframe and delta messages"""
+    
+    def __init__(self, keyframe_interval: int = 300):
+        self.keyframe_interval = keyframe_interval
+        self.previous: Optional[Dict] = None
+        self.maze = None
+        self.last_keyframe = 0
+        self.keyframes = 0
+        self.deltas = 0
+    
+    def keyframe(self, game) -> str:
+        state = capture(game)
+        self.previous = state
+        self.maze = game.maze
+        self.last_keyframe = game.tick
+        self.keyframes += 1
+        payload = dict(state, t=game.tick, m={
+            'w': game.maze.width,
+            'h': game.maze.height,
+            'cell': game.difficulty_config['cell_size'],
+            'walls': base64.b64encode(game.maze.to_wall_bytes()).decode('ascii'),
+        })
+        return _encode('keyframe', game.tick, payload)
+    
+    def update(self, game) -> Optional[str]:
+        """Message for the current tick, or None when nothing changed"""
+        if (self.previous is None or game.maze is not self.maze or
+                game.tick - self.last_keyframe >= self.keyframe_interval or game.tick < self.last_keyframe):
+            return self.keyframe(game)
+        state = capture(game)
+        delta = diff(self.previous, state)
+        if not delta:
+            return None
+        self.previous = state
+        self.deltas += 1
+        delta['t'] = game.tick
+        return _encode('delta', game.tick, delta)
@@ -0,0 +1,100 @@
+"""
+Terrain under the maze cells
+Maze.terrain holds one byte per cell (row-major, like the wall bytes) naming
+the floor: mud slows the player and enemies down, ice speeds them up, and a
+conveyor speeds up movement along its direction and slows it against. Plain
+floor everywhere (maze.terrain is None) keeps the original fixed speed.
+
+Crossing a cell costs COST_UNIT // speed, a small integer, so weighted routes
+can be found with a bucket queue (pathfinding.dijkstra).
+"""
+
+from typing import Tuple
+
+import pygame
+
+
+PLAIN, MUD, ICE, CONVEYOR_UP, CONVEYOR_RIGHT, CONVEYOR_DOWN, CONVEYOR_LEFT = range(7)
+KINDS = 7
+
+# Conveyor -> (dx, dy) it carries things along
+CONVEYORS = {CONVEYOR_UP: (0, -1), CONVEYOR_RIGHT: (1, 0), CONVEYOR_DOWN: (0, 1), CONVEYOR_LEFT: (-1, 0)}
+
+# Player speed in px per tick. Wall checks run before a move with a 4 px wall,
+# so anything above 5 could step through a left or top wall in one tick
+BASE_SPEED = 4
+SLOW_SPEED = 2
+FAST_SPEED = 5
+SPEEDS = {PLAIN: BASE_SPEED, MUD: SLOW_SPEED, ICE: FAST_SPEED}
+
+COST_UNIT = 20  # Divisible by every speed: a cell costs 5 plain, 10 mud, 4 ice
+MAX_COST = COST_UNIT // SLOW_SPEED
+
+COLORS = {MUD: (110, 80, 45), ICE: (150, 205, 235)}
+CONVEYOR_COLOR = (85, 85, 110)
+CONVEYOR_ARROW = (190, 190, 120)
+
+# Step order of pathfinding._steps: up, right, down, left
+DIRECTIONS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+
+def speed(kind: int, dx: int, dy: int) -> int:
+    """Px per tick on this terrain when moving along (dx, dy); conveyors only
+    change movement along their own axis"""
+    carry = CONVEYORS.get(kind)
+    if carry is None:
+        return SPEEDS[kind]
+    along = carry[0] * dx + carry[1] * dy
+    return FAST_SPEED if along > 0 else SLOW_SPEED if along < 0 else BASE_SPEED
+
+
+def enter_costs() -> Tuple[Tuple[int, ...], ...]:
+    """enter_costs()[kind][direction]: cost of crossing a cell of that kind moving
+    in DIRECTIONS[direction]"""
+    return tuple(tuple(COST_UNIT // speed(kind, dx, dy) for dx, dy in DIRECTIONS) for kind in range(KINDS))
+
+
+def kind_at(maze, x: int, y: int) -> int:
+    if maze.terrain is None or not (0 <= x < maze.width and 0 <= y < maze.height):
+        return PLAIN
+    return maze.terrain[x + y * maze.width]
+
+
+def pace(maze, player, tile: int):
+    """Set the player's speed for this tick from the floor under it (call before check_move)"""
+    if maze.terrain is None:
+        return
+    dx = player.right_pressed - player.left_pressed
+    dy = player.down_pressed - player.up_pressed
+    player.speed = speed(kind_at(maze, int(player.x // tile), int(player.y // tile)), dx, dy)
+
+
+def move_delay(maze, enemy) -> int:
+    """Ticks between an enemy's steps on the floor under it, scaled like the player's speed"""
+    if maze.terrain is None:
+        return enemy.move_delay
+    dx, dy = enemy.direction
+    return enemy.move_delay * BASE_SPEED // speed(kind_at(maze, enemy.x, enemy.y), dx, dy)
+
+
+def draw(screen: pygame.Surface, maze, tile: int, offset_x: int, offset_y: int):
+    """Fill non-plain cells (under the walls), with an arrow on each conveyor"""
+    if maze.terrain is None:
+        return
+    width = maze.width
+    for index, kind in enumerate(maze.terrain):
+        if not kind:
+            continue
+        left = offset_x + index % width * tile
+        top = offset_y + index // width * tile
+        pygame.draw.rect(screen, COLORS.get(kind, CONVEYOR_COLOR), (left, top, tile, tile))
+        carry = CONVEYORS.get(kind)
+        if carry:
+            cx, cy = left + tile // 2, top + tile // 2
+            dx, dy = carry
+            reach = tile // 4
+            tip = (cx + dx * reach, cy + dy * reach)
+            # Chevron: two strokes from behind the tip, either side of the axis
+            for side in (-1, 1):
+                tail = (cx - dx * reach // 2 + dy * side * reach, cy - dy * reach // 2 + dx * side * reach)
+                pygame.draw.line(screen, CONVEYOR_ARROW, tail, tip, 2)
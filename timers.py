@@ -0,0 +1,185 @@
+"""
+Hierarchical timer wheel for timed effects
+Time is measured in simulation ticks (one Game.update call per tick), so the
+per-tick cost depends on how many timers expire rather than how many exist
+"""
+
+from typing import Callable, Dict, List, Optional
+
+
+SLOT_BITS = 6
+SLOTS = 1 << SLOT_BITS  # 64 slots per level
+SLOT_MASK = SLOTS - 1
+LEVELS = 4  # 64^4 ticks (~77 hours at 60 FPS) before the overflow list is used
+
+
+class TimerHandle:
+    """A scheduled callback; keep it to cancel or query the timer"""
+    
+    __slots__ = ('deadline', 'callback', 'args', 'cancelled', 'fired')
+    
+    def __init__(self, deadline: int, callback: Callable, args: tuple):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+        self.fired = False
+    
+    @property
+    def pending(self) -> bool:
+        """True until the timer fires or is cancelled"""
+        return not (self.cancelled or self.fired)
+
+
+class TimerWheel:
+    """Hashed hierarchical timer wheel ticking in simulation steps"""
+    
+    def __init__(self):
+        self.now = 0
+        self.wheels: List[List[List[TimerHandle]]] = [
+            [[] for _ in range(SLOTS)] for _ in range(LEVELS)
+        ]
+        self.overflow: List[TimerHandle] = []
+        self.pending_count = 0
+    
+    def schedule(self, delay: int, callback: Callable, *args) -> TimerHandle:
+        """Call callback(*args) after delay ticks (at least one)"""
+        handle = TimerHandle(self.now + max(1, int(delay)), callback, args)
+        self._insert(handle)
+        self.pending_count += 1
+        return handle
+    
+    def cancel(self, handle: TimerHandle):
+        """Cancel a pending timer (lazily removed when its slot comes up)"""
+        if handle.pending:
+            handle.cancelled = True
+            self.pending_count -= 1
+    
+    def remaining(self, handle: TimerHandle) -> int:
+        """Ticks left before the timer fires, 0 if it is no longer pending"""
+        if not handle.pending:
+            return 0
+        return handle.deadline - self.now
+    
+    def advance(self, ticks: int = 1):
+        """Advance the wheel, firing every timer whose deadline is reached"""
+        for _ in range(ticks):
+            self.now += 1
+            now = self.now
+            
+            # Cascade upper levels down when a lower level wraps around,
+            # highest level first so entries can settle more than one level
+            if now & SLOT_MASK == 0:
+                top = 1
+                while top < LEVELS and (now >> (SLOT_BITS * top)) & SLOT_MASK == 0:
+                    top += 1
+                if top == LEVELS:
+                    self._requeue(self.overflow)
+                    self.overflow = []
+                for level in range(min(top, LEVELS - 1), 0, -1):
+                    index = (now >> (SLOT_BITS * level)) & SLOT_MASK
+                    bucket = self.wheels[level][index]
+                    self.wheels[level][index] = []
+                    self._requeue(bucket)
+            
+            bucket = self.wheels[0][now & SLOT_MASK]
+            if not bucket:
+                continue
+            self.wheels[0][now & SLOT_MASK] = []
+            for handle in bucket:
+                if handle.cancelled:
+                    continue
+                handle.fired = True
+                self.pending_count -= 1
+                handle.callback(*handle.args)
+    
+    def clear(self):
+        """Drop every pending timer without firing it"""
+        for wheel in self.wheels:
+            for bucket in wheel:
+                for handle in bucket:
+                    handle.cancelled = True
+                bucket.clear()
+        for handle in self.overflow:
+            handle.cancelled = True
+        self.overflow = []
+        self.pending_count = 0
+    
+    def _requeue(self, bucket: List[TimerHandle]):
+        for handle in bucket:
+            if not handle.cancelled:
+                self._insert(handle)
+    
+    def _insert(self, handle: TimerHandle):
+        """Place a timer in the lowest level whose span still covers its deadline"""
+        deadline = handle.deadline
+        for level in range(LEVELS):
+            shift = SLOT_BITS * (level + 1)
+            if deadline >> shift == self.now >> shift:
+                index = (deadline >> (SLOT_BITS * level)) & SLOT_MASK
+                self.wheels[level][index].append(handle)
+                return
+        self.overflow.append(handle)
+
+
+class EffectTimers:
+    """Named, stackable, cancellable effects driven by a TimerWheel"""
+    
+    def __init__(self, wheel: TimerWheel):
+        self.wheel = wheel
+        self.stacks: Dict[str, List[Optional[TimerHandle]]] = {}
+    
+    def add(self, name: str, duration: Optional[int] = None,
+            on_expire: Optional[Callable[[str], None]] = None) -> Optional[TimerHandle]:
+        """Start one stack of an effect; duration None means it lasts until cancelled"""
+        stack = self.stacks.setdefault(name, [])
+        if duration is None:
+            stack.append(None)
+            return None
+        
+        handle = self.wheel.schedule(duration, self._expire, name, on_expire)
+        stack.append(handle)
+        return handle
+    
+    def cancel(self, name: str, handle: Optional[TimerHandle] = None):
+        """Cancel one stack of an effect, or every stack if no handle is given"""
+        stack = self.stacks.get(name)
+        if not stack:
+            return
+        if handle is None:
+            for entry in stack:
+                if entry:
+                    self.wheel.cancel(entry)
+            del self.stacks[name]
+            return
+        if handle in stack:
+            self.wheel.cancel(handle)
+            stack.remove(handle)
+            if not stack:
+                del self.stacks[name]
+    
+    def is_active(self, name: str) -> bool:
+        """True while at least one stack of the effect is running"""
+        return name in self.stacks
+    
+    def stack_count(self, name: str) -> int:
+        """Number of running stacks of an effect"""
+        return len(self.stacks.get(name, ()))
+    
+    def remaining(self, name: str) -> int:
+        """Ticks until the longest stack expires (-1 for permanent, 0 if inactive)"""
+        stack = self.stacks.get(name)
+        if not stack:
+            return 0
+        if None in stack:
+            return -1
+        return max(self.wheel.remaining(handle) for handle in stack)
+    
+    def _expire(self, name: str, on_expire):
+        stack = self.stacks.get(name)
+        if stack:
+            stack[:] = [entry for entry in stack if entry is None or entry.pending]
+            if not stack:
+                del self.stacks[name]
+        if on_expire:
+            on_expire(name)
@@ -5,6 +5,7 @@ UI components: Menu, HUD, Win Screen, Pause Menu
 import pygame
 import config
 from themes import get_theme
+from assets import get_font, get_overlay
 
 
 class Button:
@@ -16,7 +17,7 @@ class Button:
         self.theme = theme
         self.action = action
         self.hovered = False
-        
+    
     def draw(self, screen, font):
         """Draw button"""
         color = self.theme['button_hover'] if self.hovered else self.theme['button']
@@ -44,12 +45,13 @@ class Menu:
     
     def __init__(self, theme):
         self.theme = theme
-        self.font_large = pygame.font.Font(None, 72)
-        self.font_medium = pygame.font.Font(None, 36)
-        self.font_small = pygame.font.Font(None, 24)
+        self.font_large = get_font(72)
+        self.font_medium = get_font(36)
+        self.font_small = get_font(24)
         self.selected_difficulty = 'medium'
         self.selected_theme = 'classic'
         self.selected_visual_style = 'blocks'  # 'blocks' or 'lines'
+        self.loading_progress = 1.0  # Background asset warm-up, set by the loader hook
         
         # Create buttons
         button_width = 250
@@ -68,9 +70,10 @@ class Menu:
         )
         
         self.difficulty_buttons = {
-            'easy': Button(center_x - 150, start_y + 80, 100, 40, "Easy", theme, 'difficulty_easy'),
-            'medium': Button(center_x - 50, start_y + 80, 100, 40, "Medium", theme, 'difficulty_medium'),
-            'hard': Button(center_x + 50, start_y + 80, 100, 40, "Hard", theme, 'difficulty_hard'),
+            'easy': Button(center_x - 200, start_y + 80, 100, 40, "Easy", theme, 'difficulty_easy'),
+            'medium': Button(center_x - 100, start_y + 80, 100, 40, "Medium", theme, 'difficulty_medium'),
+            'hard': Button(center_x, start_y + 80, 100, 40, "Hard", theme, 'difficulty_hard'),
+            'doors': Button(center_x + 100, start_y + 80, 100, 40, "Doors", theme, 'difficulty_doors'),
         }
         
         self.theme_buttons = {}
@@ -175,6 +178,13 @@ class Menu:
                 pygame.draw.rect(screen, highlight_color, inner_rect, 2)
         
         self.quit_button.draw(screen, self.font_medium)
+        
+        # Thin progress bar while assets warm up in the background
+        if self.loading_progress < 1.0:
+            bar_rect = pygame.Rect(0, config.WINDOW_HEIGHT - 4, config.WINDOW_WIDTH, 4)
+            pygame.draw.rect(screen, self.theme['button'], bar_rect)
+            bar_rect.width = int(config.WINDOW_WIDTH * self.loading_progress)
+            pygame.draw.rect(screen, self.theme['exit'], bar_rect)
     
     def handle_event(self, event):
         """Handle menu events"""
@@ -246,7 +256,7 @@ class HUD:
     
     def __init__(self, theme):
         self.theme = theme
-        self.font = pygame.font.Font(None, 24)
+        self.font = get_font(24)
         self.start_time = None
         self.move_count = 0
     
@@ -256,9 +266,9 @@ class HUD:
         self.start_time = time.time()
         self.move_count = 0
     
-    def increment_move(self):
+    def increment_move(self, count=1):
         """Increment move counter"""
-        self.move_count += 1
+        self.move_count += count
     
     def get_time(self):
         """Get elapsed time in seconds"""
@@ -267,7 +277,8 @@ class HUD:
         import time
         return int(time.time() - self.start_time)
     
-    def format_time(self, seconds):
+    @staticmethod
+    def format_time(seconds):
         """Format time as MM:SS"""
         mins = seconds // 60
         secs = seconds % 60
@@ -293,6 +304,42 @@ class HUD:
         moves_rect.topleft = (config.WINDOW_WIDTH - moves_rect.width - 20, 18)
         screen.blit(moves_text, moves_rect)
     
+    def draw_profiler(self, screen, profiler):
+        """Draw frame-time graph and per-phase breakdown"""
+        font = get_font(16)
+        summary = profiler.summary()
+        phases = [name for name in profiler.phase_names if name in summary]
+        
+        graph_width, graph_height = 240, 60
+        panel_height = graph_height + 34 + 14 * len(phases)
+        panel = pygame.Rect(10, config.WINDOW_HEIGHT - panel_height - 10,
+                            graph_width + 20, panel_height)
+        pygame.draw.rect(screen, (0, 0, 0), panel)
+        pygame.draw.rect(screen, self.theme['text'], panel, 1)
+        
+        # Rolling frame-time graph, 1 px per frame, full height = 33 ms
+        graph_left = panel.x + 10
+        graph_bottom = panel.y + 10 + graph_height
+        scale = graph_height / (2 / 60)
+        for i, frame_time in enumerate(profiler.frame_times(graph_width)):
+            bar = min(graph_height, int(frame_time * scale))
+            color = (100, 220, 100) if frame_time <= 1 / 60 else (255, 90, 90)
+            pygame.draw.line(screen, color, (graph_left + i, graph_bottom),
+                             (graph_left + i, graph_bottom - bar))
+        budget_y = graph_bottom - int(scale / 60)
+        pygame.draw.line(screen, (255, 255, 100), (graph_left, budget_y),
+                         (graph_left + graph_width, budget_y))
+        
+        if not summary:
+            return
+        y = graph_bottom + 4
+        lines = [f"frame {summary['frame'] * 1000:5.2f} ms  p99 {summary['p99'] * 1000:5.2f}"
+                 f"  worst {summary['worst'] * 1000:5.2f}"]
+        lines += [f"{name:<14} {summary[name] * 1000:6.2f} ms" for name in phases]
+        for line in lines:
+            screen.blit(font.render(line, True, self.theme['text']), (graph_left, y))
+            y += 14
+    
     def reset(self):
         """Reset HUD stats"""
         self.start_time = None
@@ -304,9 +351,9 @@ class WinScreen:
     
     def __init__(self, theme):
         self.theme = theme
-        self.font_large = pygame.font.Font(None, 64)
-        self.font_medium = pygame.font.Font(None, 32)
-        self.font_small = pygame.font.Font(None, 24)
+        self.font_large = get_font(64)
+        self.font_medium = get_font(32)
+        self.font_small = get_font(24)
         self.time = 0
         self.moves = 0
         
@@ -334,6 +381,17 @@ class WinScreen:
             theme,
             'menu'
         )
+        
+        # Replay the same maze against the best recorded runs
+        self.race_button = Button(
+            center_x - button_width // 2,
+            520,
+            button_width,
+            button_height,
+            "Race Ghosts",
+            theme,
+            'race'
+        )
     
     def set_stats(self, time, moves):
         """Set completion stats"""
@@ -343,10 +401,7 @@ class WinScreen:
     def draw(self, screen):
         """Draw win screen"""
         # Semi-transparent overlay
-        overlay = pygame.Surface((config.WINDOW_WIDTH, config.WINDOW_HEIGHT))
-        overlay.set_alpha(200)
-        overlay.fill((0, 0, 0))
-        screen.blit(overlay, (0, 0))
+        screen.blit(get_overlay(200), (0, 0))
         
         # Win message
         win_text = self.font_large.render("YOU WON!", True, self.theme['exit'])
@@ -354,8 +409,7 @@ class WinScreen:
         screen.blit(win_text, win_rect)
         
         # Stats
-        hud = HUD(self.theme)
-        time_text = self.font_medium.render(f"Time: {hud.format_time(self.time)}", True, self.theme['text'])
+        time_text = self.font_medium.render(f"Time: {HUD.format_time(self.time)}", True, self.theme['text'])
         time_rect = time_text.get_rect(center=(config.WINDOW_WIDTH // 2, 280))
         screen.blit(time_text, time_rect)
         
@@ -366,6 +420,7 @@ class WinScreen:
         # Buttons
         self.restart_button.draw(screen, self.font_small)
         self.menu_button.draw(screen, self.font_small)
+        self.race_button.draw(screen, self.font_small)
     
     def handle_event(self, event):
         """Handle win screen events"""
@@ -373,6 +428,7 @@ class WinScreen:
             pos = event.pos
             self.restart_button.check_hover(pos)
             self.menu_button.check_hover(pos)
+            self.race_button.check_hover(pos)
         
         elif event.type == pygame.MOUSEBUTTONDOWN:
             pos = event.pos
@@ -383,6 +439,10 @@ class WinScreen:
             action = self.menu_button.check_click(pos)
             if action:
                 return action
+            
+            action = self.race_button.check_click(pos)
+            if action:
+                return action
         
         return None
     
@@ -391,6 +451,7 @@ class WinScreen:
         self.theme = theme
         self.restart_button.theme = theme
         self.menu_button.theme = theme
+        self.race_button.theme = theme
 
 
 class PauseMenu:
@@ -398,8 +459,8 @@ class PauseMenu:
     
     def __init__(self, theme):
         self.theme = theme
-        self.font_large = pygame.font.Font(None, 48)
-        self.font_medium = pygame.font.Font(None, 28)
+        self.font_large = get_font(48)
+        self.font_medium = get_font(28)
         
         # Buttons
         button_width = 200
@@ -429,10 +490,7 @@ class PauseMenu:
     def draw(self, screen):
         """Draw pause menu"""
         # Semi-transparent overlay
-        overlay = pygame.Surface((config.WINDOW_WIDTH, config.WINDOW_HEIGHT))
-        overlay.set_alpha(180)
-        overlay.fill((0, 0, 0))
-        screen.blit(overlay, (0, 0))
+        screen.blit(get_overlay(180), (0, 0))
         
         # Pause text
         pause_text = self.font_large.render("PAUSED", True, self.theme['text'])